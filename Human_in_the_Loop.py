@@ -1,13 +1,15 @@
 import os
-from typing import Annotated, List, TypedDict
-from langchain_groq import ChatGroq
-from langchain_community.tools import DuckDuckGoSearchRun
+import uuid
+from typing import Annotated, List, Optional, TypedDict
+from models import AppConfig, get_chat_model
+from search_client import search_tool
 from langchain_core.tools import tool
 from langchain_core.messages import BaseMessage, HumanMessage
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode
-from langgraph.checkpoint.memory import MemorySaver
+from sqlite_checkpointer import get_checkpointer
+from graph_runner import ConsolePrinter, run_graph
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -18,21 +20,13 @@ def terminal_notifier(message: str):
     """Sends a critical alert to the system admin terminal."""
     return f"ADMIN NOTIFIED: {message}"
 
-search_tool = DuckDuckGoSearchRun()
 tools = [search_tool, terminal_notifier]
-tool_node = ToolNode(tools)
 
 # --- 2. STATE DEFINITION ---
 class AgentState(TypedDict):
     # 'add_messages' is the reducer that handles state updates
     messages: Annotated[List[BaseMessage], add_messages]
 
-llm = ChatGroq(model="llama-3.3-70b-versatile", temperature=0)
-llm_with_tools = llm.bind_tools(tools)
-
-def call_model(state: AgentState):
-    return {"messages": [llm_with_tools.invoke(state["messages"])]}
-
 def should_continue(state: AgentState):
     last_message = state["messages"][-1]
     if not last_message.tool_calls:
@@ -40,42 +34,55 @@ def should_continue(state: AgentState):
     return "tools"
 
 # --- 4. GRAPH ASSEMBLY WITH INTERRUPT ---
-graph = StateGraph(AgentState)
-graph.add_node("agent", call_model)
-graph.add_node("tools", tool_node)
+# Built from `config` on demand, so importing this module neither creates the model nor opens the DB
+def build_app(config: Optional[AppConfig] = None, llm=None, checkpointer=None):
+    config = config or AppConfig()
+    llm = llm if llm is not None else get_chat_model(config.model, config.temperature)
+    llm_with_tools = llm.bind_tools(tools)
+
+    def call_model(state: AgentState):
+        return {"messages": [llm_with_tools.invoke(state["messages"])]}
+
+    graph = StateGraph(AgentState)
+    graph.add_node("agent", call_model)
+    graph.add_node("tools", ToolNode(tools))
 
-graph.set_entry_point("agent")
-graph.add_conditional_edges("agent", should_continue)
-graph.add_edge("tools", "agent")
+    graph.set_entry_point("agent")
+    graph.add_conditional_edges("agent", should_continue)
+    graph.add_edge("tools", "agent")
 
-# Injected State: MemorySaver acts as the database for the agent's memory
-memory = MemorySaver()
+    # Injected State: the SQLite checkpointer acts as the database for the agent's memory
+    # (it survives restarts and only keeps the last 20 checkpoints per thread)
+    if checkpointer is None:
+        checkpointer = get_checkpointer(config.checkpoint_db, config.keep_last)
 
-# HUMAN-IN-THE-LOOP: We pause the graph before 'tools' execute
-app = graph.compile(checkpointer=memory, interrupt_before=["tools"])
+    # HUMAN-IN-THE-LOOP: We pause the graph before 'tools' execute
+    return graph.compile(checkpointer=checkpointer, interrupt_before=["tools"])
 
 # --- 5. EXECUTION LOOP (COLLABORATIVE) ---
-config = {"configurable": {"thread_id": "revision_session_1"}}
-query = {"messages": [HumanMessage(content="Search for the current weather in Surat and notify the admin.")]}
-
-# STEP A: RUN UNTIL INTERRUPT
-print("--- AGENT IS THINKING ---")
-for chunk in app.stream(query, config, stream_mode="values"):
-    chunk["messages"][-1].pretty_print()
-
-# The graph is now paused because 'terminal_notifier' is a tool.
-# We can inspect the state to see what it wants to do.
-snapshot = app.get_state(config)
-print(f"\n[PAUSED] Next Node: {snapshot.next}")
-print(f"[PAUSED] Tool Call: {snapshot.values['messages'][-1].tool_calls[0]['name']}")
-
-# STEP B: HUMAN INTERVENTION
-user_choice = input("\nDo you want to allow this action? (y/n): ")
-
-if user_choice.lower() == 'y':
-    print("--- RESUMING EXECUTION ---")
-    # Passing 'None' tells LangGraph to resume from the checkpoint
-    for chunk in app.stream(None, config, stream_mode="values"):
-        chunk["messages"][-1].pretty_print()
-else:
-    print("Action cancelled by human.")
\ No newline at end of file
+if __name__ == "__main__":
+    app = build_app(AppConfig.from_env())
+
+    # A fresh thread per run: checkpoints now outlive the process, so a fixed id would resume last run's paused thread
+    config = {"configurable": {"thread_id": f"revision_session_{uuid.uuid4()}"}}
+    query = {"messages": [HumanMessage(content="Search for the current weather in Surat and notify the admin.")]}
+
+    # STEP A: RUN UNTIL INTERRUPT
+    print("--- AGENT IS THINKING ---")
+    run_graph(app, query, config, consumers=[ConsolePrinter()])
+
+    # The graph is now paused because 'terminal_notifier' is a tool.
+    # We can inspect the state to see what it wants to do.
+    snapshot = app.get_state(config)
+    print(f"\n[PAUSED] Next Node: {snapshot.next}")
+    print(f"[PAUSED] Tool Call: {snapshot.values['messages'][-1].tool_calls[0]['name']}")
+
+    # STEP B: HUMAN INTERVENTION
+    user_choice = input("\nDo you want to allow this action? (y/n): ")
+
+    if user_choice.lower() == 'y':
+        print("--- RESUMING EXECUTION ---")
+        # Passing 'None' tells LangGraph to resume from the checkpoint
+        run_graph(app, None, config, consumers=[ConsolePrinter()])
+    else:
+        print("Action cancelled by human.")
\ No newline at end of file
@@ -1,92 +1,125 @@
+import asyncio
 import os
+import threading
 import uuid
-from typing import Annotated, List, TypedDict, Literal
-from langchain_groq import ChatGroq
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.document_loaders import PyPDFDirectoryLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from typing import Annotated, Dict, List, Optional, TypedDict, Literal
+from models import AppConfig, embedding_store_id, get_chat_model, get_embeddings
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
-from langchain_classic.indexes import SQLRecordManager, index
 from langgraph.graph.message import add_messages
-from langgraph.checkpoint.memory import MemorySaver
+from sqlite_checkpointer import get_checkpointer
+from graph_runner import ConsolePrinter, run_graph
+from tracing import Tracer, instrument_checkpointer, instrument_embeddings, trace_graph
+from vector_index import IndexConfig, chroma_collection_metadata
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Importing this module is cheap: Chroma, the sentence-transformer and the PDF indexing stack are
+# imported and loaded by the first retrieval (get_retrieval_service), not by import or build_app().
+
 PDF_DATA_PATH = "./my_pdfs"      # Folder where you put your PDFs
 DB_PATH = "./chroma_db_pdf"     # Folder where the VectorDB stays
 RECORD_MANAGER_DB = "sqlite:///record_manager.sqlite"  # SQL DB for tracking indexed docs
+INGEST_WORKERS = os.cpu_count()  # Processes extracting PDF pages in parallel
+MANIFEST_DB = "pdf_manifest.sqlite"  # (path, size, mtime, hash) per PDF, kept next to record_manager.sqlite
+COLLECTION_NAME = "pdf_collection"
+# Chroma's HNSW knobs (these values are Chroma's own defaults). They only apply when the
+# collection is first created, so raise them before indexing a large corpus into a fresh DB_PATH.
+CHROMA_INDEX = IndexConfig(kind="hnsw", hnsw_m=16, ef_construction=100, ef_search=10)
 
-if not os.path.exists(PDF_DATA_PATH):
-    os.makedirs(PDF_DATA_PATH)
-def get_incremental_retriever():
+def get_incremental_retriever(config: Optional[AppConfig] = None):
     """Syncs the folder with the VectorDB without deleting old data."""
-    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+    from langchain_chroma import Chroma
+    from langchain_classic.indexes import SQLRecordManager
+    from chunker import Chunker, ChunkDeduplicator
+    from pdf_ingestion import iter_pdf_files, ingest_pdfs, remove_sources
+    from pdf_manifest import FileManifest
+
+    config = config or AppConfig()
+    if not os.path.exists(PDF_DATA_PATH):
+        os.makedirs(PDF_DATA_PATH)
+
+    # Cached by (model, sha256 of text): unchanged chunks are never re-embedded after a restart
+    embeddings = get_embeddings(config.embedding_model, config.embedding_backend)
+    # One collection, record-manager namespace and manifest per embedding model and backend:
+    # switching either re-indexes the PDFs into a fresh collection instead of mixing vector spaces
+    store_id = embedding_store_id(config.embedding_model, config.embedding_backend)
+    collection_name = f"{COLLECTION_NAME}-{store_id}"
+    root, ext = os.path.splitext(MANIFEST_DB)
+    manifest_db = f"{root}-{store_id}{ext}"
     
     # 1. Initialize the VectorStore
     vectorstore = Chroma(
-        collection_name="pdf_collection",
+        collection_name=collection_name,
         embedding_function=embeddings,
-        persist_directory=DB_PATH
+        persist_directory=DB_PATH,
+        collection_metadata=chroma_collection_metadata(CHROMA_INDEX)
     )
 
     # 2. Setup the Record Manager (tracks what has been indexed)
     record_manager = SQLRecordManager(
-        namespace="chroma/pdf_collection",
+        namespace=f"chroma/{collection_name}",
         db_url=RECORD_MANAGER_DB
     )
     record_manager.create_schema()
 
-    # 3. Load and Split
-    loader = PyPDFDirectoryLoader(PDF_DATA_PATH)
-    raw_docs = loader.load()
-    
-    if not raw_docs:
+    # 3. Find the PDFs and keep only the ones that changed since the last run
+    # (pages are NOT loaded here; they are streamed in step 4)
+    pdf_files = iter_pdf_files(PDF_DATA_PATH)
+    manifest = FileManifest(manifest_db)
+    changes = manifest.diff(pdf_files)
+    print(f"--- PDF CHANGES: {len(changes.new)} new, {len(changes.modified)} modified, "
+          f"{len(changes.deleted)} deleted, {len(changes.unchanged)} unchanged ---")
+
+    if changes.deleted:
+        removed = remove_sources(changes.deleted, record_manager, vectorstore)
+        print(f"--- REMOVED {removed} CHUNKS FROM DELETED PDFs ---")
+
+    if not pdf_files:
+        manifest.commit(changes)
         print("--- NO PDFs FOUND ---")
         return vectorstore.as_retriever()
 
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=600, chunk_overlap=120,)
-    chunks = text_splitter.split_documents(raw_docs)
+    if not changes.changed:
+        manifest.commit(changes)
+        print("--- ALL PDFs UNCHANGED, SKIPPING INDEXING ---")
+        return vectorstore.as_retriever(search_kwargs={"k": 5})
+
+    # Same chunks as RecursiveCharacterTextSplitter(600, 120): at most 120 characters of overlap,
+    # backed up to a separator. Cut in one pass (chunker.py).
+    # Repeated headers, footers and boilerplate within a PDF are dropped before they are embedded.
+    text_splitter = Chunker(chunk_size=600, chunk_overlap=120)
+    deduplicator = ChunkDeduplicator()
 
     # 4. RUN INDEXING (The Magic Step)
+    # Pages are extracted on a process pool, split as they arrive and embedded/written in batches.
     # cleanup="incremental" means: 
     # - Add new docs
     # - Skip unchanged docs
-    # - Delete docs from the DB if they were removed from the folder
-    indexing_stats = index(
-        chunks,
+    # - Delete old chunks of a modified PDF (PDFs removed from the folder were purged in step 3)
+    indexing_stats = ingest_pdfs(
+        changes.changed,
         record_manager,
         vectorstore,
-        cleanup="incremental",
-        source_id_key="source",
-        key_encoder="sha256"
+        text_splitter,
+        workers=INGEST_WORKERS,
+        deduplicator=deduplicator
     )
+    manifest.commit(changes)
 
     print(f"--- INDEXING STATS: {indexing_stats} ---")
+    print(f"--- DEDUP: {deduplicator.report()} ---")
+    print(f"--- EMBEDDING CACHE: {embeddings.stats()} ---")
     # k=5: Retrieves the 5 most relevant segments for the LLM to analyze
     return vectorstore.as_retriever(search_kwargs={"k": 5})
 
-retriever = get_incremental_retriever()
-
 class RAGState(TypedDict):
     messages: Annotated[List[BaseMessage], add_messages]
     context: List[str] # Injected knowledge snippets
     iterations: int
 
-llm = ChatGroq(model="llama-3.3-70b-versatile", temperature=0)
-
-def retrieve_node(state: RAGState):
-    """Retrieves relevant info from PDF VectorDB and stores it in context."""
-    print("--- NODE: RETRIEVAL ---")
-    query = state["messages"][-1].content
-    if retriever is None:
-        return {"context": ["No documents found in knowledge base."]}
-
-    docs = retriever.invoke(query)
-    return {"context": [d.page_content for d in docs]}
-
 def grade_docs_edge(state: RAGState) -> Literal["generate", "rewrite"]:
     """Conditional Edge: Self-correct if retrieval is poor."""
     print("--- EDGE: GRADING RELEVANCE ---")
@@ -94,64 +127,130 @@ def grade_docs_edge(state: RAGState) -> Literal["generate", "rewrite"]:
         return "rewrite"
     return "generate"
 
-def rewrite_node(state: RAGState):
-    """Rewrites the query for better PDF searching."""
-    print("--- NODE: REWRITING QUERY ---")
-    original = state["messages"][-1].content
-    # Iteration check to prevent infinite loops
-    if state.get("iterations", 0) > 3:
-        return {"messages": [HumanMessage(content="Final attempt search...")]}
-
-    msg = llm.invoke(f"Rewrite this question to be more specific for a PDF search: {original}")
-    return {"messages": [HumanMessage(content=msg.content)], "iterations": state.get("iterations", 0) + 1}
-
-def generate_node(state: RAGState):
-    """Generates final answer using context."""
-    print("--- NODE: GENERATE ANSWER ---")
-    context_text = "\n".join(state["context"])
-    user_query = state["messages"][0].content
-    prompt = [
-        SystemMessage(content=f"Use this PDF context to answer. If not found, say you don't know.\n\nContext:\n{context_text}"),
-        HumanMessage(content=user_query)
-    ]
-    response = llm.invoke(prompt)
-    return {"messages": [response]}
-
-
-graph = StateGraph(RAGState)
-graph.add_node("retrieve", retrieve_node)
-graph.add_node("generate", generate_node)
-graph.add_node("rewrite", rewrite_node)
-graph.set_entry_point("retrieve")
-graph.add_conditional_edges(
-    "retrieve",
-    grade_docs_edge,
-    {
-        "generate": "generate",
-        "rewrite": "rewrite"
-    }
-)
-graph.add_edge("rewrite", "retrieve")
-graph.add_edge("generate",END)
-
-checkpointer = MemorySaver()
-app = graph.compile(checkpointer=checkpointer)
-
-session_id = str(uuid.uuid4())
-config_session = {"configurable": {"thread_id": session_id}}
-print(f"\n[SYSTEM] Session Started with ID: {session_id}")
-
-input_state = {
-        "messages": [HumanMessage(content="How was NVIDIA's 2024 financial performance?")],
-        "context": [],
-        "iterations": 0
-    }
-
-for chunk in app.stream(input_state, config=config_session, stream_mode="values"):
-    chunk["messages"][-1].pretty_print()
-
-final_state = app.get_state(config_session)
-print("\n" + "="*50)
-print("FINAL PDF AGENT ANSWER:")
-print(final_state.values["messages"][-1].content)
-print("="*50)
\ No newline at end of file
+def build_retrieval_service(config: Optional[AppConfig] = None):
+    from retrieval_service import RetrievalService
+
+    retriever = get_incremental_retriever(config)
+    # Micro-batches queries from concurrent graph runs into one embedding call + one k-NN search
+    return RetrievalService(
+        retriever.vectorstore,
+        k=retriever.search_kwargs.get("k", 4),
+        max_batch_size=32,
+        max_wait=0.005
+    )
+
+_retrieval_services: Dict[tuple, object] = {}
+_retrieval_lock = threading.Lock()
+
+def get_retrieval_service(config: Optional[AppConfig] = None):
+    """The PDF retrieval service, synced and built on the first call and shared after that."""
+    config = config or AppConfig()
+    key = (config.embedding_model, config.embedding_backend)
+    with _retrieval_lock:
+        service = _retrieval_services.get(key)
+        if service is None:
+            service = _retrieval_services[key] = build_retrieval_service(config)
+        return service
+
+def build_app(config: Optional[AppConfig] = None, llm=None, retrieval=None, checkpointer=None):
+    """Compiles the PDF RAG graph from `config` (defaults: AppConfig()).
+
+    Everything it talks to is injectable (the model, anything with retrieve()/aretrieve(), the
+    checkpointer), so it can run offline (see benchmarks/). Defaults are the shared singletons;
+    the default retrieval service is only built by the first query.
+    """
+    config = config or AppConfig()
+    llm = llm if llm is not None else get_chat_model(config.model, config.temperature)
+    if checkpointer is None:
+        checkpointer = get_checkpointer(config.checkpoint_db, config.keep_last)
+
+    def retrieve_node(state: RAGState):
+        """Retrieves relevant info from PDF VectorDB and stores it in context."""
+        print("--- NODE: RETRIEVAL ---")
+        query = state["messages"][-1].content
+        service = retrieval if retrieval is not None else get_retrieval_service(config)
+        docs = service.retrieve(query)
+        return {"context": [d.page_content for d in docs]}
+
+    async def aretrieve_node(state: RAGState):
+        """Async variant of retrieve_node for graphs driven with ainvoke/astream."""
+        print("--- NODE: RETRIEVAL ---")
+        query = state["messages"][-1].content
+        # The first query may have to index the PDFs: off the event loop
+        service = retrieval if retrieval is not None else await asyncio.to_thread(get_retrieval_service, config)
+        docs = await service.aretrieve(query)
+        return {"context": [d.page_content for d in docs]}
+
+    def rewrite_node(state: RAGState):
+        """Rewrites the query for better PDF searching."""
+        print("--- NODE: REWRITING QUERY ---")
+        original = state["messages"][-1].content
+        # Iteration check to prevent infinite loops
+        if state.get("iterations", 0) > 3:
+            return {"messages": [HumanMessage(content="Final attempt search...")]}
+
+        msg = llm.invoke(f"Rewrite this question to be more specific for a PDF search: {original}")
+        return {"messages": [HumanMessage(content=msg.content)], "iterations": state.get("iterations", 0) + 1}
+
+    def generate_node(state: RAGState):
+        """Generates final answer using context."""
+        print("--- NODE: GENERATE ANSWER ---")
+        context_text = "\n".join(state["context"])
+        user_query = state["messages"][0].content
+        prompt = [
+            SystemMessage(content=f"Use this PDF context to answer. If not found, say you don't know.\n\nContext:\n{context_text}"),
+            HumanMessage(content=user_query)
+        ]
+        response = llm.invoke(prompt)
+        return {"messages": [response]}
+
+    graph = StateGraph(RAGState)
+    # invoke/stream use retrieve_node, ainvoke/astream use aretrieve_node
+    graph.add_node("retrieve", RunnableLambda(retrieve_node, afunc=aretrieve_node))
+    graph.add_node("generate", generate_node)
+    graph.add_node("rewrite", rewrite_node)
+    graph.set_entry_point("retrieve")
+    graph.add_conditional_edges(
+        "retrieve",
+        grade_docs_edge,
+        {
+            "generate": "generate",
+            "rewrite": "rewrite"
+        }
+    )
+    graph.add_edge("rewrite", "retrieve")
+    graph.add_edge("generate",END)
+
+    return graph.compile(checkpointer=checkpointer)
+
+
+if __name__ == "__main__":
+    # Every run is traced here; a server would use TRACE_SAMPLE_RATE=0.01 or so
+    tracer = Tracer(sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "1.0")))
+    config = AppConfig.from_env()
+    retrieval = get_retrieval_service(config)
+    instrument_embeddings(retrieval.embeddings, tracer)
+    checkpointer = instrument_checkpointer(get_checkpointer(config.checkpoint_db, config.keep_last), tracer)
+    app = trace_graph(build_app(config, retrieval=retrieval, checkpointer=checkpointer), tracer)
+
+    session_id = str(uuid.uuid4())
+    config_session = {"configurable": {"thread_id": session_id}}
+    print(f"\n[SYSTEM] Session Started with ID: {session_id}")
+
+    input_state = {
+            "messages": [HumanMessage(content="How was NVIDIA's 2024 financial performance?")],
+            "context": [],
+            "iterations": 0
+        }
+
+    run_graph(app, input_state, config_session, consumers=[ConsolePrinter()])
+
+    final_state = app.get_state(config_session)
+    print("\n" + "="*50)
+    print("FINAL PDF AGENT ANSWER:")
+    print(final_state.values["messages"][-1].content)
+    print("="*50)
+
+    tracer.write_chrome_trace("rag_agent_trace.json")
+    tracer.write_openmetrics("rag_agent_metrics.txt")
+    print("Trace: rag_agent_trace.json (chrome://tracing) | Metrics: rag_agent_metrics.txt (OpenMetrics)")
\ No newline at end of file
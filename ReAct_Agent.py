@@ -1,13 +1,13 @@
 import os
-from typing import Annotated, List, TypedDict
-from langchain_groq import ChatGroq
-from langchain_community.tools import DuckDuckGoSearchRun
+from typing import Annotated, List, Optional, TypedDict
+from models import AppConfig, get_chat_model
+from search_client import search_tool
 from langchain_core.tools import tool
 from langchain_core.messages import BaseMessage, HumanMessage
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode
-from IPython.display import display, Image
+from graph_runner import ConsolePrinter, TraceRecorder, run_graph
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -25,23 +25,11 @@ def analyze_sentiment(text: str):
     score = sum(1 for word in positive_words if word in text_lower)
     return "Positive" if score > 1 else "Neutral/Negative"
 
-search_tool = DuckDuckGoSearchRun()
-
-tools = [search_tool, analyze_sentiment]
-tool_node = ToolNode(tools)
-
-llm = ChatGroq(model="llama-3.3-70b-versatile", temperature=0)
-llm_with_tools = llm.bind_tools(tools)
-
 # --- 2. DEFINE AGENT BEHAVIOR ---
 
 class StockInfoAgent(TypedDict):
     messages: Annotated[List[BaseMessage], add_messages]
 
-def call_model(state: StockInfoAgent):
-    response = llm_with_tools.invoke(state['messages'])
-    return {"messages": [response]}
-
 def should_continue(state: StockInfoAgent):
     last_message = state['messages'][-1]
 
@@ -51,47 +39,60 @@ def should_continue(state: StockInfoAgent):
     return END
 
 # --- 3. BUILD THE AGENT GRAPH ---
-graph = StateGraph(StockInfoAgent)
-
-graph.add_node("tool_node", tool_node)
-graph.add_node("call_model", call_model)
-graph.add_node("should_continue", should_continue)
-
-graph.set_entry_point("call_model")
-graph.add_conditional_edges(
-    "call_model",
-    should_continue,
-    {
-        "please continue": "tool_node",
-        END: END
+# Built from `config`; the model and tools are injectable so the same graph can run offline (see benchmarks/)
+def build_app(config: Optional[AppConfig] = None, llm=None, tools=None):
+    config = config or AppConfig()
+    tools = tools if tools is not None else [search_tool, analyze_sentiment]
+    llm = llm if llm is not None else get_chat_model(config.model, config.temperature)
+    llm_with_tools = llm.bind_tools(tools)
+
+    def call_model(state: StockInfoAgent):
+        response = llm_with_tools.invoke(state['messages'])
+        return {"messages": [response]}
+
+    graph = StateGraph(StockInfoAgent)
+
+    graph.add_node("tool_node", ToolNode(tools))
+    graph.add_node("call_model", call_model)
+    graph.add_node("should_continue", should_continue)
+
+    graph.set_entry_point("call_model")
+    graph.add_conditional_edges(
+        "call_model",
+        should_continue,
+        {
+            "please continue": "tool_node",
+            END: END
+        }
+    )
+    graph.add_edge("tool_node", "call_model")
+
+    return graph.compile()
+
+
+if __name__ == "__main__":
+    app = build_app(AppConfig.from_env())
+
+    query = {
+        "messages": [
+            HumanMessage(content="Find recent news about NVIDIA's and Apple's stock performance. "
+                                 "Analyze the sentiment of the findings and summarize "
+                                 "if the outlook is generally positive.")
+        ]
     }
-)
-graph.add_edge("tool_node", "call_model")
-
-app=graph.compile()
-
-query = {
-    "messages": [
-        HumanMessage(content="Find recent news about NVIDIA's and Apple's stock performance. "
-                             "Analyze the sentiment of the findings and summarize "
-                             "if the outlook is generally positive.")
-    ]
-}
-
-# --- OPTION 1: THE "BLACK BOX" APPROACH ---
-# .invoke() runs the entire graph from start to finish.
-# It returns only the FINAL state after the loop (END) is reached.
-result = app.invoke(query)
-print("-----------RESULT---------")
-# This prints the dictionary containing the full message history
-# after all tools have finished and the agent has summarized.
-print(result)
-print("-----------END------------")
-
-# --- OPTION 2: THE "X-RAY" APPROACH ---
-# .stream() allows you to watch the ReAct loop in real-time.
-# Each 'chunk' is the state of the graph after a node (agent or tools) finishes.
-for chunk in app.stream(query, stream_mode="values"):
-    # We access [-1] because stream_mode="values" gives the whole list;
-    # we only want to see the newest message produced in that step.
-    chunk["messages"][-1].pretty_print()
\ No newline at end of file
+
+    # --- ONE RUN, BOTH VIEWS ---
+    # .invoke() only returns the FINAL state; .stream() lets you watch the ReAct loop in real time.
+    # Calling both would run the whole graph (every LLM call and search) twice.
+    # run_graph() executes it once: the "X-ray" view is printed live by ConsolePrinter,
+    # TraceRecorder keeps a per-node timeline, and the "black box" final state is returned.
+    trace = TraceRecorder()
+    result = run_graph(app, query, consumers=[ConsolePrinter(), trace])
+
+    print("-----------TRACE----------")
+    trace.print_summary()
+    print("-----------RESULT---------")
+    # This prints the dictionary containing the full message history
+    # after all tools have finished and the agent has summarized.
+    print(result)
+    print("-----------END------------")
\ No newline at end of file
@@ -1,7 +1,7 @@
-import requests
-from typing import Dict
+from typing import Dict, Optional
 
-from langchain_groq import ChatGroq
+from models import AppConfig, get_chat_model
+from tool_http import WAQI_URL, city_key, get_http_client, waqi_ok
 from langchain_core.tools import tool
 # create_tool_calling_agent → creates an LLM that can reason + call tools
 #AgentExecutor → runs the reasoning loop
@@ -12,18 +12,15 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-llm = ChatGroq(model_name="llama-3.3-70b-versatile",temperature=0)
-
 @tool
 def get_city_aqi(city: str) -> Dict[str, int]:
     """
     Fetch current AQI for a city using WAQI API.
     """
-    url = f"https://api.waqi.info/feed/{city}/?token=demo"
-    response = requests.get(url, timeout=10)
-    response.raise_for_status()
-
-    data = response.json()
+    data = get_http_client().get_json(
+        f"{WAQI_URL}/feed/{city}/", params={"token": "demo"}, endpoint="waqi", cache_key=city_key("waqi", city),
+        cacheable=waqi_ok,
+    )
     if data["status"] != "ok":
         raise ValueError("AQI data unavailable")
 
@@ -57,15 +54,24 @@ prompt = ChatPromptTemplate.from_messages([
     ("placeholder", "{agent_scratchpad}")
 ])
 
-# CREATE AGENT
-agent = create_tool_calling_agent(llm=llm,tools=tools,prompt=prompt)
+# Built from `config` on demand: importing this module creates no model and makes no request
+def build_app(config: Optional[AppConfig] = None, llm=None) -> AgentExecutor:
+    config = config or AppConfig()
+    llm = llm if llm is not None else get_chat_model(config.model, config.temperature)
 
-agent_executor = AgentExecutor(agent=agent,tools=tools,
-    verbose=True   # IMPORTANT: shows reasoning + tool calls
-    )
+    # CREATE AGENT
+    agent = create_tool_calling_agent(llm=llm,tools=tools,prompt=prompt)
+
+    return AgentExecutor(agent=agent,tools=tools,
+        verbose=True   # IMPORTANT: shows reasoning + tool calls
+        )
+
+
+if __name__ == "__main__":
+    agent_executor = build_app(AppConfig.from_env())
 
-# RUN AGENT
-response = agent_executor.invoke({"input": "What is the current AQI in Chicago and should I exercise outdoors?"})
+    # RUN AGENT
+    response = agent_executor.invoke({"input": "What is the current AQI in Chicago and should I exercise outdoors?"})
 
-print("\n===== FINAL AGENT OUTPUT =====")
-print(response["output"])
+    print("\n===== FINAL AGENT OUTPUT =====")
+    print(response["output"])
@@ -0,0 +1,93 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Generic, List, Optional, TypeVar
+
+# Micro-batching: calls that arrive within a short window are merged into one batch call.
+# Many callers each submit one item; a single background thread collects up to
+# `max_batch_size` items (or whatever arrived within `max_wait` seconds of the first one),
+# runs `process_batch` once, and hands each caller its own result through a Future.
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    def __init__(self, process_batch: Callable[[List[T]], List[R]],
+                 max_batch_size: int = 32, max_wait: float = 0.005, name: str = "micro-batcher"):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.name = name
+        self.batches = 0
+        self.items = 0
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self) -> None:
+        # Started on first use so that creating a batcher costs nothing
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._worker.start()
+
+    def submit(self, item: T) -> "Future[R]":
+        self._ensure_worker()
+        future: "Future[R]" = Future()
+        self._queue.put((item, future))
+        return future
+
+    def run(self, item: T, timeout: Optional[float] = None) -> R:
+        """Sync front end: blocks the calling thread until this item's batch is done."""
+        return self.submit(item).result(timeout=timeout)
+
+    async def arun(self, item: T) -> R:
+        """asyncio front end: awaits the batch without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(item))
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            # Callers that gave up (arun cancelled, wait_for timed out) are dropped here; the rest
+            # can no longer be cancelled, so setting their results below cannot fail.
+            batch = [(item, future) for item, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+            self.batches += 1
+            self.items += len(items)
+            try:
+                results = list(self.process_batch(items))
+                if len(results) != len(items):
+                    raise RuntimeError(f"{self.name}: process_batch returned {len(results)} results "
+                                       f"for {len(items)} items")
+            except BaseException as e:  # the worker must outlive any batch
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
@@ -0,0 +1,150 @@
+from typing import List, TypedDict
+
+from langgraph.graph import END, StateGraph
+
+# The StateGraphs from the notebooks (Lopping.ipynb, Conditional_Agent.ipynb, Sequential_Agent.ipynb),
+# copied node for node so they can be imported and benchmarked. Keep them in sync with the notebooks.
+
+
+# --- Lopping.ipynb: BankState loop ---
+
+class BankState(TypedDict):
+    balance: int
+    goal: int
+    transactions: int
+
+
+def bank_checker(state: BankState):
+    print(f"--- Checking Balance: ${state['balance']} ---")
+    return state
+
+
+def work_job_node(state: BankState):
+    new_balance = state["balance"] + 100
+    print(f"--- Working... Added $100. New Total: ${new_balance} ---")
+    return {
+        "balance": new_balance,
+        "transactions": state["transactions"] + 1
+    }
+
+
+def check_goal_met(state: BankState):
+    if state["balance"] < state["goal"]:
+        return "keep_working"
+    return "stop"
+
+
+def build_bank_loop():
+    graph = StateGraph(BankState)
+    graph.add_node("checker", bank_checker)
+    graph.add_node("job", work_job_node)
+    graph.set_entry_point("checker")
+    graph.add_edge("job", "checker")
+    graph.add_conditional_edges("checker", check_goal_met, {"keep_working": "job", "stop": END})
+    return graph.compile()
+
+
+# --- Conditional_Agent.ipynb: TravelState router ---
+
+class TravelState(TypedDict):
+    destination: str
+    budget: int
+    distance: int
+    decision: str
+
+
+def check_budget(state: TravelState):
+    print("--- Node: Checking Budget ---")
+    if state["budget"] < 500:
+        return {"decision": "less budget"}
+    return {"budget": state["budget"]}
+
+
+def calculate_distance(state: TravelState) -> dict:
+    print("--- Node: Calculating Distance ---")
+    print(state)
+    dist = 1500 if state["destination"] == "Paris" else 700
+    return {"distance": dist}
+
+
+def luxury_plane(state: TravelState) -> dict:
+    print("--- Node: Booking Flight ---")
+    print(state)
+    return {"decision": "Flying in First Class!"}
+
+
+def economy_bus(state: TravelState) -> dict:
+    print("--- Node: Booking Bus ---")
+    print(state)
+    return {"decision": "Taking the scenic bus route."}
+
+
+def router_budget(state: TravelState):
+    print(state)
+    if state["budget"] < 500:
+        return "too less budget"
+    return "affordable"
+
+
+def router_distance(state: TravelState):
+    print(state)
+    if state["distance"] > 1000:
+        return "far"
+    return "near"
+
+
+def build_travel_router():
+    graph = StateGraph(TravelState)
+    graph.add_node("check_budget", check_budget)
+    graph.add_node("calculate_distance", calculate_distance)
+    graph.add_node("luxury_plane", luxury_plane)
+    graph.add_node("economy_bus", economy_bus)
+    graph.set_entry_point("check_budget")
+    graph.add_conditional_edges(
+        "check_budget", router_budget, {"too less budget": END, "affordable": "calculate_distance"}
+    )
+    graph.add_conditional_edges(
+        "calculate_distance", router_distance, {"far": "luxury_plane", "near": "economy_bus"}
+    )
+    graph.add_edge("luxury_plane", END)
+    graph.add_edge("economy_bus", END)
+    graph.add_edge("check_budget", END)
+    return graph.compile()
+
+
+# --- Sequential_Agent.ipynb: programmer -> error_finder -> fixer ---
+
+class CodeState(TypedDict):
+    code: str
+    errors: List[str]
+    iterations: int
+
+
+def genrate_code(state: CodeState):
+    print("---NODE: PROGRAMMER---")
+    print(state)
+    return {"code": "def hello() print('hi')"}
+
+
+def find_errors(state: CodeState):
+    print("--- Node 2: Identifying Error ---")
+    print(state)
+    return {"errors": ["SyntaxError: expected ':'"]}
+
+
+def suggest_fix(state: CodeState):
+    print("--- Node 3: Providing Fix ---")
+    print(state)
+    return {"errors": [], "iterations": state["iterations"] + 1}
+
+
+def build_sequential_agent():
+    graph = StateGraph(CodeState)
+    graph.add_node("programmer", genrate_code)
+    graph.add_node("error_finder", find_errors)
+    graph.add_node("fixer", suggest_fix)
+    graph.set_entry_point("programmer")
+    graph.add_edge("programmer", "error_finder")
+    graph.add_edge("error_finder", "fixer")
+    graph.set_finish_point("fixer")
+    return graph.compile()
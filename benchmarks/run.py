@@ -0,0 +1,165 @@
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from graph_runner import TraceRecorder
+from perf_stats import latency_summary, peak_rss_mb
+
+from benchmarks.suites import BENCHMARKS, Settings
+
+# Offline benchmark suite: every chain and graph in the repo, driven by FakeChatModel and stub tools.
+#
+#   python -m benchmarks.run                      # run everything, compare with benchmarks/baselines.json
+#   python -m benchmarks.run react_agent rag_chain
+#   python -m benchmarks.run --update-baselines   # accept the current numbers as the new baseline
+#
+# Each benchmark runs in its own interpreter, so peak RSS is that pipeline's alone.
+# A result worse than its baseline by more than --tolerance exits with status 1. So does a run that has
+# nothing to compare with (no baselines.json, a benchmark without a baseline, or other settings than the
+# recorded ones): a fresh checkout or CI must not pass just because the baseline is missing.
+# baselines.json is committed; re-record it with --update-baselines when a slowdown is intended.
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+# Absolute slack on top of the relative tolerance, so tiny numbers do not flap. The committed
+# baselines come from another machine: a few ms of scheduler noise, and a p99 that is close to the
+# max of 40 samples, must not fail CI on their own.
+LATENCY_SLACK_MS = {"p50_ms": 25.0, "p99_ms": 100.0}
+RSS_SLACK_MB = 25.0
+
+
+def node_times(traces: List[TraceRecorder]) -> Dict[str, float]:
+    """Mean milliseconds per node. A node's time is the gap since the previous node finished."""
+    totals, counts = defaultdict(float), defaultdict(int)
+    for trace in traces:
+        previous = 0.0
+        for event in trace.events:
+            totals[event["node"]] += event["t_ms"] - previous
+            counts[event["node"]] += 1
+            previous = event["t_ms"]
+    return {node: round(totals[node] / counts[node], 2) for node in totals}
+
+
+def measure(name: str, settings: Settings, requests: int, concurrency: int) -> dict:
+    workload = BENCHMARKS[name](settings)
+    latencies, traces = [], []
+
+    def one(i: int):
+        start = time.perf_counter()
+        result = workload.run(i)
+        latencies.append(time.perf_counter() - start)
+        if isinstance(result, TraceRecorder):
+            traces.append(result)
+
+    # The pipelines print as they go; that is not what is being measured
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        workload.run(-1)  # warm-up: imports, lazy clients, first-call caches
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, range(requests)))
+        elapsed = time.perf_counter() - start
+
+    summary = latency_summary(latencies)
+    return {
+        "requests": requests,
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(summary["p50_ms"], 2),
+        "p99_ms": round(summary["p99_ms"], 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "nodes_ms": node_times(traces),
+    }
+
+
+def regressions(name: str, result: dict, baseline: dict, tolerance: float, concurrency: int) -> List[str]:
+    found = []
+    for key, slack in LATENCY_SLACK_MS.items():
+        limit = baseline[key] * (1 + tolerance) + slack
+        if result[key] > limit:
+            found.append(f"{name}: {key} {result[key]:.1f} > {limit:.1f} (baseline {baseline[key]:.1f})")
+    # Same slack for throughput: each request may take the p50 slack longer, spread over the workers
+    limit = 1 / ((1 + tolerance) / baseline["throughput_rps"] + LATENCY_SLACK_MS["p50_ms"] / 1000 / concurrency)
+    if result["throughput_rps"] < limit:
+        found.append(f"{name}: throughput_rps {result['throughput_rps']:.1f} < {limit:.1f} "
+                     f"(baseline {baseline['throughput_rps']:.1f})")
+    limit = baseline["peak_rss_mb"] * (1 + tolerance) + RSS_SLACK_MB
+    if result["peak_rss_mb"] > limit:
+        found.append(f"{name}: peak_rss_mb {result['peak_rss_mb']:.0f} > {limit:.0f} "
+                     f"(baseline {baseline['peak_rss_mb']:.0f})")
+    return found
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for every chain and graph in the repo")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=Settings.latency)
+    parser.add_argument("--tokens-per-second", type=float, default=Settings.tokens_per_second)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown vs baseline")
+    parser.add_argument("--update-baselines", action="store_true")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    unknown = [name for name in args.names + ([args.child] if args.child else []) if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    settings = Settings(latency=args.latency, tokens_per_second=args.tokens_per_second)
+
+    if args.child:
+        print(json.dumps(measure(args.child, settings, args.requests, args.concurrency)))
+        return 0
+
+    config = {"requests": args.requests, "concurrency": args.concurrency,
+              "latency": args.latency, "tokens_per_second": args.tokens_per_second}
+    baselines = {}
+    if os.path.exists(BASELINES_PATH):
+        with open(BASELINES_PATH) as f:
+            baselines = json.load(f)
+    comparable = baselines.get("config") == config
+    results, failures = {}, []
+    if not args.update_baselines:
+        if not baselines:
+            failures.append(f"no baselines at {BASELINES_PATH}; record them with --update-baselines")
+        elif not comparable:
+            failures.append(f"baselines were recorded with {baselines.get('config')}, not {config}; "
+                            "run with the recorded settings or re-record with --update-baselines")
+    print(f"{'benchmark':<24}{'req/s':>9}{'p50 ms':>10}{'p99 ms':>10}{'RSS MB':>9}  per-node ms")
+    for name in args.names or list(BENCHMARKS):
+        output = subprocess.check_output([
+            sys.executable, "-m", "benchmarks.run", "--child", name,
+            "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+            "--latency", str(args.latency), "--tokens-per-second", str(args.tokens_per_second),
+        ])
+        result = json.loads(output.decode().strip().splitlines()[-1])
+        results[name] = result
+        nodes = " ".join(f"{node}={ms:.1f}" for node, ms in result["nodes_ms"].items())
+        print(f"{name:<24}{result['throughput_rps']:>9.1f}{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+              f"{result['peak_rss_mb']:>9.0f}  {nodes}")
+        baseline = baselines.get("results", {}).get(name)
+        if comparable and not args.update_baselines:
+            if baseline:
+                failures += regressions(name, result, baseline, args.tolerance, args.concurrency)
+            else:
+                failures.append(f"{name}: no baseline; record one with --update-baselines")
+
+    if args.update_baselines:
+        stored = baselines.get("results", {}) if comparable else {}
+        with open(BASELINES_PATH, "w") as f:
+            json.dump({"config": config, "results": {**stored, **results}}, f, indent=2, sort_keys=True)
+        print(f"baselines written to {BASELINES_PATH}")
+
+    if failures:
+        print("\n!!! PERFORMANCE REGRESSION (or nothing to compare with) !!!")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+import asyncio
+import time
+from typing import List
+
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import tool
+
+from fake_chat_model import tool_call
+
+# Offline stand-ins for everything the pipelines talk to over the network.
+# Latencies are fixed (not random) so runs are comparable with the stored baselines.
+
+SEARCH_LATENCY = 0.05
+RETRIEVAL_LATENCY = 0.005
+
+STUB_DOCS = [
+    Document(page_content="NVIDIA's fiscal 2024 revenue was $60.9 billion, up 126% from a year ago."),
+    Document(page_content="Data Center revenue reached a record $47.5 billion, driven by Hopper GPUs."),
+    Document(page_content="Cats are obligate carnivores and love eating tuna."),
+    Document(page_content="The Eiffel Tower was completed on March 31, 1889."),
+]
+
+
+@tool("duckduckgo_search")
+def stub_search(query: str) -> str:
+    """A wrapper around DuckDuckGo Search. Useful for when you need to answer questions about current events.
+    Input should be a search query."""
+    time.sleep(SEARCH_LATENCY)
+    return f"Recent coverage of {query}: strong growth, record profit, analysts say buy."
+
+
+class StubRetrieval:
+    """retrieve()/aretrieve() like RetrievalService, returning fixed documents."""
+
+    def __init__(self, docs: List[Document] = STUB_DOCS, latency: float = RETRIEVAL_LATENCY):
+        self.docs = docs
+        self.latency = latency
+
+    def retrieve(self, query: str) -> List[Document]:
+        time.sleep(self.latency)
+        return self.docs
+
+    async def aretrieve(self, query: str) -> List[Document]:
+        await asyncio.sleep(self.latency)
+        return self.docs
+
+    def as_runnable(self):
+        return RunnableLambda(self.retrieve, afunc=self.aretrieve)
+
+
+def react_policy(messages: List[BaseMessage], tool_names: List[str]) -> AIMessage:
+    """ReAct_Agent: search, then sentiment on what was found, then a final summary."""
+    tool_results = [m for m in messages if isinstance(m, ToolMessage)]
+    if not tool_results:
+        return AIMessage(content="", tool_calls=[
+            tool_call("duckduckgo_search", query="NVIDIA stock performance"),
+            tool_call("duckduckgo_search", query="Apple stock performance"),
+        ])
+    if len(tool_results) == 2:
+        return AIMessage(content="", tool_calls=[
+            tool_call("analyze_sentiment", text=" ".join(str(m.content) for m in tool_results))
+        ])
+    return AIMessage(content="The outlook for NVIDIA and Apple is generally positive. " + "detail " * 40)
+
+
+def answer_policy(messages: List[BaseMessage], tool_names: List[str]) -> AIMessage:
+    """RAG chains: a fixed-length answer about the question."""
+    question = next((m.content for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+    return AIMessage(content=f"Based on the context, {str(question)[:40]} " + "answer " * 60)
@@ -0,0 +1,119 @@
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+from langchain_core.messages import HumanMessage
+
+from fake_chat_model import FakeChatModel
+from graph_runner import TraceRecorder, run_graph
+
+# One entry per pipeline in the repo. Each setup function builds the real chain/graph with the fake
+# chat model and stub tools injected, and returns a Workload whose run(i) serves request number i.
+# Graphs are run through run_graph() with a TraceRecorder, so per-node time comes from the same
+# single execution that is being timed.
+
+
+@dataclass
+class Settings:
+    latency: float = 0.05            # fake model: seconds to first token
+    tokens_per_second: float = 200.0  # fake model: pacing of the rest of the reply
+
+
+@dataclass
+class Workload:
+    run: Callable[[int], Any]  # returns a TraceRecorder for graphs, anything for chains
+
+
+def _graph_workload(app, make_input: Callable[[int], Any], make_config: Callable[[int], Any] = lambda i: None):
+    def run(i: int) -> TraceRecorder:
+        trace = TraceRecorder()
+        run_graph(app, make_input(i), make_config(i), consumers=[trace])
+        return trace
+    return Workload(run)
+
+
+def crunnable_chain(settings: Settings) -> Workload:
+    from runnable import SimpleModel, SimpleParser, SimplePrompt
+
+    chain = SimplePrompt() | SimpleModel() | SimpleParser()
+    return Workload(lambda i: chain.invoke(f"Player {i}"))
+
+
+def rag_chain(settings: Settings) -> Workload:
+    from benchmarks.stubs import StubRetrieval, answer_policy
+    from rag_example import build_rag_chain
+
+    llm = FakeChatModel(policy=answer_policy, latency=settings.latency, tokens_per_second=settings.tokens_per_second)
+    chain = build_rag_chain(StubRetrieval().as_runnable(), llm)
+    return Workload(lambda i: chain.invoke(f"What is the diet of a cat? ({i})"))
+
+
+def rag_agent_graph(settings: Settings) -> Workload:
+    from benchmarks.stubs import StubRetrieval, answer_policy
+    from RAG_Agent_LangGraph import build_app
+    from sqlite_checkpointer import SQLiteCheckpointer
+
+    llm = FakeChatModel(policy=answer_policy, latency=settings.latency, tokens_per_second=settings.tokens_per_second)
+    checkpointer = SQLiteCheckpointer(os.path.join(tempfile.mkdtemp(), "checkpoints.sqlite"))
+    app = build_app(llm=llm, retrieval=StubRetrieval(), checkpointer=checkpointer)
+    return _graph_workload(
+        app,
+        lambda i: {"messages": [HumanMessage(content=f"How was NVIDIA's 2024 performance? ({i})")],
+                   "context": [], "iterations": 0},
+        lambda i: {"configurable": {"thread_id": f"bench-{i}"}},
+    )
+
+
+def react_agent(settings: Settings) -> Workload:
+    from benchmarks.stubs import react_policy, stub_search
+    from ReAct_Agent import analyze_sentiment, build_app
+
+    llm = FakeChatModel(policy=react_policy, latency=settings.latency, tokens_per_second=settings.tokens_per_second)
+    app = build_app(llm=llm, tools=[stub_search, analyze_sentiment])
+    return _graph_workload(
+        app, lambda i: {"messages": [HumanMessage(content=f"NVIDIA and Apple stock outlook ({i})")]}
+    )
+
+
+def custom_agent_executor(settings: Settings) -> Workload:
+    from custom_agent_executor import CustomAgentExecutor
+    from load_test_executor import QUESTIONS, analyst_policy
+
+    llm = FakeChatModel(policy=analyst_policy, latency=settings.latency, tokens_per_second=settings.tokens_per_second)
+    executor = CustomAgentExecutor(llm=llm, verbose=False)
+    return Workload(lambda i: executor.invoke(QUESTIONS[i % len(QUESTIONS)], session_id=f"bench-{i}"))
+
+
+def bank_loop(settings: Settings) -> Workload:
+    from benchmarks.notebook_graphs import build_bank_loop
+
+    return _graph_workload(build_bank_loop(), lambda i: {"balance": 0, "goal": 500, "transactions": 0})
+
+
+def travel_router(settings: Settings) -> Workload:
+    from benchmarks.notebook_graphs import build_travel_router
+
+    destinations = [("Paris", 1200), ("Vietnam", 200), ("Vietnam", 90000)]
+    return _graph_workload(
+        build_travel_router(),
+        lambda i: dict(zip(("destination", "budget"), destinations[i % len(destinations)])),
+    )
+
+
+def sequential_agent(settings: Settings) -> Workload:
+    from benchmarks.notebook_graphs import build_sequential_agent
+
+    return _graph_workload(build_sequential_agent(), lambda i: {"code": "", "errors": [], "iterations": 0})
+
+
+BENCHMARKS: Dict[str, Callable[[Settings], Workload]] = {
+    "crunnable_chain": crunnable_chain,
+    "rag_chain": rag_chain,
+    "rag_agent_graph": rag_agent_graph,
+    "react_agent": react_agent,
+    "custom_agent_executor": custom_agent_executor,
+    "bank_loop": bank_loop,
+    "travel_router": travel_router,
+    "sequential_agent": sequential_agent,
+}
@@ -0,0 +1,221 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, trim_messages
+from langchain_core.messages.utils import count_tokens_approximately
+
+# Bounded conversation memory.
+# Sending the whole history with every request makes prompt size (and latency) grow without limit.
+# Instead:
+#   - a token-budget window keeps only the most recent turns that fit in `max_tokens`
+#   - turns that fall out of the window are folded into a rolling summary by `summarizer`,
+#     on a background thread, so no request ever waits for it (the summary may lag a turn behind)
+#   - the agent scratchpad is capped the same way, dropping the oldest tool round trips first
+# TokenBudgetMemory is used by CustomAgentExecutor; make_pre_model_hook() offers the same
+# strategies to LangGraph agents whose state uses add_messages.
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation. Extend the current summary with the new lines, "
+    "keeping names, numbers and decisions. Reply with the updated summary only, in under 150 words."
+)
+
+# One shared background worker: summaries are cheap, rare and never on the request path
+_summary_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="memory-summary")
+
+
+def summarize(summarizer: BaseChatModel, summary: str, messages: List[BaseMessage]) -> str:
+    transcript = "\n".join(f"{m.type}: {m.content}" for m in messages if m.content)
+    response = summarizer.invoke([
+        SystemMessage(content=SUMMARY_PROMPT),
+        HumanMessage(content=f"Current summary:\n{summary or '(empty)'}\n\nNew lines:\n{transcript}"),
+    ])
+    return response.content
+
+
+def with_summary(window: List[BaseMessage], summary: str) -> List[BaseMessage]:
+    """Inserts the summary right after any leading system prompt."""
+    if not summary:
+        return window
+    split = 0
+    while split < len(window) and isinstance(window[split], SystemMessage):
+        split += 1
+    note = SystemMessage(content=f"Summary of the earlier conversation:\n{summary}")
+    return window[:split] + [note] + window[split:]
+
+
+def trim_to_budget(messages: List[BaseMessage], max_tokens: int) -> List[BaseMessage]:
+    """Most recent messages that fit in `max_tokens`, starting on a human turn, system prompt kept.
+
+    The current turn (the last HumanMessage and everything after it, e.g. its tool calls and results)
+    is always kept, even if it alone is over budget: only older turns are trimmed. Without it the model
+    would get no question to answer.
+    """
+    last_human = next((i for i in range(len(messages) - 1, -1, -1) if isinstance(messages[i], HumanMessage)), None)
+    if last_human is None:
+        return trim_messages(messages, max_tokens=max_tokens, token_counter=count_tokens_approximately,
+                             strategy="last", include_system=True)
+    system = messages[:1] if last_human > 0 and isinstance(messages[0], SystemMessage) else []
+    current = messages[last_human:]
+    budget = max_tokens - count_tokens_approximately(system + current)
+    older = messages[len(system):last_human]
+    if budget <= 0 or not older:
+        return system + current
+    older = trim_messages(
+        older,
+        max_tokens=budget,
+        token_counter=count_tokens_approximately,
+        strategy="last",
+        start_on="human",
+    )
+    return system + older + current
+
+
+def evicted_range(messages: List[BaseMessage], window: List[BaseMessage]) -> Tuple[int, int]:
+    """messages[start:end] is what trim_to_budget dropped.
+
+    The window is a kept leading system prompt plus a suffix of `messages`, so `end` is where its
+    first non-system message sits in `messages`, and a kept system prompt is never part of the range.
+    """
+    head = 1 if window and messages and window[0] is messages[0] and isinstance(window[0], SystemMessage) else 0
+    return head, len(messages) - (len(window) - head)
+
+
+def trim_scratchpad(scratchpad: List[BaseMessage], max_tokens: int) -> List[BaseMessage]:
+    """Drops the oldest tool round trips (an AIMessage plus its ToolMessages) until the scratchpad fits.
+
+    Round trips are never split, and the latest one is always kept.
+    """
+    groups: List[List[BaseMessage]] = []
+    for message in scratchpad:
+        if isinstance(message, AIMessage) or not groups:
+            groups.append([message])
+        else:
+            groups[-1].append(message)
+    sizes = [count_tokens_approximately(group) for group in groups]
+    total = sum(sizes)
+    start = 0
+    while total > max_tokens and start < len(groups) - 1:
+        total -= sizes[start]
+        start += 1
+    return [message for group in groups[start:] for message in group]
+
+
+class TokenBudgetMemory:
+    """History of one session: a token-budget window plus a rolling summary of everything older."""
+
+    def __init__(self, max_tokens: int = 2000, summarizer: Optional[BaseChatModel] = None):
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer
+        self.summary = ""
+        self._messages: List[BaseMessage] = []
+        self._summarizing = False
+        self._lock = threading.Lock()
+
+    def add(self, messages: List[BaseMessage]) -> None:
+        with self._lock:
+            self._messages.extend(messages)
+            evicted = len(self._messages) - len(trim_to_budget(self._messages, self.max_tokens))
+            if evicted <= 0 or self._summarizing:
+                return
+            if self.summarizer is None:
+                # Plain window: evicted turns are simply forgotten
+                del self._messages[:evicted]
+                return
+            self._summarizing = True
+            to_summarize = self._messages[:evicted]
+        _summary_pool.submit(self._fold_into_summary, to_summarize)
+
+    def _fold_into_summary(self, to_summarize: List[BaseMessage]) -> None:
+        try:
+            new_summary = summarize(self.summarizer, self.summary, to_summarize)
+        except Exception:
+            # Keep the messages; the next add() retries
+            with self._lock:
+                self._summarizing = False
+            return
+        with self._lock:
+            self.summary = new_summary
+            # Only now are the summarized messages dropped from memory
+            del self._messages[:len(to_summarize)]
+            self._summarizing = False
+
+    def messages(self) -> List[BaseMessage]:
+        """What to send as chat_history: [summary] + the recent turns that fit the budget."""
+        with self._lock:
+            window = trim_to_budget(self._messages, self.max_tokens)
+            summary = self.summary
+        return with_summary(window, summary)
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+
+def make_pre_model_hook(max_tokens: int = 2000, summarizer: Optional[BaseChatModel] = None,
+                        max_threads: int = 10_000):
+    """Pre-model hook for add_messages agents: `{"llm_input_messages": windowed messages}`.
+
+    Works as the `pre_model_hook` of create_react_agent, or can be called from a hand-written
+    call_model node. The graph state keeps the full history; only what is sent to the model is
+    trimmed. Rolling summaries are kept per thread_id (LRU, at most `max_threads` threads).
+    """
+    # thread_id -> [summary, number of leading messages already folded into it, summarizing?]
+    summaries: "OrderedDict[str, list]" = OrderedDict()
+    lock = threading.Lock()
+
+    def fold(entry: list, previous: str, messages: List[BaseMessage], upto: int) -> None:
+        try:
+            new_summary = summarize(summarizer, previous, messages)
+        except Exception:
+            with lock:
+                entry[2] = False
+            return
+        with lock:
+            entry[0], entry[1], entry[2] = new_summary, upto, False
+
+    def pre_model_hook(state: Dict[str, Any], config: Optional[dict] = None) -> Dict[str, List[BaseMessage]]:
+        messages = state["messages"]
+        window = trim_to_budget(messages, max_tokens)
+        if summarizer is None:
+            return {"llm_input_messages": window}
+
+        thread_id = ((config or {}).get("configurable") or {}).get("thread_id", "default")
+        head, evicted = evicted_range(messages, window)
+        with lock:
+            entry = summaries.setdefault(thread_id, ["", 0, False])
+            summaries.move_to_end(thread_id)
+            while len(summaries) > max_threads:
+                summaries.popitem(last=False)
+            summary, covered, running = entry
+            covered = max(covered, head)
+            if evicted > covered and not running:
+                entry[2] = True
+                _summary_pool.submit(fold, entry, summary, messages[covered:evicted], evicted)
+        return {"llm_input_messages": with_summary(window, summary)}
+
+    return pre_model_hook
+
+
+if __name__ == "__main__":
+    from langchain_core.messages import ToolMessage
+
+    from fake_chat_model import tool_call
+
+    # One turn that is over budget on its own (a large web search result): the question and the
+    # tool output must still reach the model, and nothing of the current turn may be summarized away
+    call = tool_call("web_search", query="latest AQI in Delhi")
+    history = [
+        SystemMessage(content="You are a helpful assistant."),
+        HumanMessage(content="Hi"), AIMessage(content="Hello!"),
+        HumanMessage(content="What is the AQI in Delhi right now?"),
+        AIMessage(content="", tool_calls=[call]),
+        ToolMessage(content="search result " * 2000, tool_call_id=call["id"]),
+    ]
+    window = trim_to_budget(history, max_tokens=500)
+    assert window == [history[0], *history[3:]], window
+    assert evicted_range(history, window) == (1, 3)
+    hook_input = make_pre_model_hook(max_tokens=500)({"messages": history})["llm_input_messages"]
+    assert hook_input == window
+    print(f"over-budget turn kept: {[type(m).__name__ for m in window]}, evicted messages[1:3]")
@@ -0,0 +1,245 @@
+import argparse
+import hashlib
+import re
+import time
+import zlib
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+# Chunking + deduplication stage of the PDF pipeline (pdf_ingestion.ingest_pdfs).
+#
+# Chunker: drop-in for RecursiveCharacterTextSplitter(chunk_size, chunk_overlap) in stream_chunks().
+#   One pass over each page: a window of `chunk_size` is cut at the last separator ("\n\n", "\n", ". ", " ")
+#   in its second half. Like RecursiveCharacterTextSplitter's merge, the overlap is at most `chunk_overlap`
+#   and made of whole pieces at the level of that cut: the next window starts right after the first
+#   same separator within the last `chunk_overlap` characters, or at the cut itself if there is none
+#   (so a cut between paragraphs usually has no overlap at all).
+#   The separator search is str.rfind (C), not a recursive split + merge in Python.
+#   With `tokenizer` (a tokenizers.Tokenizer or a hub name), sizes count tokens instead of characters:
+#   the page is tokenized once and the windows are taken over the token offsets.
+#
+# ChunkDeduplicator: drops chunks before they are embedded and indexed.
+#   exact -> same text after lowercasing and collapsing whitespace
+#   near  -> MinHash of word shingles + LSH banding; a candidate from a shared band counts as a
+#            duplicate when the estimated Jaccard similarity is >= `threshold`
+#            (catches headers, footers and legal text repeated on every page with a different page number)
+#   scope="source" (default) only compares chunks of the same PDF, and forgets a PDF once the stream
+#   moves on to the next one. That keeps memory flat and is safe with the record manager's incremental
+#   cleanup, which re-emits every chunk of a changed PDF together. scope="global" compares across PDFs.
+#
+#   python chunker.py        # speed vs RecursiveCharacterTextSplitter and dedup savings on the bundled PDFs
+
+SEPARATORS = ("\n\n", "\n", ". ", " ")
+MERSENNE_PRIME = (1 << 31) - 1  # hash * coefficient stays below 2**63: no uint64 overflow
+
+
+class Chunker:
+    def __init__(self, chunk_size: int = 600, chunk_overlap: int = 120, tokenizer=None,
+                 separators: Sequence[str] = SEPARATORS):
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+        if isinstance(tokenizer, str):
+            from tokenizers import Tokenizer
+
+            tokenizer = Tokenizer.from_pretrained(tokenizer)
+        if tokenizer is not None:
+            tokenizer.no_truncation()
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.tokenizer = tokenizer
+        self.separators = separators
+
+    def split_text(self, text: str) -> List[str]:
+        spans = self._token_spans(text) if self.tokenizer is not None else self._char_spans(text)
+        return [chunk for chunk in (text[start:end].strip() for start, end in spans) if chunk]
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        return [
+            Document(page_content=chunk, metadata=dict(doc.metadata))
+            for doc in documents
+            for chunk in self.split_text(doc.page_content)
+        ]
+
+    def _break_before(self, text: str, lo: int, hi: int) -> Tuple[int, Optional[str]]:
+        """End of the last, highest-priority separator in text[lo:hi] and that separator, or (hi, None)."""
+        for separator in self.separators:
+            i = text.rfind(separator, lo, hi)
+            if i != -1:
+                return i + len(separator), separator
+        return hi, None
+
+    @staticmethod
+    def _overlap_start(text: str, lo: int, end: int, separator: Optional[str]) -> int:
+        """Start of the longest run of whole `separator` pieces in text[lo:end], or `end` (no overlap).
+
+        After a hard cut (no separator) the overlap is the plain last `end - lo` characters.
+        """
+        if separator is None:
+            return lo
+        if lo >= len(separator) and text.startswith(separator, lo - len(separator)):
+            return lo
+        i = text.find(separator, lo, end)
+        return end if i == -1 else min(i + len(separator), end)
+
+    def _char_spans(self, text: str) -> Iterator[Tuple[int, int]]:
+        n, start = len(text), 0
+        while start < n:
+            end, separator = min(start + self.chunk_size, n), None
+            if end < n:
+                end, separator = self._break_before(text, start + self.chunk_size // 2, end)
+            yield start, end
+            if end >= n:
+                return
+            start = self._overlap_start(text, max(end - self.chunk_overlap, start + 1), end, separator)
+
+    def _token_spans(self, text: str) -> Iterator[Tuple[int, int]]:
+        offsets = self.tokenizer.encode(text, add_special_tokens=False).offsets
+        starts = [start for start, _ in offsets]
+        ends = [end for _, end in offsets]
+        n, start = len(offsets), 0
+        while start < n:
+            end, separator = min(start + self.chunk_size, n), None
+            if end < n:
+                # Snap the cut back to a separator in the second half of the window, in whole tokens
+                middle = start + (end - start) // 2
+                cut, separator = self._break_before(text, offsets[middle][0], offsets[end - 1][1])
+                end = max(bisect_right(ends, cut, start, end), middle + 1)
+            yield offsets[start][0], offsets[end - 1][1]
+            if end >= n:
+                return
+            # Same overlap rule as _char_spans, at most chunk_overlap tokens
+            lo = max(end - self.chunk_overlap, start + 1)
+            overlap = self._overlap_start(text, offsets[lo][0], offsets[end - 1][1], separator)
+            start = bisect_left(starts, overlap, lo, end) if separator is not None else lo
+            # Do not start on a word piece
+            while start < end and offsets[start][0] > 0 and not text[offsets[start][0] - 1].isspace():
+                start += 1
+
+
+class ChunkDeduplicator:
+    def __init__(self, threshold: float = 0.85, num_perm: int = 64, bands: int = 16, shingle_size: int = 3,
+                 scope: str = "source", seed: int = 1):
+        import numpy as np
+
+        if num_perm % bands:
+            raise ValueError(f"bands ({bands}) must divide num_perm ({num_perm})")
+        if scope not in ("source", "global"):
+            raise ValueError(f"Unknown scope '{scope}', expected 'source' or 'global'")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.scope = scope
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._reset(None)
+        self.chunks_in = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self.saved_text_bytes = 0
+
+    def _reset(self, scope_key: Optional[str]) -> None:
+        self._scope_key = scope_key
+        self._exact = set()
+        self._signatures = []
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = {}
+
+    def _signature(self, words: List[str]):
+        import numpy as np
+
+        k = self.shingle_size
+        shingles = {" ".join(words[i:i + k]) for i in range(max(1, len(words) - k + 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        return ((np.outer(self._a, hashes) + self._b[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+    def check(self, text: str, scope_key: str = "") -> Optional[str]:
+        """Returns "exact" or "near" if `text` duplicates an earlier chunk in its scope, else None (and remembers it)."""
+        if self.scope == "source" and scope_key != self._scope_key:
+            self._reset(scope_key)
+        self.chunks_in += 1
+        normalized = " ".join(text.lower().split())
+        digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+        if digest in self._exact:
+            self.exact_duplicates += 1
+            self.saved_text_bytes += len(text.encode("utf-8"))
+            return "exact"
+        self._exact.add(digest)
+
+        signature = self._signature(re.findall(r"\w+", normalized))
+        keys = [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+        candidates = {i for key in keys for i in self._buckets.get(key, ())}
+        if any((signature == self._signatures[i]).mean() >= self.threshold for i in candidates):
+            self.near_duplicates += 1
+            self.saved_text_bytes += len(text.encode("utf-8"))
+            return "near"
+        self._signatures.append(signature)
+        for key in keys:
+            self._buckets.setdefault(key, []).append(len(self._signatures) - 1)
+        return None
+
+    def filter(self, chunks: Iterable[Document]) -> Iterator[Document]:
+        """Streams `chunks` through, minus the duplicates."""
+        for chunk in chunks:
+            if self.check(chunk.page_content, chunk.metadata.get("source", "")) is None:
+                yield chunk
+
+    def report(self, dim: int = 384) -> dict:
+        """What deduplication saved. Index bytes: float32 vectors plus the stored chunk text."""
+        saved = self.exact_duplicates + self.near_duplicates
+        return {
+            "chunks_in": self.chunks_in,
+            "chunks_out": self.chunks_in - saved,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "saved_chunks": saved,
+            "saved_embeddings": saved,
+            "saved_index_bytes": saved * dim * 4 + self.saved_text_bytes,
+            "saved_ratio": saved / self.chunks_in if self.chunks_in else 0.0,
+        }
+
+
+if __name__ == "__main__":
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from pdf_ingestion import stream_chunks, stream_pages
+
+    parser = argparse.ArgumentParser(description="Chunker vs RecursiveCharacterTextSplitter, and dedup savings")
+    parser.add_argument("pdfs", nargs="*", default=["attention.pdf", "NVIDIA_2024_REPORT.pdf", "EJ1172284.pdf"])
+    parser.add_argument("--chunk-size", type=int, default=600)
+    parser.add_argument("--chunk-overlap", type=int, default=120)
+    parser.add_argument("--tokenizer", default=None, help="e.g. sentence-transformers/all-MiniLM-L6-v2 (sizes in tokens)")
+    parser.add_argument("--threshold", type=float, default=0.85)
+    args = parser.parse_args()
+
+    pages = list(stream_pages(args.pdfs))
+    print(f"--- {len(pages)} pages from {len(args.pdfs)} PDFs ---")
+    splitters = [
+        ("RecursiveCharacterTextSplitter",
+         RecursiveCharacterTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)),
+        ("Chunker", Chunker(args.chunk_size, args.chunk_overlap, tokenizer=args.tokenizer)),
+    ]
+    print(f"{'splitter':<32}{'chunks':>8}{'seconds':>9}{'avg chars':>11}{'chars to embed':>16}")
+    counts = {}
+    for name, splitter in splitters:
+        start = time.perf_counter()
+        chunks = list(stream_chunks(pages, splitter))
+        seconds = time.perf_counter() - start
+        total = sum(len(c.page_content) for c in chunks)
+        counts[name] = len(chunks)
+        print(f"{name:<32}{len(chunks):>8}{seconds:>9.3f}{total / max(1, len(chunks)):>11.0f}{total:>16}")
+    baseline = counts["RecursiveCharacterTextSplitter"]
+
+    for scope in ("source", "global"):
+        deduplicator = ChunkDeduplicator(threshold=args.threshold, scope=scope)
+        start = time.perf_counter()
+        kept = sum(1 for _ in deduplicator.filter(chunks))
+        report = deduplicator.report()
+        print(f"\ndedup scope={scope}: {kept} chunks kept in {time.perf_counter() - start:.3f}s")
+        print(f"  exact {report['exact_duplicates']}, near {report['near_duplicates']} "
+              f"-> {report['saved_embeddings']} embeddings and {report['saved_index_bytes'] / 1024:.0f} KiB "
+              f"of index saved ({report['saved_ratio']:.1%})")
+        # What the pipeline change nets out to: chunks embedded now vs. with RecursiveCharacterTextSplitter
+        print(f"  net: {report['chunks_out']} chunks to embed vs {baseline} with RecursiveCharacterTextSplitter "
+              f"({(report['chunks_out'] - baseline) / max(1, baseline):+.1%})")
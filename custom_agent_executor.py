@@ -1,9 +1,20 @@
-from typing import List, Dict, Any
-from langchain_groq import ChatGroq
+import asyncio
+import contextvars
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import partial
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from typing import List, Dict, Any, Optional
+from models import AppConfig, get_chat_model
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage
 from langchain_core.tools import tool
 from langchain_core.runnables.base import RunnableSerializable
+from langchain_core.language_models.chat_models import BaseChatModel
+from chat_memory import TokenBudgetMemory, trim_scratchpad
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -32,6 +43,8 @@ tools = [get_stock_price, get_company_news_sentiment, final_answer]
 
 #create tool name to function mapping
 name2tool = {tool.name: tool.func for tool in tools}
+# and to the full tool object (needed for async tools, whose code lives in tool.coroutine)
+name2tool_obj = {tool.name: tool for tool in tools}
 
 # 3. DEFINE THE AGENT PROMPT
 
@@ -43,6 +56,8 @@ prompt = ChatPromptTemplate.from_messages([
     ("system", (
         "You are a Senior Financial Analyst. To answer user queries, you MUST use the provided tools. "
         "Combine price data and sentiment analysis to provide a recommendation. "
+        "Request every tool call you need for a step at once (e.g. price and sentiment for all tickers in one turn); "
+        "they run in parallel. "
         "All intermediate steps go in the 'scratchpad'. Once you have the full analysis, "
         "use the 'final_answer' tool."
     )),
@@ -52,12 +67,41 @@ prompt = ChatPromptTemplate.from_messages([
 ])
 
 # 4. CUSTOM AGENT EXECUTOR LOGIC
+DEFAULT_SESSION="default"
+
+class _LoopSessions:
+    """ainvoke's concurrency limits on one event loop (asyncio primitives only work on the loop that uses them first)."""
+    def __init__(self,max_concurrent_sessions:int):
+        self.slots=asyncio.Semaphore(max_concurrent_sessions)
+        # session id -> [lock, number of requests holding or waiting for it]; dropped when that reaches 0
+        self.locks:Dict[str,list]={}
+
 class CustomAgentExecutor:
-    def __init__(self, model_name: str = "llama-3.3-70b-versatile", max_iterations: int = 3):
+    def __init__(self, model_name: str = "llama-3.3-70b-versatile", max_iterations: int = 3,
+                 max_parallel_tools: int = 8, tool_timeout: float = 30.0,
+                 llm: Optional[BaseChatModel] = None, max_concurrent_sessions: int = 100, verbose: bool = True,
+                 history_max_tokens: int = 2000, scratchpad_max_tokens: int = 4000, summarize_history: bool = True,
+                 max_sessions: int = 10_000):
+        llm=llm if llm is not None else get_chat_model(model_name)
         # instance variable:hint what type it would be = initial value.
-        self.chat_history:List[BaseMessage]=[]
+        # One history per session id, so a single executor can serve many users at once.
+        # Each history only sends the newest turns that fit history_max_tokens; older turns are
+        # folded (in the background) into a rolling summary written by the same model.
+        # At most max_sessions histories are kept: the least recently used idle session is forgotten first.
+        self._new_history=lambda:TokenBudgetMemory(max_tokens=history_max_tokens,summarizer=llm if summarize_history else None)
+        self.histories:"OrderedDict[str,TokenBudgetMemory]"=OrderedDict()
+        self.max_sessions=max_sessions
+        self._active:Dict[str,int]={}  # session id -> requests running now (never evicted)
+        self._sessions_lock=threading.Lock()
+        self.scratchpad_max_tokens=scratchpad_max_tokens
         self.max_iterations=max_iterations
-        llm=ChatGroq(model=model_name,temperature=0)
+        # All tool calls of one turn run concurrently on this bounded pool (sync tools) or the event loop (async tools)
+        self.tool_pool=ThreadPoolExecutor(max_workers=max_parallel_tools,thread_name_prefix="agent-tool")
+        self.tool_timeout=tool_timeout
+        # ainvoke: at most this many sessions talk to the model at the same time (per event loop)
+        self.max_concurrent_sessions=max_concurrent_sessions
+        self._loops:"weakref.WeakKeyDictionary[asyncio.AbstractEventLoop,_LoopSessions]"=weakref.WeakKeyDictionary()
+        self.verbose=verbose
         self.agent: RunnableSerializable =(
             {
             # x is whatever you pass to .invoke().
@@ -71,51 +115,233 @@ class CustomAgentExecutor:
             | llm.bind_tools(tools,tool_choice="any")
         )
 
-    def invoke(self,user_input:str):
-        print(f"\n--- Starting Analysis for: {user_input} ---")
-        iteration_count=0
-        agent_scratchpad=[]
-        final_llm_response= None
+    @property
+    def chat_history(self)->List[BaseMessage]:
+        """History of the default session (what invoke() uses when no session_id is given), as sent to the model."""
+        return self._history(DEFAULT_SESSION).messages()
+
+    def _history(self,session_id:str)->TokenBudgetMemory:
+        with self._sessions_lock:
+            history=self.histories.get(session_id)
+            if history is None:
+                history=self.histories[session_id]=self._new_history()
+            self.histories.move_to_end(session_id)
+            self._evict_idle_histories()
+            return history
 
-        while iteration_count<=self.max_iterations:
-            llm_response=self.agent.invoke({
-                "input": user_input,
-                "chat_history": self.chat_history,
-                "agent_scratchpad": agent_scratchpad
-            })
+    def _evict_idle_histories(self):
+        # Called with _sessions_lock held
+        excess=len(self.histories)-self.max_sessions
+        if excess<=0:
+            return
+        idle=[]
+        for sid in self.histories:  # oldest first
+            if len(idle)>=excess:
+                break
+            if sid not in self._active:
+                idle.append(sid)
+        for sid in idle:
+            del self.histories[sid]
 
-            #  store the agent response in the sratchpad
-            agent_scratchpad.append(llm_response)
+    @contextmanager
+    def _running(self,session_id:str):
+        """Marks the session as in use, so its history is not evicted mid-request."""
+        with self._sessions_lock:
+            self._active[session_id]=self._active.get(session_id,0)+1
+        try:
+            yield self._history(session_id)
+        finally:
+            with self._sessions_lock:
+                self._active[session_id]-=1
+                if not self._active[session_id]:
+                    del self._active[session_id]
+                    self._evict_idle_histories()
 
-            # retrieve the tools from the response
-            tool_call=llm_response.tool_calls[0]
-            tool_name=tool_call["name"]
-            tool_args = tool_call["args"]
-            tool_id = tool_call["id"]
+    @asynccontextmanager
+    async def _session_turn(self,session_id:str):
+        """One ainvoke request: the session's lock (same session -> one at a time), a concurrency slot, its history."""
+        loop=asyncio.get_running_loop()
+        sessions=self._loops.get(loop)
+        if sessions is None:
+            sessions=self._loops[loop]=_LoopSessions(self.max_concurrent_sessions)
+        entry=sessions.locks.get(session_id)
+        if entry is None:
+            entry=sessions.locks[session_id]=[asyncio.Lock(),0]
+        entry[1]+=1
+        try:
+            async with entry[0],sessions.slots:
+                with self._running(session_id) as history:
+                    yield history
+        finally:
+            entry[1]-=1
+            if not entry[1]:
+                del sessions.locks[session_id]
 
-            print(f"Iteration {iteration_count}: Calling tool '{tool_name}' with {tool_args} and {tool_id}")
+    def _log(self,message:str):
+        if self.verbose:
+            print(message)
 
-            tool_response=name2tool[tool_name](**tool_args)
-            agent_scratchpad.append(ToolMessage(content=str(tool_response),tool_call_id=tool_id))
+    def invoke(self,user_input:str,session_id:str=DEFAULT_SESSION):
+        self._log(f"\n--- Starting Analysis for: {user_input} ---")
+        with self._running(session_id) as history:
+            iteration_count=0
+            agent_scratchpad=[]
+            final_llm_response= None
 
-            iteration_count+=1
+            while iteration_count<=self.max_iterations:
+                iteration_start=time.perf_counter()
+                llm_response=self.agent.invoke({
+                    "input": user_input,
+                    "chat_history": history.messages(),
+                    # capped: the oldest tool round trips are dropped once it outgrows scratchpad_max_tokens
+                    "agent_scratchpad": trim_scratchpad(agent_scratchpad,self.scratchpad_max_tokens)
+                })
+                #  store the agent response in the sratchpad
+                agent_scratchpad.append(llm_response)
 
-            if tool_name=="final_answer":
-                final_llm_response=tool_response
-                break
+                # retrieve ALL the tool calls of this turn (the model may ask for several at once)
+                tool_calls=llm_response.tool_calls
+                self._log_tool_calls(iteration_count,tool_calls)
+                tool_responses=self._run_tool_calls_sync(tool_calls)
+                self._append_tool_messages(agent_scratchpad,tool_calls,tool_responses)
+                self._log(f"Iteration {iteration_count}: {len(tool_calls)} tool call(s), wall time {time.perf_counter()-iteration_start:.2f}s")
+                iteration_count+=1
+
+                final_llm_response=self._final_answer(tool_calls,tool_responses)
+                if final_llm_response is not None:
+                    break
+
+            self._remember(history,user_input,final_llm_response)
+            return final_llm_response
+
+    async def ainvoke(self,user_input:str,session_id:str=DEFAULT_SESSION):
+        """Async version of invoke: many sessions can run at once on one executor.
+
+        Requests for the same session are serialized (so its history stays consistent);
+        at most max_concurrent_sessions sessions run at the same time.
+        """
+        async with self._session_turn(session_id) as history:
+            self._log(f"\n--- [{session_id}] Starting Analysis for: {user_input} ---")
+            iteration_count=0
+            agent_scratchpad=[]
+            final_llm_response=None
+
+            while iteration_count<=self.max_iterations:
+                iteration_start=time.perf_counter()
+                llm_response=await self.agent.ainvoke({
+                    "input": user_input,
+                    "chat_history": history.messages(),
+                    # capped: the oldest tool round trips are dropped once it outgrows scratchpad_max_tokens
+                    "agent_scratchpad": trim_scratchpad(agent_scratchpad,self.scratchpad_max_tokens)
+                })
+                agent_scratchpad.append(llm_response)
+
+                tool_calls=llm_response.tool_calls
+                self._log_tool_calls(iteration_count,tool_calls)
+                tool_responses=await self._run_tool_calls(tool_calls)
+                self._append_tool_messages(agent_scratchpad,tool_calls,tool_responses)
+                self._log(f"[{session_id}] Iteration {iteration_count}: {len(tool_calls)} tool call(s), wall time {time.perf_counter()-iteration_start:.2f}s")
+                iteration_count+=1
+
+                final_llm_response=self._final_answer(tool_calls,tool_responses)
+                if final_llm_response is not None:
+                    break
 
+            self._remember(history,user_input,final_llm_response)
+            return final_llm_response
+
+    def _log_tool_calls(self,iteration_count:int,tool_calls:List[dict]):
+        for tool_call in tool_calls:
+            self._log(f"Iteration {iteration_count}: Calling tool '{tool_call['name']}' with {tool_call['args']} and {tool_call['id']}")
+
+    @staticmethod
+    def _append_tool_messages(agent_scratchpad:list,tool_calls:List[dict],tool_responses:List[Any]):
+        # ToolMessages go back in the same order as the tool calls
+        for tool_call,tool_response in zip(tool_calls,tool_responses):
+            agent_scratchpad.append(ToolMessage(content=str(tool_response),tool_call_id=tool_call["id"]))
+
+    @staticmethod
+    def _final_answer(tool_calls:List[dict],tool_responses:List[Any]):
+        final_call=next((i for i,call in enumerate(tool_calls) if call["name"]=="final_answer"),None)
+        return tool_responses[final_call] if final_call is not None else None
+
+    @staticmethod
+    def _remember(history:TokenBudgetMemory,user_input:str,final_llm_response):
         if final_llm_response:
-            self.chat_history.extend([HumanMessage(content=user_input),AIMessage(content=str(final_llm_response))])
+            history.add([HumanMessage(content=user_input),AIMessage(content=str(final_llm_response))])
+
+    def _run_tool_calls_sync(self,tool_calls:List[dict])->List[Any]:
+        """invoke's version of _run_tool_calls: every call of the turn on the bounded pool, results in call order.
+
+        No event loop is involved, so invoke also works from a thread that is already running one
+        (Jupyter, a sync endpoint inside an async server, a LangGraph async node).
+        """
+        # Each call runs in a copy of the caller's context, so contextvars (tracing, callbacks) carry over
+        futures=[self.tool_pool.submit(contextvars.copy_context().run,self._call_tool,call) for call in tool_calls]
+        deadline=time.monotonic()+self.tool_timeout
+        results=[]
+        for tool_call,future in zip(tool_calls,futures):
+            try:
+                results.append(future.result(timeout=max(0.0,deadline-time.monotonic())))
+            except FutureTimeoutError:
+                # Same as the async path: stop waiting, a late result is dropped
+                future.cancel()
+                results.append(f"Error: tool '{tool_call['name']}' timed out after {self.tool_timeout}s")
+            except Exception as e:
+                results.append(f"Error: tool '{tool_call['name']}' failed: {e}")
+        return results
 
-        return final_llm_response           
+    @staticmethod
+    def _call_tool(tool_call:dict)->Any:
+        tool_obj=name2tool_obj.get(tool_call["name"])
+        if tool_obj is None:
+            return f"Error: unknown tool '{tool_call['name']}'"
+        if tool_obj.func is None:
+            # async-only tool on a pool thread, which has no event loop of its own
+            return asyncio.run(tool_obj.coroutine(**tool_call["args"]))
+        return tool_obj.func(**tool_call["args"])
+
+    async def _run_tool_calls(self,tool_calls:List[dict])->List[Any]:
+        """Runs every tool call of one turn concurrently and returns the results in call order."""
+        return await asyncio.gather(*(self._run_tool_call(call) for call in tool_calls))
+
+    async def _run_tool_call(self,tool_call:dict)->Any:
+        tool_obj=name2tool_obj.get(tool_call["name"])
+        if tool_obj is None:
+            return f"Error: unknown tool '{tool_call['name']}'"
+        try:
+            if tool_obj.coroutine is not None:
+                # async tool: wait_for really cancels it on timeout
+                work=tool_obj.coroutine(**tool_call["args"])
+            else:
+                # sync tool: runs on the bounded pool; on timeout we stop waiting
+                # (a Python thread can't be killed, its late result is simply dropped)
+                work=asyncio.get_running_loop().run_in_executor(self.tool_pool,partial(tool_obj.func,**tool_call["args"]))
+            return await asyncio.wait_for(work,timeout=self.tool_timeout)
+        except asyncio.TimeoutError:
+            return f"Error: tool '{tool_call['name']}' timed out after {self.tool_timeout}s"
+        except Exception as e:
+            # Report the failure to the model instead of crashing the whole turn
+            return f"Error: tool '{tool_call['name']}' failed: {e}"
+
+
+def build_app(config: Optional[AppConfig] = None, llm: Optional[BaseChatModel] = None) -> CustomAgentExecutor:
+    """The executor built from `config`, with the shared chat model for its settings."""
+    config = config or AppConfig()
+    llm = llm if llm is not None else get_chat_model(config.model, config.temperature)
+    return CustomAgentExecutor(model_name=config.model, llm=llm)
 
 
 if __name__ == "__main__":
-    executor = CustomAgentExecutor()
+    executor = build_app(AppConfig.from_env())
     
-    # Example: Requires calling get_stock_price, then get_company_news_sentiment, then final_answer
+    # Example: Requires calling get_stock_price and get_company_news_sentiment (in parallel), then final_answer
     result = executor.invoke("Is it a good time to buy Google?")
     
     print("\n--- FINAL STRUCTURED RESULT ---")
     print(f"\n Answer: {result['answer']}")
-    print(f"\n Tools Used: {result['tools_used']}")                     
\ No newline at end of file
+    print(f"\n Tools Used: {result['tools_used']}")
+
+    # Six independent tool calls (price + sentiment for 3 tickers) are answered in ONE model round trip
+    result = executor.invoke("Compare the stock price and sentiment for AAPL, GOOGL and TSLA.")
+    print(f"\n Answer: {result['answer']}")
@@ -0,0 +1,191 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# A content-addressed, on-disk cache for embeddings.
+# Key   -> (model name, sha256 of the text), kept in a small SQLite index.
+# Value -> one row of a float32 matrix file per model, read back through np.memmap,
+#          so a restart only maps the file instead of re-running the transformer.
+# Several processes can share one cache_dir: rows are handed out inside a SQLite write transaction
+# (models.next_row), and anything in a matrix file past the committed rows is a torn or unfinished
+# write that is cut off when a cache is opened.
+
+DEFAULT_CACHE_DIR = "./embedding_cache"
+SQLITE_MAX_VARS = 900  # stay under SQLite's limit on "?" placeholders per statement
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Stores vectors in <cache_dir>/<model>.f32 and their row numbers in <cache_dir>/index.sqlite."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, row INTEGER NOT NULL, "
+            "PRIMARY KEY (model, text_hash))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS models (model TEXT PRIMARY KEY, dim INTEGER NOT NULL, "
+            "next_row INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.commit()
+        self._dims: Dict[str, int] = {}
+        self._maps: Dict[str, np.memmap] = {}
+        self._recover()
+
+    def _recover(self) -> None:
+        """Adds next_row to caches written before it existed and truncates every matrix to its committed rows."""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(models)")]
+            if "next_row" not in columns:
+                self._db.execute("ALTER TABLE models ADD COLUMN next_row INTEGER NOT NULL DEFAULT 0")
+                self._db.execute(
+                    "UPDATE models SET next_row = "
+                    "(SELECT COALESCE(MAX(row) + 1, 0) FROM vectors WHERE vectors.model = models.model)"
+                )
+            for model, dim, next_row in self._db.execute("SELECT model, dim, next_row FROM models").fetchall():
+                self._dims[model] = dim
+                path = self._matrix_path(model)
+                # Holding the write lock: no other process is between allocating rows and committing them
+                if os.path.exists(path) and os.path.getsize(path) > next_row * 4 * dim:
+                    os.truncate(path, next_row * 4 * dim)
+            self._db.commit()
+        except BaseException:
+            self._db.rollback()
+            raise
+
+    def _matrix_path(self, model: str) -> str:
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", model)
+        return os.path.join(self.cache_dir, f"{safe_name}.f32")
+
+    def _matrix(self, model: str, min_rows: int) -> np.memmap:
+        # Re-map only when the file has grown past what the current mapping covers
+        if model not in self._dims:  # added by another process
+            self._dims[model] = self._db.execute("SELECT dim FROM models WHERE model = ?", (model,)).fetchone()[0]
+        matrix = self._maps.get(model)
+        if matrix is None or matrix.shape[0] < min_rows:
+            # Only whole rows: another process may be halfway through writing the next ones
+            path, dim = self._matrix_path(model), self._dims[model]
+            matrix = np.memmap(path, dtype=np.float32, mode="r", shape=(os.path.getsize(path) // (4 * dim), dim))
+            self._maps[model] = matrix
+        return matrix
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """Returns {hash: vector} for every hash that is already cached."""
+        rows: Dict[str, int] = {}
+        with self._lock:
+            for start in range(0, len(hashes), SQLITE_MAX_VARS):
+                batch = hashes[start:start + SQLITE_MAX_VARS]
+                placeholders = ",".join("?" * len(batch))
+                rows.update(self._db.execute(
+                    f"SELECT text_hash, row FROM vectors WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ))
+            if not rows:
+                return {}
+            matrix = self._matrix(model, max(rows.values()) + 1)
+        return {h: matrix[row].tolist() for h, row in rows.items()}
+
+    def put_many(self, model: str, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        vectors = np.asarray(list(items.values()), dtype=np.float32)
+        with self._lock:
+            # BEGIN IMMEDIATE takes SQLite's write lock, so processes sharing the cache take turns
+            # from reading next_row to committing the rows they wrote.
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT dim, next_row FROM models WHERE model = ?", (model,)).fetchone()
+                if row is None:
+                    row = (vectors.shape[1], 0)
+                    self._db.execute("INSERT INTO models VALUES (?, ?, 0)", (model, vectors.shape[1]))
+                dim, first_row = row
+                if dim != vectors.shape[1]:
+                    raise ValueError(f"Cache for '{model}' holds {dim}-d vectors, got {vectors.shape[1]}-d")
+                self._dims[model] = dim
+                # Vectors are written at their rows (and flushed) before the rows are committed,
+                # so a crash can leave unused bytes past next_row but never a key pointing at garbage.
+                path = self._matrix_path(model)
+                with open(path, "r+b" if os.path.exists(path) else "w+b") as f:
+                    f.seek(first_row * 4 * dim)
+                    f.write(vectors.tobytes())
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO vectors VALUES (?, ?, ?)",
+                    [(model, h, first_row + i) for i, h in enumerate(items)],
+                )
+                self._db.execute("UPDATE models SET next_row = ? WHERE model = ?", (first_row + len(vectors), model))
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+
+
+class CachedEmbeddings(Embeddings):
+    """Drop-in Embeddings wrapper that only sends unseen texts to the real model.
+
+    The real model is built lazily by `load_embeddings`, so a fully cached run never loads it.
+    """
+
+    def __init__(self, model_name: str, load_embeddings: Callable[[], Embeddings],
+                 cache: Optional[EmbeddingCache] = None):
+        self.model_name = model_name
+        self.load_embeddings = load_embeddings
+        self.cache = cache or EmbeddingCache()
+        self._embeddings: Optional[Embeddings] = None
+        self._load_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def embeddings(self) -> Embeddings:
+        if self._embeddings is None:
+            # Concurrent first requests load the model once
+            with self._load_lock:
+                if self._embeddings is None:
+                    self._embeddings = self.load_embeddings()
+        return self._embeddings
+
+    def _embed(self, namespace: str, texts: List[str], embed_fn) -> List[List[float]]:
+        hashes = [text_hash(t) for t in texts]
+        found = self.cache.get_many(namespace, hashes)
+        # The same text can appear more than once in a batch; embed (and count) it only once
+        missing = {h: t for h, t in zip(hashes, texts) if h not in found}
+        self.hits += len(found)
+        self.misses += len(missing)
+        if missing:
+            new_vectors = embed_fn(list(missing.values()))
+            computed = dict(zip(missing.keys(), new_vectors))
+            self.cache.put_many(namespace, computed)
+            found.update(computed)
+        return [found[h] for h in hashes]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(self.model_name, texts, self.embeddings.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        # Queries get their own namespace: some models embed queries and documents differently
+        return self._embed(f"{self.model_name}:query", [text],
+                           lambda batch: [self.embeddings.embed_query(batch[0])])[0]
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Mapping
+from typing import Iterator, Optional, Union
+
+import faiss
+from langchain_community.docstore.base import Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+# On-disk FAISS persistence built for cold starts.
+#
+#   <path>/index.faiss      -> faiss.write_index output, opened with IO_FLAG_MMAP so vectors stay in the
+#                              OS page cache (shared by every worker on the host) instead of the Python heap
+#   <path>/docstore.sqlite  -> (position, doc id, text, metadata); documents are read one row at a time,
+#                              only for the hits a query actually returns
+#   <path>/meta.json        -> source fingerprint, so callers can tell when a rebuild is needed
+#
+# A store loaded with mmap=True is read-only; load with mmap=False to add documents.
+#
+# Saves never touch files a worker may have mapped: each save writes a new generation directory
+# (.<name>.gen-<random>) next to <path>, and <path> is a symlink that is swapped to it with os.replace
+# once all three files are on disk. A crash mid-save leaves the previous store in place, and
+# the generation before the previous one is deleted, so loaders always see one complete store.
+
+MMAP_FLAGS = (
+    faiss.IO_FLAG_MMAP
+    | faiss.IO_FLAG_READ_ONLY
+    # Newer FAISS releases can also mmap flat (IndexFlat*) code arrays
+    | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+)
+
+
+class SQLiteDocstore(Docstore):
+    """Read-only docstore that looks documents up in docstore.sqlite on demand."""
+
+    def __init__(self, db_path: str):
+        self._db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+
+    def search(self, search: str) -> Union[str, Document]:
+        row = self._db.execute("SELECT page_content, metadata FROM docs WHERE doc_id = ?", (search,)).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=row[0], metadata=json.loads(row[1]))
+
+
+class SQLiteIdMap(Mapping):
+    """index position -> docstore id, read lazily from the same SQLite file."""
+
+    def __init__(self, docstore: SQLiteDocstore):
+        self._db = docstore._db
+
+    def __getitem__(self, position: int) -> str:
+        row = self._db.execute("SELECT doc_id FROM docs WHERE position = ?", (int(position),)).fetchone()
+        if row is None:
+            raise KeyError(position)
+        return row[0]
+
+    def __iter__(self) -> Iterator[int]:
+        return (row[0] for row in self._db.execute("SELECT position FROM docs ORDER BY position"))
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+
+def _fsync(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def save_faiss_store(store: FAISS, path: str, fingerprint: Optional[str] = None) -> None:
+    parent, name = os.path.split(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    pending = tempfile.mkdtemp(dir=parent, prefix=f".{name}.tmp-")
+    try:
+        _write_generation(store, pending, fingerprint)
+    except BaseException:
+        shutil.rmtree(pending, ignore_errors=True)
+        raise
+    generation = pending.replace(f".{name}.tmp-", f".{name}.gen-")
+    os.replace(pending, generation)
+
+    path = os.path.join(parent, name)
+    previous = os.path.realpath(path) if os.path.islink(path) else None
+    if os.path.isdir(path) and previous is None:
+        # A store saved as a plain directory: move it aside once so the symlink can take its place
+        previous = f"{generation}-previous"
+        os.replace(path, previous)
+    link = f"{generation}.link"
+    os.symlink(os.path.basename(generation), link)
+    os.replace(link, path)
+    _fsync(parent)
+
+    # Keep the generation just replaced (workers may still be opening it) and saves still being
+    # written by other processes (.tmp-), drop every older generation
+    keep = {os.path.realpath(generation), previous}
+    for entry in os.listdir(parent):
+        old = os.path.join(parent, entry)
+        if entry.startswith(f".{name}.gen-") and not os.path.islink(old) and os.path.realpath(old) not in keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def _write_generation(store: FAISS, path: str, fingerprint: Optional[str]) -> None:
+    faiss.write_index(store.index, os.path.join(path, "index.faiss"))
+
+    db_path = os.path.join(path, "docstore.sqlite")
+    with sqlite3.connect(db_path) as db:
+        db.execute("CREATE TABLE docs (position INTEGER PRIMARY KEY, doc_id TEXT UNIQUE, page_content TEXT, metadata TEXT)")
+        db.executemany(
+            "INSERT INTO docs VALUES (?, ?, ?, ?)",
+            (
+                (position, doc_id, doc.page_content, json.dumps(doc.metadata))
+                for position, doc_id in store.index_to_docstore_id.items()
+                for doc in [store.docstore.search(doc_id)]
+            )
+        )
+    db.close()
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump({"fingerprint": fingerprint, "ntotal": store.index.ntotal}, f)
+    for filename in ("index.faiss", "docstore.sqlite", "meta.json"):
+        _fsync(os.path.join(path, filename))
+
+
+def load_faiss_store(path: str, embeddings: Embeddings, mmap: bool = True) -> FAISS:
+    # Resolve the symlink once, so the index and the docstore come from the same generation
+    path = os.path.realpath(path)
+    index_path = os.path.join(path, "index.faiss")
+    index = faiss.read_index(index_path, MMAP_FLAGS) if mmap else faiss.read_index(index_path)
+    docstore = SQLiteDocstore(os.path.join(path, "docstore.sqlite"))
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=SQLiteIdMap(docstore)
+    )
+
+
+def stored_fingerprint(path: str) -> Optional[str]:
+    try:
+        with open(os.path.join(path, "meta.json")) as f:
+            return json.load(f).get("fingerprint")
+    except FileNotFoundError:
+        return None
+
+
+# --- BENCHMARK: cold start of a mmap'd load vs rebuilding from texts ---
+
+def _measure(mode: str, path: str, pdfs: list) -> dict:
+    # Runs in a fresh interpreter so each mode starts from the same cold process
+    from langchain_huggingface import HuggingFaceEmbeddings
+    from embedding_cache import CachedEmbeddings
+    from perf_stats import current_rss_mb
+
+    embeddings = CachedEmbeddings("all-MiniLM-L6-v2", lambda: HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2"))
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    if mode in ("rebuild", "save"):
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        from pdf_ingestion import stream_chunks, stream_pages
+
+        splitter = RecursiveCharacterTextSplitter(chunk_size=600, chunk_overlap=120)
+        chunks = list(stream_chunks(stream_pages(pdfs), splitter))
+        store = FAISS.from_documents(chunks, embeddings)
+        if mode == "save":
+            save_faiss_store(store, path)
+    else:
+        store = load_faiss_store(path, embeddings, mmap=(mode == "mmap"))
+    loaded = time.perf_counter()
+    store.similarity_search("What is multi-head attention?", k=4)
+    first_query = time.perf_counter()
+    return {
+        "mode": mode,
+        "load_s": loaded - start,
+        "first_query_s": first_query - loaded,
+        "rss_delta_mb": current_rss_mb() - rss_before,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start load time and memory: mmap load vs heap load vs rebuild")
+    parser.add_argument("pdfs", nargs="*", default=["attention.pdf", "NVIDIA_2024_REPORT.pdf", "EJ1172284.pdf"])
+    parser.add_argument("--path", default="./faiss_index_bench")
+    parser.add_argument("--measure", choices=["save", "rebuild", "heap", "mmap"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(_measure(args.measure, args.path, args.pdfs)))
+        sys.exit(0)
+
+    # Build and save once; this also warms the embedding cache, so "rebuild" below
+    # measures chunking + FAISS construction rather than the transformer
+    if not os.path.exists(os.path.join(args.path, "index.faiss")):
+        subprocess.check_call([sys.executable, __file__, *args.pdfs, "--path", args.path, "--measure", "save"])
+
+    print(f"{'mode':<10}{'load s':>10}{'1st query s':>14}{'RSS +MB':>10}")
+    for mode in ("rebuild", "heap", "mmap"):
+        row = json.loads(subprocess.check_output(
+            [sys.executable, __file__, *args.pdfs, "--path", args.path, "--measure", mode]))
+        print(f"{row['mode']:<10}{row['load_s']:>10.3f}{row['first_query_s']:>14.3f}{row['rss_delta_mb']:>10.1f}")
@@ -0,0 +1,65 @@
+import asyncio
+import itertools
+import time
+from typing import Any, Callable, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+# A deterministic stand-in for ChatGroq, for load tests and offline benchmarks.
+# - `policy(messages, tool_names) -> AIMessage` decides what the "model" says (text and/or tool calls)
+# - `latency` is the time to first token, `tokens_per_second` paces the rest of the reply,
+#   so timings look like a real provider without any network calls.
+
+Policy = Callable[[List[BaseMessage], List[str]], AIMessage]
+
+_call_ids = itertools.count()
+
+
+def tool_call(name: str, **args: Any) -> dict:
+    """Builds one entry of AIMessage.tool_calls."""
+    return {"name": name, "args": args, "id": f"call_{next(_call_ids)}", "type": "tool_call"}
+
+
+def echo_policy(messages: List[BaseMessage], tool_names: List[str]) -> AIMessage:
+    """Default: never calls tools, answers with a fixed-length reply about the last message."""
+    return AIMessage(content=f"Answer to: {str(messages[-1].content)[:50]} " + "lorem " * 20)
+
+
+class FakeChatModel(BaseChatModel):
+    policy: Policy = echo_policy
+    latency: float = 0.0
+    tokens_per_second: Optional[float] = None
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Optional[str] = None, **kwargs: Any):
+        # Same shape ChatGroq uses, so the policy can see which tools are available
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], tool_choice=tool_choice, **kwargs)
+
+    def _respond(self, messages: List[BaseMessage], tools: Optional[list]) -> AIMessage:
+        self.calls += 1
+        tool_names = [t["function"]["name"] for t in tools or []]
+        return self.policy(messages, tool_names)
+
+    def _delay(self, message: AIMessage) -> float:
+        if not self.tokens_per_second:
+            return self.latency
+        return self.latency + len(str(message.content).split()) / self.tokens_per_second
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, tools: Optional[list] = None, **kwargs: Any) -> ChatResult:
+        message = self._respond(messages, tools)
+        time.sleep(self._delay(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, tools: Optional[list] = None, **kwargs: Any) -> ChatResult:
+        message = self._respond(messages, tools)
+        await asyncio.sleep(self._delay(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
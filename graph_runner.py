@@ -0,0 +1,130 @@
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.messages import BaseMessage
+
+# Run a compiled LangGraph app ONCE and fan its stream out to any number of consumers.
+#
+# Calling app.invoke() for the result and then app.stream() for a trace executes the graph twice,
+# paying for every LLM call and tool call twice. run_graph() streams "updates" (which node produced
+# what) and "values" (the full state after each step) from a single execution and hands every
+# event to each consumer in turn; the final state is returned just like invoke() would.
+
+
+@dataclass
+class StepEvent:
+    index: int
+    mode: str  # "updates" or "values"
+    data: Any
+    elapsed_s: float
+
+
+class StreamConsumer:
+    """Base consumer: override on_event and/or on_end."""
+
+    def on_event(self, event: StepEvent) -> None:
+        pass
+
+    def on_end(self, final_state: Optional[Dict[str, Any]]) -> None:
+        pass
+
+
+class ConsolePrinter(StreamConsumer):
+    """Pretty-prints each message as soon as a step adds it to state["messages"]."""
+
+    def __init__(self, key: str = "messages"):
+        self.key = key
+        self._seen: Optional[int] = None
+
+    def on_event(self, event: StepEvent) -> None:
+        if event.mode != "values" or self.key not in event.data:
+            return
+        messages: List[BaseMessage] = event.data[self.key]
+        # The first event is the starting state (the whole history when resuming a thread):
+        # only its newest message is shown
+        new = messages[-1:] if self._seen is None else messages[self._seen:]
+        for message in new:
+            message.pretty_print()
+        self._seen = len(messages)
+
+
+class TraceRecorder(StreamConsumer):
+    """Keeps one record per node execution: which node, when it finished, and what it produced."""
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.total_s = 0.0
+
+    def on_event(self, event: StepEvent) -> None:
+        if event.mode != "updates":
+            return
+        for node, update in event.data.items():
+            produced = []
+            messages = update.get("messages", []) if isinstance(update, dict) else []
+            for message in messages if isinstance(messages, list) else [messages]:
+                calls = [call["name"] for call in getattr(message, "tool_calls", None) or []]
+                produced.append(f"{message.type}({', '.join(calls)})" if calls else message.type)
+            self.events.append({"node": node, "t_ms": round(event.elapsed_s * 1000, 1), "produced": produced})
+
+    def on_end(self, final_state: Optional[Dict[str, Any]]) -> None:
+        self.total_s = self.events[-1]["t_ms"] / 1000 if self.events else 0.0
+
+    def to_json(self) -> str:
+        return json.dumps({"total_s": self.total_s, "steps": self.events}, indent=2)
+
+    def print_summary(self) -> None:
+        print(f"{'step':>4}  {'t (ms)':>9}  node")
+        for i, record in enumerate(self.events):
+            print(f"{i:>4}  {record['t_ms']:>9.1f}  {record['node']}  {' '.join(record['produced'])}")
+
+
+class FinalStateCollector(StreamConsumer):
+    """Holds the last full state seen, i.e. what app.invoke() would have returned."""
+
+    def __init__(self):
+        self.state: Optional[Dict[str, Any]] = None
+
+    def on_end(self, final_state: Optional[Dict[str, Any]]) -> None:
+        self.state = final_state
+
+
+STREAM_MODES = ["updates", "values"]
+
+
+def run_graph(app, graph_input: Any, config: Optional[dict] = None,
+              consumers: Sequence[StreamConsumer] = ()) -> Optional[Dict[str, Any]]:
+    """One execution of `app`; every consumer sees every event. Returns the final state.
+
+    Pass `graph_input=None` to resume a paused (interrupted) thread, as with app.stream(None, config).
+    """
+    start = time.perf_counter()
+    final_state = None
+    for index, (mode, data) in enumerate(app.stream(graph_input, config, stream_mode=STREAM_MODES)):
+        if mode == "values":
+            final_state = data
+        event = StepEvent(index, mode, data, time.perf_counter() - start)
+        for consumer in consumers:
+            consumer.on_event(event)
+    for consumer in consumers:
+        consumer.on_end(final_state)
+    return final_state
+
+
+async def arun_graph(app, graph_input: Any, config: Optional[dict] = None,
+                     consumers: Sequence[StreamConsumer] = ()) -> Optional[Dict[str, Any]]:
+    """Async run_graph() on app.astream()."""
+    start = time.perf_counter()
+    final_state = None
+    index = 0
+    async for mode, data in app.astream(graph_input, config, stream_mode=STREAM_MODES):
+        if mode == "values":
+            final_state = data
+        event = StepEvent(index, mode, data, time.perf_counter() - start)
+        index += 1
+        for consumer in consumers:
+            consumer.on_event(event)
+    for consumer in consumers:
+        consumer.on_end(final_state)
+    return final_state
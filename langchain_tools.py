@@ -1,16 +1,15 @@
 import os
-from typing import Dict
-from langchain_groq import ChatGroq
+from typing import Any, Dict
+from models import get_chat_model
 from langchain_core.messages.human import HumanMessage
 from langchain_core.tools import tool
-from pypdf import PdfReader
+from pdf_analytics import count_words
 from dotenv import load_dotenv
 
 load_dotenv()
-llm = ChatGroq(model_name="llama-3.3-70b-versatile",temperature=0)
 
 @tool
-def count_words_in_pdf(file_path: str) -> Dict[str, int]:
+def count_words_in_pdf(file_path: str) -> Dict[str, Any]:
     """
     Count total words in a PDF file.
 
@@ -18,52 +17,45 @@ def count_words_in_pdf(file_path: str) -> Dict[str, int]:
         file_path: Absolute or relative path to the PDF file
 
     Returns:
-        Total word count
+        Total word count, page count, word count of each page and extraction time in seconds
     """
     if not os.path.exists(file_path):
         raise ValueError("PDF file does not exist")
 
-    reader = PdfReader(file_path)
-    full_text = ""
+    # Pages are streamed and counted one at a time (large files on a process pool),
+    # so the full text of the document is never built in memory
+    return count_words(file_path)
 
-    for page in reader.pages:
-        text = page.extract_text()
-        if text:
-            full_text += text + " "
+if __name__ == "__main__":
+    llm = get_chat_model()
 
-    word_count = len(full_text.split())
+    # bind_tools expects a list
+    llm_with_tools=llm.bind_tools([count_words_in_pdf]) 
 
-    return {
-        "word_count": word_count
-    }
+    pdf_path = "/Users/limbanijayhasmukhbhai/Yash/EJ1172284.pdf"
 
-# bind_tools expects a list
-llm_with_tools=llm.bind_tools([count_words_in_pdf]) 
+    messages= [HumanMessage(content=f"Count the number of words in the pdf file: {pdf_path}")]
 
-pdf_path = "/Users/limbanijayhasmukhbhai/Yash/EJ1172284.pdf"
+    response=llm_with_tools.invoke(messages)
 
-messages= [HumanMessage(content=f"Count the number of words in the pdf file: {pdf_path}")]
+    print("\n===== RAW LLM RESPONSE =====")
+    print(response)
 
-response=llm_with_tools.invoke(messages)
+    print("\n===== TOOL CALLS =====")
+    print(response.tool_calls)
 
-print("\n===== RAW LLM RESPONSE =====")
-print(response)
+    messages.append(response)
 
-print("\n===== TOOL CALLS =====")
-print(response.tool_calls)
+    #Now the LLM has given us idea that we should use the tool and args for that now we will implement the tool.
+    #Hence we will invoke our tool , here the args will be the first tool call suggested by the LLM.
+    tool_result=count_words_in_pdf.invoke(response.tool_calls[0])
+    print("\n===== TOOL RESPONSE =====")
+    print(tool_result)
 
-messages.append(response)
+    # We will now append our tool result to the messages
+    messages.append(tool_result)
 
-#Now the LLM has given us idea that we should use the tool and args for that now we will implement the tool.
-#Hence we will invoke our tool , here the args will be the first tool call suggested by the LLM.
-tool_result=count_words_in_pdf.invoke(response.tool_calls[0])
-print("\n===== TOOL RESPONSE =====")
-print(tool_result)
+    final_result=llm_with_tools.invoke(messages)
 
-# We will now append our tool result to the messages
-messages.append(tool_result)
-
-final_result=llm_with_tools.invoke(messages)
-
-print("\n===== FINAL LLM RESPONSE =====")
-print(final_result.content)
\ No newline at end of file
+    print("\n===== FINAL LLM RESPONSE =====")
+    print(final_result.content)
\ No newline at end of file
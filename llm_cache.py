@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+# Response cache for deterministic (temperature 0) chat model calls.
+#
+# LangChain consults the global llm cache with (prompt, llm_string) on every call:
+#   prompt     -> the serialized message list
+#   llm_string -> the model and its parameters, including bound tools and tool_choice
+# Both are normalized and hashed into one key. Lookups go to an in-memory LRU first, then to a
+# SQLite file shared by every script and process; a SQLite hit is promoted into the LRU.
+# Calls with any other temperature (or models that do not report one) always go to the provider.
+# "Temperature 0" includes the tiny values some clients send instead: ChatGroq turns 0 into 1e-08.
+#
+#   python llm_cache.py      # checks that a real ChatGroq(temperature=0) llm_string is cached
+
+# Per-message fields that change between otherwise identical conversations
+VOLATILE_MESSAGE_FIELDS = ("id", "response_metadata", "usage_metadata")
+TEMPERATURE_PARAM = re.compile(r"\('temperature', ([^)]+)\)")
+DETERMINISTIC_TEMPERATURE = 1e-6  # at or below this a call counts as temperature 0
+
+
+def _normalize_prompt(prompt: str) -> str:
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt.strip()
+    if isinstance(messages, list):
+        for message in messages:
+            kwargs = message.get("kwargs") if isinstance(message, dict) else None
+            if not isinstance(kwargs, dict):
+                continue
+            for field in VOLATILE_MESSAGE_FIELDS:
+                kwargs.pop(field, None)
+            if isinstance(kwargs.get("content"), str):
+                kwargs["content"] = kwargs["content"].strip()
+    return json.dumps(messages, sort_keys=True, separators=(",", ":"))
+
+
+def _temperature(llm_string: str) -> Optional[float]:
+    """Temperature a call runs with: call-time params first, then the model's own fields."""
+    model_part, _, params_part = llm_string.partition("---")
+    match = TEMPERATURE_PARAM.search(params_part)
+    if match:
+        try:
+            return float(match.group(1))
+        except ValueError:
+            return None
+    try:
+        value = json.loads(model_part).get("kwargs", {}).get("temperature")
+    except (ValueError, AttributeError):
+        return None
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def _deterministic(llm_string: str) -> bool:
+    temperature = _temperature(llm_string)
+    return temperature is not None and temperature <= DETERMINISTIC_TEMPERATURE
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    return hashlib.sha256(f"{_normalize_prompt(prompt)}\x00{llm_string}".encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache(BaseCache):
+    """Two-tier (LRU + SQLite) cache with TTL and size-based eviction, for temperature-0 calls only."""
+
+    def __init__(self, db_path: str = "llm_cache.sqlite", max_memory_entries: int = 1024,
+                 max_db_bytes: int = 256 * 1024 * 1024, ttl: Optional[float] = 7 * 24 * 3600):
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.max_db_bytes = max_db_bytes
+        self.ttl = ttl
+        # key -> (created_at, generations)
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT, size INTEGER, created_at REAL, last_used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_created_at ON responses (created_at)")
+        self._db.commit()
+        self._db_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0, "writes": 0, "evictions": 0}
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def _remember(self, key: str, created_at: float, generations: Any) -> None:
+        self._memory[key] = (created_at, generations)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if not _deterministic(llm_string):
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return None
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[0], now):
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return entry[1]
+            self._memory.pop(key, None)
+
+            row = self._db.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or self._expired(row[1], now):
+                if row is not None:
+                    self._delete(key)
+                self._stats["misses"] += 1
+                return None
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            generations = loads(row[0])
+            self._remember(key, row[1], generations)
+            self._stats["disk_hits"] += 1
+            return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if not _deterministic(llm_string):
+            return
+        key = cache_key(prompt, llm_string)
+        value = dumps(list(return_val))
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, return_val)
+            old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)", (key, value, len(value), now, now)
+            )
+            self._db_bytes += len(value) - (old[0] if old else 0)
+            self._stats["writes"] += 1
+            self._evict(now)
+            self._db.commit()
+
+    def _delete(self, key: str) -> None:
+        row = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        if row:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db_bytes -= row[0]
+            self._db.commit()
+
+    def _evict(self, now: float) -> None:
+        """Drops expired rows, then least recently used rows until the file is under max_db_bytes."""
+        if self.ttl is not None:
+            expired = self._db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,)).rowcount
+            if expired > 0:
+                self._stats["evictions"] += expired
+                self._db_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        while self._db_bytes > self.max_db_bytes:
+            rows = self._db.execute("SELECT key, size FROM responses ORDER BY last_used LIMIT 64").fetchall()
+            if not rows:
+                break
+            self._db.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key, _ in rows])
+            for key, size in rows:
+                self._memory.pop(key, None)
+                self._db_bytes -= size
+            self._stats["evictions"] += len(rows)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self._db_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        return {
+            **stats,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": entries,
+            "disk_bytes": self._db_bytes,
+        }
+
+
+_global_cache: Optional[LLMResponseCache] = None
+_global_lock = threading.Lock()
+
+
+def enable_llm_cache(db_path: Optional[str] = None, **kwargs: Any) -> Optional[LLMResponseCache]:
+    """Installs the cache as LangChain's global llm cache (once per process).
+
+    Set LLM_CACHE=0 to turn it off, LLM_CACHE_PATH to move the SQLite file.
+    """
+    global _global_cache
+    from langchain_core.globals import set_llm_cache
+
+    if os.getenv("LLM_CACHE", "1") == "0":
+        return None
+    with _global_lock:
+        if _global_cache is None:
+            _global_cache = LLMResponseCache(db_path or os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite"), **kwargs)
+            set_llm_cache(_global_cache)
+        return _global_cache
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    from langchain_core.messages import AIMessage, HumanMessage
+    from langchain_core.outputs import ChatGeneration
+    from langchain_groq import ChatGroq
+
+    # The llm_string LangChain builds for the default get_chat_model() (no request is sent)
+    llm = ChatGroq(model="llama-3.3-70b-versatile", temperature=0, api_key="not-used")
+    llm_string = llm._get_llm_string()
+    prompt = dumps([HumanMessage(content="What is 2 + 2?")])
+    cache = LLMResponseCache(f"{tempfile.mkdtemp()}/llm_cache.sqlite")
+    cache.update(prompt, llm_string, [ChatGeneration(message=AIMessage(content="4"))])
+    hit = cache.lookup(prompt, llm_string)
+    print(f"temperature in llm_string: {_temperature(llm_string)!r}, cached: {hit is not None}, {cache.stats()}")
+    sys.exit(0 if hit is not None and hit[0].message.content == "4" else 1)
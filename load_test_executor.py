@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import re
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from custom_agent_executor import CustomAgentExecutor
+from fake_chat_model import FakeChatModel, tool_call
+from perf_stats import latency_summary, peak_rss_mb
+
+# Load test for CustomAgentExecutor.ainvoke: N concurrent sessions on ONE executor,
+# driven by a stub chat model (no Groq calls), reporting throughput and tail latency.
+
+QUESTIONS = [
+    "Is it a good time to buy GOOGL?",
+    "Compare AAPL and TSLA.",
+    "What do you think about AAPL, GOOGL and TSLA?",
+]
+TICKER_PATTERN = re.compile(r"\b[A-Z]{2,5}\b")
+
+
+def analyst_policy(messages, tool_names):
+    """Turn 1: price + sentiment for every ticker in the question (in parallel). Turn 2: final_answer."""
+    if isinstance(messages[-1], ToolMessage):
+        return AIMessage(content="", tool_calls=[
+            tool_call("final_answer", answer="Hold.", tools_used=["get_stock_price", "get_company_news_sentiment"])
+        ])
+    question = next(m.content for m in reversed(messages) if isinstance(m, HumanMessage))
+    tickers = TICKER_PATTERN.findall(question) or ["GOOGL"]
+    return AIMessage(content="", tool_calls=(
+        [tool_call("get_stock_price", ticker=t) for t in tickers]
+        + [tool_call("get_company_news_sentiment", ticker=t) for t in tickers]
+    ))
+
+
+async def run_load_test(sessions: int, turns: int, latency: float, max_concurrent: int) -> dict:
+    llm = FakeChatModel(policy=analyst_policy, latency=latency)
+    executor = CustomAgentExecutor(llm=llm, max_concurrent_sessions=max_concurrent, verbose=False)
+    request_latencies = []
+
+    async def run_session(i: int):
+        for turn in range(turns):
+            start = time.perf_counter()
+            await executor.ainvoke(QUESTIONS[(i + turn) % len(QUESTIONS)], session_id=f"session-{i}")
+            request_latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_session(i) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": len(request_latencies),
+        "elapsed_s": elapsed,
+        "throughput_rps": len(request_latencies) / elapsed,
+        "model_calls": llm.calls,
+        "sessions_with_history": sum(1 for history in executor.histories.values() if len(history)),
+        "peak_rss_mb": peak_rss_mb(),
+        **latency_summary(request_latencies),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for CustomAgentExecutor.ainvoke")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--turns", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub model latency per call (seconds)")
+    parser.add_argument("--max-concurrent", type=int, default=200)
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load_test(args.sessions, args.turns, args.latency, args.max_concurrent))
+    print("--- LOAD TEST REPORT ---")
+    for key, value in report.items():
+        print(f"{key:>22}: {value:.2f}" if isinstance(value, float) else f"{key:>22}: {value}")
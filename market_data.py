@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Union
+
+from langchain_core.tools import tool
+
+from batching import MicroBatcher
+from ttl_cache import TTLCache
+
+# Market data for the stock tools.
+# Ticker requests from every agent and session go through one MarketDataService:
+#   - fresh quotes (default: under 60 s old) come straight from a TTL cache
+#   - the rest are coalesced by a MicroBatcher: requests arriving within `max_wait` of each other
+#     become ONE backend call (for yfinance: one bulk download for all their tickers)
+# The backend is pluggable: YFinanceBackend for live data, FixtureBackend for offline runs and tests
+# (MARKET_DATA_BACKEND=fixture, MARKET_DATA_FIXTURE=<json file>).
+
+Quote = Dict[str, Union[str, float, None]]
+
+
+class FixtureBackend:
+    """Quotes from a dict or a JSON file of {ticker: {"last_price", "market_cap", "currency"}}."""
+
+    def __init__(self, fixtures: Union[str, Dict[str, dict]], latency: float = 0.0):
+        if isinstance(fixtures, str):
+            with open(fixtures) as f:
+                fixtures = json.load(f)
+        self.fixtures = {ticker.upper(): quote for ticker, quote in fixtures.items()}
+        self.latency = latency
+        self.calls = 0
+
+    def fetch_quotes(self, tickers: List[str]) -> Dict[str, Quote]:
+        self.calls += 1
+        time.sleep(self.latency)
+        return {t: {"ticker": t, **self.fixtures[t]} for t in tickers if t in self.fixtures}
+
+
+class YFinanceBackend:
+    """Last prices for all tickers in one yf.download; shares and currency cached for a day."""
+
+    def __init__(self, profile_ttl: float = 24 * 3600, max_workers: int = 8):
+        self.profiles = TTLCache(maxsize=4096, ttl=profile_ttl)
+        self.max_workers = max_workers
+        self.calls = 0
+
+    def _profile(self, ticker: str) -> Optional[dict]:
+        import yfinance as yf
+
+        try:
+            info = yf.Ticker(ticker).fast_info
+            return {"shares": info["shares"], "currency": info["currency"]}
+        except Exception:
+            return None
+
+    def fetch_quotes(self, tickers: List[str]) -> Dict[str, Quote]:
+        import yfinance as yf
+
+        self.calls += 1
+        prices = yf.download(tickers, period="5d", interval="1d", progress=False, threads=True, auto_adjust=False)
+        close = prices["Close"]
+
+        missing = [t for t in tickers if self.profiles.get(t) is None]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as pool:
+                for ticker, profile in zip(missing, pool.map(self._profile, missing)):
+                    if profile is not None:
+                        self.profiles.set(ticker, profile)
+
+        quotes = {}
+        for ticker in tickers:
+            if hasattr(close, "columns"):
+                if ticker not in close.columns:
+                    continue
+                series = close[ticker]
+            else:
+                series = close
+            series = series.dropna()
+            if series.empty:
+                continue
+            last_price = float(series.iloc[-1])
+            profile = self.profiles.get(ticker) or {}
+            shares = profile.get("shares")
+            quotes[ticker] = {
+                "ticker": ticker,
+                "last_price": last_price,
+                "market_cap": last_price * shares if shares else None,
+                "currency": profile.get("currency"),
+            }
+        return quotes
+
+
+class MarketDataService:
+    def __init__(self, backend, ttl: float = 60.0, max_batch_size: int = 50, max_wait: float = 0.02):
+        self.backend = backend
+        self.cache = TTLCache(maxsize=4096, ttl=ttl)
+        self.batcher: MicroBatcher[str, Optional[Quote]] = MicroBatcher(
+            self._fetch_batch, max_batch_size=max_batch_size, max_wait=max_wait, name="market-data"
+        )
+
+    def _fetch_batch(self, tickers: List[str]) -> List[Optional[Quote]]:
+        # The same ticker may be requested by several callers in one window; fetch it once
+        quotes = self.backend.fetch_quotes(list(dict.fromkeys(tickers)))
+        for ticker, quote in quotes.items():
+            self.cache.set(ticker, quote)
+        return [quotes.get(ticker) for ticker in tickers]
+
+    def get_quotes(self, tickers: List[str]) -> Dict[str, Quote]:
+        tickers = [t.strip().upper() for t in tickers]
+        results = {t: self.cache.get(t) for t in dict.fromkeys(tickers)}
+        # All misses are submitted before waiting, so they land in the same batch
+        futures = {t: self.batcher.submit(t) for t, quote in results.items() if quote is None}
+        for ticker, future in futures.items():
+            results[ticker] = future.result() or {"ticker": ticker, "error": "no market data for this ticker"}
+        return results
+
+    def get_quote(self, ticker: str) -> Quote:
+        return next(iter(self.get_quotes([ticker]).values()))
+
+    def stats(self) -> dict:
+        return {"cache": self.cache.stats(), "batches": self.batcher.stats(), "backend_calls": self.backend.calls}
+
+
+_service: Optional[MarketDataService] = None
+_service_lock = threading.Lock()
+
+
+def get_market_data() -> MarketDataService:
+    """Process-wide service, so quotes are shared across sessions and agents."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            if os.getenv("MARKET_DATA_BACKEND", "yfinance") == "fixture":
+                backend = FixtureBackend(os.environ["MARKET_DATA_FIXTURE"])
+            else:
+                backend = YFinanceBackend()
+            _service = MarketDataService(backend)
+        return _service
+
+
+@tool
+def get_stock_data(ticker: str):
+    """Fetches real-time stock price and financial summary for a company ticker."""
+    return get_market_data().get_quote(ticker)
+
+
+@tool
+def get_stock_data_many(tickers: List[str]):
+    """Fetches real-time stock price and financial summary for several company tickers in one call.
+    Prefer this over repeated get_stock_data calls when comparing companies."""
+    return list(get_market_data().get_quotes(tickers).values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ten tickers: one backend call per ticker vs coalesced batches")
+    parser.add_argument("--tickers", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.3, help="simulated backend latency per call (s)")
+    args = parser.parse_args()
+
+    tickers = [f"TCK{i}" for i in range(args.tickers)]
+    fixtures = {t: {"last_price": round(random.uniform(10, 500), 2), "market_cap": 1e9, "currency": "USD"}
+                for t in tickers}
+
+    backend = FixtureBackend(fixtures, latency=args.latency)
+    start = time.perf_counter()
+    for ticker in tickers:
+        backend.fetch_quotes([ticker])
+    print(f"serial, one call per ticker : {time.perf_counter() - start:.2f}s, {backend.calls} backend calls")
+
+    service = MarketDataService(FixtureBackend(fixtures, latency=args.latency))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(tickers)) as pool:
+        list(pool.map(service.get_quote, tickers))
+    print(f"concurrent, coalesced       : {time.perf_counter() - start:.2f}s, {service.stats()}")
+
+    start = time.perf_counter()
+    service.get_quotes(tickers)
+    print(f"repeat within TTL           : {time.perf_counter() - start:.4f}s, {service.stats()}")
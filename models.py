@@ -0,0 +1,112 @@
+import hashlib
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from llm_cache import enable_llm_cache
+
+# One place that builds the shared resources for every script: the chat model and the embeddings.
+# The first get_chat_model() call installs the global response cache (llm_cache.py), so identical
+# temperature-0 prompts are answered from memory / llm_cache.sqlite instead of another Groq round trip.
+#
+# Both are process-wide singletons and both are built on first use: importing this module (or any
+# workflow that imports it) loads neither langchain_groq nor torch / sentence-transformers.
+# A worker that imports the workflows before forking pays for them once per process, when it
+# handles its first request.
+
+DEFAULT_CHAT_MODEL = "llama-3.3-70b-versatile"
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# "torch": HuggingFaceEmbeddings (PyTorch fp32); "onnx": OnnxEmbeddings (int8 ONNX, CPU, see onnx_embeddings.py)
+EMBEDDING_BACKENDS = ("torch", "onnx")
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    """What the workflows' build_app(config) factories are built from (hashable, so builds can be cached)."""
+    model: str = DEFAULT_CHAT_MODEL
+    temperature: float = 0
+    embedding_model: str = DEFAULT_EMBEDDING_MODEL
+    embedding_backend: str = "torch"
+    checkpoint_db: str = "checkpoints.sqlite"
+    keep_last: int = 20
+
+    @classmethod
+    def from_env(cls) -> "AppConfig":
+        return cls(
+            model=os.getenv("CHAT_MODEL", DEFAULT_CHAT_MODEL),
+            temperature=float(os.getenv("CHAT_TEMPERATURE", "0")),
+            embedding_model=os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL),
+            embedding_backend=os.getenv("EMBEDDING_BACKEND", "torch"),
+            checkpoint_db=os.getenv("CHECKPOINT_DB", "checkpoints.sqlite"),
+            keep_last=int(os.getenv("CHECKPOINT_KEEP_LAST", "20")),
+        )
+
+
+_chat_models: Dict[tuple, Any] = {}
+_embeddings: Dict[tuple, Any] = {}
+_lock = threading.Lock()
+
+
+def get_chat_model(model: str = DEFAULT_CHAT_MODEL, temperature: float = 0, **kwargs):
+    """The ChatGroq client for these settings, shared by every caller that asks for the same ones."""
+    enable_llm_cache()
+    try:
+        key = (model, temperature, tuple(sorted(kwargs.items())))
+        hash(key)
+    except TypeError:
+        key = None  # unhashable kwargs (e.g. callbacks): not shared
+    with _lock:
+        llm = _chat_models.get(key) if key is not None else None
+        if llm is None:
+            from langchain_groq import ChatGroq
+
+            llm = ChatGroq(model=model, temperature=temperature, **kwargs)
+            if key is not None:
+                _chat_models[key] = llm
+        return llm
+
+
+def get_embeddings(model_name: str = DEFAULT_EMBEDDING_MODEL, backend: str = "torch"):
+    """The sentence-transformer embeddings, behind the persistent embedding cache.
+
+    The model itself is loaded by CachedEmbeddings on the first text that is not cached yet.
+    Each backend caches under its own name: int8 vectors are close to the fp32 ones, not equal.
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected one of {EMBEDDING_BACKENDS}")
+    with _lock:
+        embeddings = _embeddings.get((model_name, backend))
+        if embeddings is None:
+            from embedding_cache import CachedEmbeddings
+
+            def load_model():
+                if backend == "onnx":
+                    from onnx_embeddings import OnnxEmbeddings
+
+                    return OnnxEmbeddings(model_name)
+                from langchain_huggingface import HuggingFaceEmbeddings
+
+                return HuggingFaceEmbeddings(model_name=model_name)
+
+            embeddings = _embeddings[(model_name, backend)] = CachedEmbeddings(
+                embedding_space(model_name, backend), load_model
+            )
+        return embeddings
+
+
+def embedding_space(model_name: str = DEFAULT_EMBEDDING_MODEL, backend: str = "torch") -> str:
+    """Name of the vectors get_embeddings(model_name, backend) produces (the embedding cache's key)."""
+    return model_name if backend == "torch" else f"{model_name}@onnx-int8"
+
+
+def embedding_store_id(model_name: str = DEFAULT_EMBEDDING_MODEL, backend: str = "torch") -> str:
+    """embedding_space() as a short id for store paths, Chroma collection names and record-manager namespaces.
+
+    Vector stores are keyed on it, so switching the model or the backend indexes into a new store
+    instead of mixing vectors from two spaces in one.
+    """
+    space = embedding_space(model_name, backend)
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "-", space.rsplit("/", 1)[-1]).strip("-._")[:30]
+    return f"{slug}-{hashlib.sha256(space.encode('utf-8')).hexdigest()[:8]}"
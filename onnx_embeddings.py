@@ -0,0 +1,255 @@
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# CPU embedding backend: the same sentence-transformer as HuggingFaceEmbeddings("all-MiniLM-L6-v2"),
+# exported once to ONNX and dynamically quantized to int8, run by onnxruntime.
+#
+#   export (first use, needs torch + transformers):
+#     AutoModel -> model.onnx (fp32, dynamic batch/sequence axes) -> quantize_dynamic -> model.int8.onnx
+#     The int8 model is checked against the fp32 PyTorch vectors on PARITY_TEXTS and rejected if any
+#     cosine similarity is below `parity_threshold` (0.99). The result is kept in parity.json.
+#   inference (no torch):
+#     texts are tokenized without padding, sorted by token count and cut into batches of neighbours,
+#     so each batch is padded only to its own longest text (length buckets) instead of max_length.
+#     Mean pooling over the attention mask + L2 normalization, like the sentence-transformers pipeline.
+#     onnxruntime runs each batch on `intra_op_threads` threads (default: every core).
+#
+# Vectors differ slightly from the fp32 ones, so models.get_embeddings() caches them under their own
+# name, and the FAISS index (rag_example) and the Chroma collection, record-manager namespace and PDF
+# manifest (RAG_Agent_LangGraph) are keyed on models.embedding_store_id(): EMBEDDING_BACKEND=onnx
+# indexes into stores of its own on first use and never queries fp32 document vectors.
+#
+#   python onnx_embeddings.py        # chunks/sec of torch fp32 vs ONNX int8 on the bundled PDFs
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+DEFAULT_ONNX_DIR = "./onnx_models"
+MAX_LENGTH = 256  # all-MiniLM-L6-v2's max_seq_length: longer texts are truncated, as in sentence-transformers
+PARITY_THRESHOLD = 0.99
+PARITY_TEXTS = [
+    "NVIDIA's fiscal 2024 revenue was $60.9 billion, up 126% from a year ago.",
+    "Cats are obligate carnivores and love eating tuna.",
+    "The Eiffel Tower was completed on March 31, 1889.",
+    "What is the diet of a cat?",
+    "Attention is all you need.",
+    "The dominant sequence transduction models are based on complex recurrent or convolutional neural "
+    "networks that include an encoder and a decoder. The best performing models also connect the encoder "
+    "and decoder through an attention mechanism. We propose a new simple network architecture, the "
+    "Transformer, based solely on attention mechanisms, dispensing with recurrence and convolutions entirely.",
+    "Data Center revenue reached a record $47.5 billion, driven by Hopper GPUs. " * 12,
+]
+
+
+def _model_dir(model_name: str, onnx_dir: str) -> str:
+    return os.path.join(onnx_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", model_name))
+
+
+def _hub_name(model_name: str) -> str:
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+def mean_pool(hidden: "np.ndarray", mask: "np.ndarray") -> "np.ndarray":
+    """Sentence vectors: mean of the token vectors under the attention mask, L2-normalized."""
+    import numpy as np
+
+    mask = mask[..., None].astype(hidden.dtype)
+    pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+    return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+
+def cosine_parity(vectors: Sequence[Sequence[float]], reference: Sequence[Sequence[float]]) -> Dict[str, float]:
+    """Row-wise cosine similarity between two sets of vectors of the same texts."""
+    import numpy as np
+
+    a, b = np.asarray(vectors, dtype=np.float32), np.asarray(reference, dtype=np.float32)
+    cosines = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+    return {"min_cosine": float(cosines.min()), "mean_cosine": float(cosines.mean()), "texts": len(cosines)}
+
+
+def export_onnx(model_name: str = DEFAULT_MODEL, onnx_dir: str = DEFAULT_ONNX_DIR, max_length: int = MAX_LENGTH,
+                parity_threshold: float = PARITY_THRESHOLD, opset: int = 14) -> str:
+    """Exports and quantizes the model into <onnx_dir>/<model>/ and returns that directory.
+
+    Raises ValueError (and keeps no int8 model) when the int8 vectors fail the parity check.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    model_dir = _model_dir(model_name, onnx_dir)
+    os.makedirs(model_dir, exist_ok=True)
+    fp32_path = os.path.join(model_dir, "model.onnx")
+    int8_path = os.path.join(model_dir, "model.int8.onnx")
+
+    tokenizer = AutoTokenizer.from_pretrained(_hub_name(model_name))
+    model = AutoModel.from_pretrained(_hub_name(model_name)).eval()
+    tokenizer.save_pretrained(model_dir)  # tokenizer.json: all inference needs besides the ONNX file
+
+    inputs = ["input_ids", "attention_mask", "token_type_ids"]
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    with torch.no_grad():
+        torch.onnx.export(
+            model, tuple(sample[name] for name in inputs), fp32_path,
+            input_names=inputs, output_names=["last_hidden_state"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in inputs + ["last_hidden_state"]},
+            opset_version=opset,
+        )
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+    # Parity: int8 ONNX vs the fp32 PyTorch model the export started from
+    with torch.no_grad():
+        batch = tokenizer(PARITY_TEXTS, padding=True, truncation=True, max_length=max_length, return_tensors="pt")
+        reference = mean_pool(model(**batch).last_hidden_state.numpy(), batch["attention_mask"].numpy())
+    quantized = OnnxEmbeddings(model_name, onnx_dir=onnx_dir, max_length=max_length, export=False)
+    parity = cosine_parity(quantized.embed_documents(PARITY_TEXTS), reference)
+    parity.update(threshold=parity_threshold, passed=parity["min_cosine"] >= parity_threshold)
+    with open(os.path.join(model_dir, "parity.json"), "w") as f:
+        json.dump(parity, f, indent=2)
+    if not parity["passed"]:
+        os.remove(int8_path)
+        raise ValueError(f"int8 ONNX export of {model_name} failed parity: min cosine "
+                         f"{parity['min_cosine']:.4f} < {parity_threshold}")
+    return model_dir
+
+
+class OnnxEmbeddings(Embeddings):
+    """Drop-in Embeddings running the int8 ONNX export of a sentence-transformer (exported on first use)."""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, onnx_dir: str = DEFAULT_ONNX_DIR, quantized: bool = True,
+                 batch_size: int = 32, max_length: int = MAX_LENGTH, intra_op_threads: Optional[int] = None,
+                 bucket_by_length: bool = True, export: bool = True):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.bucket_by_length = bucket_by_length
+        model_dir = _model_dir(model_name, onnx_dir)
+        model_path = os.path.join(model_dir, "model.int8.onnx" if quantized else "model.onnx")
+        if not os.path.exists(model_path):
+            if not export:
+                raise FileNotFoundError(model_path)
+            export_onnx(model_name, onnx_dir, max_length)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads or os.cpu_count() or 1
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.no_padding()
+
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.tokens = 0
+        self.padded_tokens = 0  # tokens run through the model, padding included
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        encodings = self.tokenizer.encode_batch(list(texts))
+        order = list(range(len(texts)))
+        if self.bucket_by_length:
+            order.sort(key=lambda i: len(encodings[i].ids))
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for i, vector in zip(batch, self._embed_batch([encodings[i] for i in batch])):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def _embed_batch(self, encodings) -> "np.ndarray":
+        import numpy as np
+
+        width = max(len(e.ids) for e in encodings)
+        ids = np.zeros((len(encodings), width), dtype=np.int64)  # [PAD] is id 0
+        mask = np.zeros_like(ids)
+        types = np.zeros_like(ids)
+        for row, encoding in enumerate(encodings):
+            n = len(encoding.ids)
+            ids[row, :n] = encoding.ids
+            mask[row, :n] = encoding.attention_mask
+            types[row, :n] = encoding.type_ids
+        feeds = {"input_ids": ids, "attention_mask": mask, "token_type_ids": types}
+        hidden = self.session.run(None, {k: v for k, v in feeds.items() if k in self._input_names})[0]
+        with self._lock:
+            self.batches += 1
+            self.tokens += int(mask.sum())
+            self.padded_tokens += ids.size
+        return mean_pool(hidden, mask)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "tokens": self.tokens,
+                "padded_tokens": self.padded_tokens,
+                "padding_ratio": 1 - self.tokens / self.padded_tokens if self.padded_tokens else 0.0,
+            }
+
+
+# --- BENCHMARK: chunks/sec on the bundled PDFs, torch fp32 vs ONNX int8 ---
+
+def load_pdf_chunks(pdf_paths: List[str]) -> List[str]:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from pdf_ingestion import stream_chunks, stream_pages
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=600, chunk_overlap=120)
+    return [chunk.page_content for chunk in stream_chunks(stream_pages(pdf_paths), splitter)]
+
+
+def _throughput(embeddings: Embeddings, texts: List[str], batch_size: int) -> tuple:
+    embeddings.embed_documents(texts[:batch_size])  # warm-up: first-run allocations, lazy init
+    start = time.perf_counter()
+    vectors = []
+    # Same call pattern as pdf_ingestion: one embed_documents call per EMBED_BATCH_SIZE chunks
+    for i in range(0, len(texts), 256):
+        vectors.extend(embeddings.embed_documents(texts[i:i + 256]))
+    return len(texts) / (time.perf_counter() - start), vectors
+
+
+if __name__ == "__main__":
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    parser = argparse.ArgumentParser(description="Embedding throughput: PyTorch fp32 vs ONNX int8 on the bundled PDFs")
+    parser.add_argument("pdfs", nargs="*", default=["attention.pdf", "NVIDIA_2024_REPORT.pdf", "EJ1172284.pdf"])
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--limit", type=int, default=2000, help="chunks to embed (0: all)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None, help="onnxruntime intra-op threads (default: all cores)")
+    args = parser.parse_args()
+
+    texts = load_pdf_chunks(args.pdfs)
+    texts = texts[:args.limit] if args.limit else texts
+    print(f"--- {len(texts)} chunks from {len(args.pdfs)} PDFs, batch size {args.batch_size} ---")
+
+    torch_fp32 = HuggingFaceEmbeddings(model_name=args.model, encode_kwargs={"batch_size": args.batch_size})
+    reference_rate, reference = _throughput(torch_fp32, texts, args.batch_size)
+    print(f"{'backend':<28}{'chunks/s':>10}{'speedup':>9}{'min cos':>9}{'mean cos':>10}{'padding':>9}")
+    print(f"{'torch fp32':<28}{reference_rate:>10.1f}{1.0:>9.2f}{1.0:>9.4f}{1.0:>10.4f}{'-':>9}")
+
+    for label, quantized, bucket in (("onnx fp32, bucketed", False, True),
+                                     ("onnx int8, unsorted", True, False),
+                                     ("onnx int8, bucketed", True, True)):
+        engine = OnnxEmbeddings(args.model, quantized=quantized, batch_size=args.batch_size,
+                                intra_op_threads=args.threads, bucket_by_length=bucket)
+        rate, vectors = _throughput(engine, texts, args.batch_size)
+        parity = cosine_parity(vectors, reference)
+        print(f"{label:<28}{rate:>10.1f}{rate / reference_rate:>9.2f}{parity['min_cosine']:>9.4f}"
+              f"{parity['mean_cosine']:>10.4f}{engine.stats()['padding_ratio']:>9.1%}")
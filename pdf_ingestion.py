@@ -0,0 +1,100 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from langchain_classic.indexes import index
+from langchain_core.documents import Document
+from pypdf import PdfReader
+
+# Streaming PDF ingestion: instead of loading every page of every PDF up front
+# (PyPDFDirectoryLoader(...).load()), the stages below are chained generators:
+#
+#   PDF files -> [process pool: extract page ranges] -> pages -> [splitter] -> chunks -> [dedup] -> index() in batches
+#
+# Only `max_pending` page ranges are in flight at once and index() only holds
+# `batch_size` chunks, so peak memory stays flat no matter how big the folder is.
+
+PAGES_PER_TASK = 32   # pages one worker extracts per task
+EMBED_BATCH_SIZE = 256  # chunks per embedding call / vector store write
+
+
+def iter_pdf_files(directory: str) -> List[str]:
+    """Same files PyPDFDirectoryLoader would pick up: every non-hidden *.pdf, recursively."""
+    return sorted(str(p) for p in Path(directory).rglob("*.pdf") if not p.name.startswith("."))
+
+
+def _extract_page_range(path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    # Runs inside a worker process; plain tuples keep the pickling back to the parent cheap
+    reader = PdfReader(path)
+    return [(i, reader.pages[i].extract_text() or "") for i in range(start, end)]
+
+
+def _page_tasks(paths: Iterable[str], pages_per_task: int) -> Iterator[Tuple[str, int, int]]:
+    for path in paths:
+        num_pages = len(PdfReader(path).pages)
+        for start in range(0, num_pages, pages_per_task):
+            yield path, start, min(start + pages_per_task, num_pages)
+
+
+def stream_pages(paths: Iterable[str], workers: Optional[int] = None,
+                 pages_per_task: int = PAGES_PER_TASK, max_pending: Optional[int] = None) -> Iterator[Document]:
+    """Yields one Document per page, in file/page order, extracted on a process pool.
+
+    Backpressure: a new range is only submitted when the consumer has pulled the oldest one,
+    so at most `max_pending` ranges are extracted ahead of the rest of the pipeline.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for task in _page_tasks(paths, pages_per_task):
+            pending.append((task[0], pool.submit(_extract_page_range, *task)))
+            if len(pending) >= max_pending:
+                yield from _to_documents(*pending.popleft())
+        while pending:
+            yield from _to_documents(*pending.popleft())
+
+
+def _to_documents(path: str, future) -> Iterator[Document]:
+    for page_number, text in future.result():
+        yield Document(page_content=text, metadata={"source": path, "page": page_number})
+
+
+def stream_chunks(pages: Iterable[Document], text_splitter) -> Iterator[Document]:
+    # Splitting page by page gives the same chunks as splitting the whole list at once,
+    # because PyPDF already hands the splitter one Document per page.
+    for page in pages:
+        yield from text_splitter.split_documents([page])
+
+
+def ingest_pdfs(paths: List[str], record_manager, vectorstore, text_splitter,
+                workers: Optional[int] = None, batch_size: int = EMBED_BATCH_SIZE, deduplicator=None):
+    """Streams the given PDFs into the vector store through the record manager.
+
+    index() pulls `batch_size` chunks at a time, embeds them with one embed_documents call
+    and writes them with one add_documents call, while the pool keeps extracting ahead.
+    With a `deduplicator` (chunker.ChunkDeduplicator), duplicate chunks are dropped before they are embedded.
+    """
+    chunks = stream_chunks(stream_pages(paths, workers=workers), text_splitter)
+    if deduplicator is not None:
+        chunks = deduplicator.filter(chunks)
+    return index(
+        chunks,
+        record_manager,
+        vectorstore,
+        cleanup="incremental",
+        source_id_key="source",
+        key_encoder="sha256",
+        batch_size=batch_size
+    )
+
+
+def remove_sources(paths: List[str], record_manager, vectorstore) -> int:
+    """Deletes every chunk that came from the given (deleted) PDFs. Returns the number of chunks removed."""
+    keys = record_manager.list_keys(group_ids=paths)
+    if keys:
+        vectorstore.delete(keys)
+        record_manager.delete_keys(keys)
+    return len(keys)
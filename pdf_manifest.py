@@ -0,0 +1,80 @@
+import hashlib
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+# File-level change detection for incremental indexing.
+# The record manager can only tell a chunk is unchanged AFTER the PDF has been parsed and split.
+# The manifest remembers (path, size, mtime, sha256) per file, so unchanged PDFs are skipped
+# before they are ever opened: on a clean restart the whole check is one os.stat() per file.
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class ManifestDiff:
+    new: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    # (path, size, mtime_ns, sha256) rows to store once the changes are indexed
+    _records: List[Tuple[str, int, int, str]] = field(default_factory=list, repr=False)
+
+    @property
+    def changed(self) -> List[str]:
+        """Files that have to go through the parser/indexer."""
+        return self.new + self.modified
+
+
+class FileManifest:
+    def __init__(self, db_path: str = "pdf_manifest.sqlite"):
+        self._db = sqlite3.connect(db_path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, sha256 TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+    def _known(self) -> Dict[str, Tuple[int, int, str]]:
+        return {path: (size, mtime, sha) for path, size, mtime, sha in self._db.execute("SELECT * FROM files")}
+
+    def diff(self, paths: List[str]) -> ManifestDiff:
+        """Compares the files on disk against the manifest.
+
+        Content is only hashed when size or mtime moved; a file that was merely touched
+        (same hash) counts as unchanged and just gets its new mtime recorded.
+        """
+        known = self._known()
+        result = ManifestDiff()
+        for path in paths:
+            stat = os.stat(path)
+            previous = known.pop(path, None)
+            if previous is not None and previous[:2] == (stat.st_size, stat.st_mtime_ns):
+                result.unchanged.append(path)
+                continue
+            sha = file_sha256(path)
+            result._records.append((path, stat.st_size, stat.st_mtime_ns, sha))
+            if previous is None:
+                result.new.append(path)
+            elif previous[2] != sha:
+                result.modified.append(path)
+            else:
+                result.unchanged.append(path)
+        # Whatever is left in the manifest is no longer on disk
+        result.deleted = sorted(known)
+        return result
+
+    def commit(self, diff: ManifestDiff) -> None:
+        """Records a diff once its files are indexed, so a failed run is retried next time."""
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", diff._records)
+            self._db.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in diff.deleted])
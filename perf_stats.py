@@ -0,0 +1,42 @@
+import os
+import resource
+import sys
+from typing import Dict, List, Sequence
+
+# Small helpers shared by the benchmark scripts: latency percentiles and memory readings.
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """Nearest-rank percentile (p in 0-100) of an unsorted sequence."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def latency_summary(seconds: List[float]) -> Dict[str, float]:
+    """p50/p99/mean of a list of durations, reported in milliseconds."""
+    return {
+        "count": len(seconds),
+        "p50_ms": percentile(seconds, 50) * 1000,
+        "p99_ms": percentile(seconds, 99) * 1000,
+        "mean_ms": (sum(seconds) / len(seconds) * 1000) if seconds else 0.0,
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def current_rss_mb() -> float:
+    """Current resident memory (Linux /proc; falls back to the peak elsewhere)."""
+    try:
+        with open(f"/proc/{os.getpid()}/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        return peak_rss_mb()
@@ -1,24 +1,80 @@
-from langchain_groq import ChatGroq
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
+import asyncio
+import hashlib
+import os
+import threading
+from typing import Dict, Optional
+from models import AppConfig, embedding_space, embedding_store_id, get_chat_model, get_embeddings
+from llm_cache import enable_llm_cache
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnablePassthrough, RunnableLambda
+from vector_index import IndexConfig
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# --- 1. SETUP THE KNOWLEDGE BASE ---
-embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+# faiss, numpy and the sentence-transformer are imported by the functions that use them:
+# importing this module (e.g. from a worker) loads none of them.
 
+# --- 1. SETUP THE KNOWLEDGE BASE ---
 texts = [
     "The Alpha Centauri system is the closest star system to the Solar System.",
     "Cats are obligate carnivores and love eating tuna.",
     "The Eiffel Tower was completed on March 31, 1889."
 ]
 
-vectorstore = FAISS.from_texts(texts, embedding=embeddings)
-retriever = vectorstore.as_retriever()
+# Index structure is configurable: "flat" (exact), "ivf_flat", "hnsw" or "ivf_pq".
+# Run `python vector_index.py` to compare recall and latency before switching.
+VECTOR_INDEX = IndexConfig(kind="flat")
+# One index per embedding model and backend: "./faiss_index-<embedding_store_id>"
+FAISS_INDEX_PATH = "./faiss_index"
+
+def faiss_index_path(config: AppConfig) -> str:
+    return f"{FAISS_INDEX_PATH}-{embedding_store_id(config.embedding_model, config.embedding_backend)}"
+
+def texts_fingerprint(config: AppConfig) -> str:
+    space = embedding_space(config.embedding_model, config.embedding_backend)
+    return hashlib.sha256(("\n".join(texts) + repr(VECTOR_INDEX) + space).encode("utf-8")).hexdigest()
+
+def load_vectorstore(config: Optional[AppConfig] = None):
+    from faiss_store import load_faiss_store, save_faiss_store, stored_fingerprint
+    from vector_index import build_faiss_store
+
+    config = config or AppConfig()
+    embeddings = get_embeddings(config.embedding_model, config.embedding_backend)
+    path, fingerprint = faiss_index_path(config), texts_fingerprint(config)
+    # Saved to disk once and memory-mapped on later runs; rebuilt only when the texts, the index
+    # config or the embeddings change
+    if os.path.exists(path) and stored_fingerprint(path) == fingerprint:
+        return load_faiss_store(path, embeddings)
+    vectorstore = build_faiss_store(texts, embeddings, VECTOR_INDEX)
+    save_faiss_store(vectorstore, path, fingerprint=fingerprint)
+    return vectorstore
+
+def build_retriever(vectorstore):
+    # Queries from concurrent callers arriving within 5 ms share one embedding call and one FAISS search.
+    # RunnableLambda gives it the same .invoke()/.ainvoke() interface as vectorstore.as_retriever().
+    retrieval_service = build_retrieval_service(vectorstore)
+    return RunnableLambda(retrieval_service.retrieve, afunc=retrieval_service.aretrieve)
+
+def build_retrieval_service(vectorstore):
+    from retrieval_service import RetrievalService
+
+    return RetrievalService(vectorstore, k=4, max_batch_size=32, max_wait=0.005)
+
+_retrieval_services: Dict[tuple, object] = {}
+_retrieval_lock = threading.Lock()
+
+def get_retrieval_service(config: Optional[AppConfig] = None):
+    """Loads the store (and the embedding model) on the first call; later calls share it."""
+    config = config or AppConfig()
+    key = (config.embedding_model, config.embedding_backend)
+    with _retrieval_lock:
+        service = _retrieval_services.get(key)
+        if service is None:
+            vectorstore = load_vectorstore(config)
+            service = _retrieval_services[key] = build_retrieval_service(vectorstore)
+        return service
 
 # --- 2. DEFINE THE TEMPLATE ---
 template = """Answer the question based only on the following context:
@@ -33,33 +89,74 @@ def format_docs(docs):
     return "\n\n".join(doc.page_content for doc in docs)
 
 # --- 4. THE GROQ RAG CHAIN ---
-llm = ChatGroq(
-    model="llama-3.3-70b-versatile",
-    temperature=0
-)
-
-rag_chain = (
-    {"context": retriever | format_docs, "question": RunnablePassthrough()}
-    | prompt
-    | llm
-    | StrOutputParser()
-)
+# The retriever and model are injectable so the chain can run offline (see benchmarks/)
+def build_rag_chain(retriever, llm=None):
+    llm = llm if llm is not None else get_chat_model()
+    return (
+        {"context": retriever | format_docs, "question": RunnablePassthrough()}
+        | prompt
+        | llm
+        | StrOutputParser()
+    )
+
+def build_app(config: Optional[AppConfig] = None, llm=None):
+    """The RAG chain built from `config`. Nothing heavy is loaded until the first question."""
+    config = config or AppConfig()
+    llm = llm if llm is not None else get_chat_model(config.model, config.temperature)
+
+    def retrieve(query):
+        return get_retrieval_service(config).retrieve(query)
+
+    async def aretrieve(query):
+        # The first call may load the store and the model: off the event loop
+        service = await asyncio.to_thread(get_retrieval_service, config)
+        return await service.aretrieve(query)
+
+    return build_rag_chain(RunnableLambda(retrieve, afunc=aretrieve), llm)
 
 # --- 5. EXECUTION ---
-query = "What is the diet of a cat according to the text?"
+if __name__ == "__main__":
+    from semantic_cache import SemanticCache, vectorstore_fingerprint
+
+    config = AppConfig.from_env()
+    # Wrapped in a persistent cache: texts embedded on a previous run are read back from disk
+    embeddings = get_embeddings(config.embedding_model, config.embedding_backend)
+    vectorstore = load_vectorstore(config)
+    retriever = build_retriever(vectorstore)
+    rag_chain = build_rag_chain(retriever, get_chat_model(config.model, config.temperature))
+
+    # Paraphrases of a question already answered ("what do cats eat" / "cat diet") are served from
+    # this cache: no retrieval, no prompt, no LLM call. Entries are dropped when the store changes.
+    answer_cache = SemanticCache(
+        embeddings,
+        threshold=0.9,
+        fingerprint=lambda: texts_fingerprint(config) + vectorstore_fingerprint(vectorstore)
+    )
+    cached_rag_chain = answer_cache.wrap(rag_chain)
+
+    query = "What is the diet of a cat according to the text?"
+
+    print(f"--- Querying Groq RAG Chain ---")
+    print(f"Question: {query}")
+
+    # Running the chain.
+    response = cached_rag_chain.invoke(query)
 
-print(f"--- Querying Groq RAG Chain ---")
-print(f"Question: {query}")
+    print(f"\n--- Groq AI Response ---")
+    print(response)
 
-# Running the chain.
-response = rag_chain.invoke(query)
+    paraphrase = "According to the text, what do cats eat?"
+    print(f"\n--- Paraphrased Question (semantic cache) ---")
+    print(f"Question: {paraphrase}")
+    print(cached_rag_chain.invoke(paraphrase))
 
-print(f"\n--- Groq AI Response ---")
-print(response)
+    # --- BONUS: DEBUGGING THE PIPELINE ---
+    print(f"\n--- Detailed Context Check ---")
+    context_docs = retriever.invoke(query)
+    print(f"Retriever pulled {len(context_docs)} relevant documents.")
+    for i, doc in enumerate(context_docs):
+        print(f"Doc {i+1}: {doc.page_content}")
 
-# --- BONUS: DEBUGGING THE PIPELINE ---
-print(f"\n--- Detailed Context Check ---")
-context_docs = retriever.invoke(query)
-print(f"Retriever pulled {len(context_docs)} relevant documents.")
-for i, doc in enumerate(context_docs):
-    print(f"Doc {i+1}: {doc.page_content}")
\ No newline at end of file
+    print(f"\n--- Embedding Cache: {embeddings.stats()} ---")
+    print(f"--- Semantic Answer Cache: {answer_cache.stats()} ---")
+    print(f"--- LLM Response Cache: {enable_llm_cache().stats()} ---")
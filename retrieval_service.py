@@ -0,0 +1,67 @@
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from batching import MicroBatcher
+
+# Batched multi-query retrieval.
+# Concurrent graph runs each ask for one query; the service groups the queries that arrive
+# within `max_wait` seconds into ONE embedding call and ONE k-NN search, then hands every
+# caller back its own list of Documents.
+
+
+class RetrievalService:
+    def __init__(self, vectorstore, k: int = 4, embeddings: Optional[Embeddings] = None,
+                 max_batch_size: int = 32, max_wait: float = 0.005):
+        self.vectorstore = vectorstore
+        self.k = k
+        self.embeddings = embeddings or vectorstore.embeddings
+        self._batcher = MicroBatcher(self._search_batch, max_batch_size=max_batch_size,
+                                     max_wait=max_wait, name="retrieval-batcher")
+
+    def retrieve(self, query: str) -> List[Document]:
+        return self._batcher.run(query)
+
+    async def aretrieve(self, query: str) -> List[Document]:
+        return await self._batcher.arun(query)
+
+    def stats(self) -> dict:
+        return self._batcher.stats()
+
+    def _search_batch(self, queries: List[str]) -> List[List[Document]]:
+        # One forward pass for every query in the batch
+        # (embed_documents batches; for sentence-transformer models it matches embed_query)
+        vectors = self.embeddings.embed_documents(queries)
+        if hasattr(self.vectorstore, "index_to_docstore_id"):
+            return self._search_faiss(vectors)
+        if hasattr(self.vectorstore, "_collection"):
+            return self._search_chroma(vectors)
+        # Any other store: still one embedding call, but one search per query
+        return [self.vectorstore.similarity_search_by_vector(v, k=self.k) for v in vectors]
+
+    def _search_faiss(self, vectors: List[List[float]]) -> List[List[Document]]:
+        import faiss
+
+        store = self.vectorstore
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if getattr(store, "_normalize_L2", False):
+            faiss.normalize_L2(matrix)
+        # One index.search call for the whole (n_queries x dim) matrix
+        _, ids = store.index.search(matrix, self.k)
+        return [
+            [store.docstore.search(store.index_to_docstore_id[i]) for i in row if i != -1]
+            for row in ids
+        ]
+
+    def _search_chroma(self, vectors: List[List[float]]) -> List[List[Document]]:
+        result = self.vectorstore._collection.query(
+            query_embeddings=vectors,
+            n_results=self.k,
+            include=["documents", "metadatas"]
+        )
+        return [
+            [Document(page_content=text, metadata=metadata or {}) for text, metadata in zip(texts, metadatas)]
+            for texts, metadatas in zip(result["documents"], result["metadatas"])
+        ]
@@ -1,19 +1,65 @@
+import asyncio
+import re
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+def join_chunks(chunks):
+    """The whole value of a stream: its chunks joined with +."""
+    data = None
+    for chunk in chunks:
+        data = chunk if data is None else data + chunk
+    return data
 
 # 1. The Base Runnable Class
 class CRunnable(ABC):
-    def __init__(self):
-        self.next = None
-
     @abstractmethod
     def process(self, data):
         pass
 
     def invoke(self, data):
-        processed_data = self.process(data)
-        if self.next is not None:
-            return self.next.invoke(processed_data)
-        return processed_data
+        return self.process(data)
+
+    def batch(self, inputs, max_concurrency=None):
+        """Runs invoke over many inputs on a thread pool (at most max_concurrency at once)."""
+        inputs = list(inputs)
+        if len(inputs) <= 1:
+            return [self.invoke(item) for item in inputs]
+        workers = max_concurrency or min(32, len(inputs))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # pool.map keeps the results in the same order as the inputs
+            return list(pool.map(self.invoke, inputs))
+
+    async def ainvoke(self, data):
+        # Sync components run in the default executor so they never block the event loop
+        return await asyncio.to_thread(self.invoke, data)
+
+    async def abatch(self, inputs, max_concurrency=None):
+        semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+        async def run_one(item):
+            if semaphore is None:
+                return await self.ainvoke(item)
+            async with semaphore:
+                return await self.ainvoke(item)
+
+        return await asyncio.gather(*(run_one(item) for item in inputs))
+
+    def stream(self, data):
+        # Default: a component that can't stream yields its whole result as one chunk
+        yield self.invoke(data)
+
+    def transform(self, chunks):
+        """Consumes an iterator of upstream chunks and yields output chunks.
+
+        The default waits for the whole upstream value (chunks are joined with +) and then streams it.
+        Components that can work on partial input override this to yield as soon as they can.
+        """
+        yield from self.stream(join_chunks(chunks))
+
+    def transforms_chunks(self):
+        """True if transform works on partial input (it is overridden), False if it waits for the whole value."""
+        return type(self).transform is not CRunnable.transform
 
     def __or__(self, other):
         # This allows: component1 | component2
@@ -21,18 +67,59 @@ class CRunnable(ABC):
 
 # 2. The Sequence Class (The "Glue")
 class CRunnableSequence(CRunnable):
-    def __init__(self, first, second):
+    def __init__(self, *steps):
         super().__init__()
-        self.first = first
-        self.second = second
+        # Flatten nested sequences: (a | b) | c becomes one list [a, b, c]
+        # instead of Sequence(Sequence(a, b), c), so invoke is a plain loop, not recursion.
+        self.steps = []
+        for step in steps:
+            if isinstance(step, CRunnableSequence):
+                self.steps.extend(step.steps)
+            else:
+                self.steps.append(step)
 
     def process(self, data):
+        # Step-by-step handoff
+        for step in self.steps:
+            data = step.invoke(data)
         return data
 
-    def invoke(self, data):
-        # Step-by-step handoff
-        first_result = self.first.invoke(data)
-        return self.second.invoke(first_result)
+    def batch(self, inputs, max_concurrency=None):
+        # Stage by stage: every step sees the whole batch, so a step with a native batch (e.g. a model) can use it
+        results = list(inputs)
+        for step in self.steps:
+            results = step.batch(results, max_concurrency=max_concurrency)
+        return results
+
+    async def ainvoke(self, data):
+        for step in self.steps:
+            data = await step.ainvoke(data)
+        return data
+
+    def stream(self, data):
+        yield from self._pipe(data, None)
+
+    def transform(self, chunks):
+        yield from self._pipe(None, chunks)
+
+    def _pipe(self, data, chunks):
+        # Generators are only chained for steps that work on partial input (overridden transform):
+        # each one pulls chunks from the one before it lazily, so the first chunk reaches the caller
+        # as soon as every step can produce one. A step that would wait for the whole value anyway
+        # is run with a plain invoke, as in process(), so a long chain of them does not nest one
+        # generator per step (and hit the recursion limit).
+        steps = self.steps
+        for i, step in enumerate(steps):
+            if chunks is not None:
+                if step.transforms_chunks():
+                    chunks = step.transform(chunks)
+                    continue
+                data, chunks = join_chunks(chunks), None
+            if i == len(steps) - 1 or steps[i + 1].transforms_chunks():
+                chunks = step.stream(data)
+            else:
+                data = step.invoke(data)
+        yield from chunks
 
 # --- Implementation Examples with Logging ---
 
@@ -42,30 +129,82 @@ class SimplePrompt(CRunnable):
         return f"Who is {data}"
 
 class SimpleModel(CRunnable):
+    response = "AI Response: He is a cricketer"
+
     def process(self, data):
         print(f"[STEP 2: MODEL] Receiving prompt: '{data}'")
         # Simulating an AI response
-        return "AI Response: He is a cricketer"
+        return self.response
+
+    def stream(self, data):
+        print(f"[STEP 2: MODEL] Receiving prompt: '{data}'")
+        # Simulating an AI response that is generated one token at a time (the delay is streaming-only)
+        for token in re.findall(r"\S+\s*", self.response):
+            time.sleep(0.05)
+            yield token
 
 class SimpleParser(CRunnable):
+    prefix = "AI Response: "
+
     def process(self, data):
         print(f"[STEP 3: PARSER] Cleaning up the model output...")
         # Simulating extracting just the text (removing the 'AI Response:' prefix)
-        return data.replace("AI Response: ", "")
+        return data.replace(self.prefix, "")
+
+    def transform(self, chunks):
+        print(f"[STEP 3: PARSER] Cleaning up the model output as it streams...")
+        chunks = iter(chunks)
+        # Hold chunks back only until we know whether the output starts with the prefix
+        buffer = ""
+        for chunk in chunks:
+            buffer += chunk
+            if len(buffer) >= len(self.prefix) or not self.prefix.startswith(buffer):
+                break
+        if buffer.startswith(self.prefix):
+            buffer = buffer[len(self.prefix):]
+        if buffer:
+            yield buffer
+        # Everything after the prefix passes straight through
+        yield from chunks
 
 # --- Running the Chain ---
 
-# Initialize components
-prompt = SimplePrompt()
-model = SimpleModel()
-parser = SimpleParser()
-
-# Create the chain using the pipe operator
-# Logic: (SimplePrompt | SimpleModel) -> creates a sequence, then | SimpleParser -> wraps it again
-chain = prompt | model | parser
-
-print("--- Starting Chain Execution ---")
-result = chain.invoke("Virat Kohli")
-print("--- Chain Execution Finished ---")
-
-print(f"\nFINAL OUTPUT: {result}")
\ No newline at end of file
+if __name__ == "__main__":
+    # Initialize components
+    prompt = SimplePrompt()
+    model = SimpleModel()
+    parser = SimpleParser()
+
+    # Create the chain using the pipe operator
+    # Logic: SimplePrompt | SimpleModel | SimpleParser -> one flat sequence of 3 steps
+    chain = prompt | model | parser
+
+    print("--- Starting Chain Execution ---")
+    result = chain.invoke("Virat Kohli")
+    print("--- Chain Execution Finished ---")
+
+    print(f"\nFINAL OUTPUT: {result}")
+
+    print("\n--- Batch Execution ---")
+    print(chain.batch(["Virat Kohli", "MS Dhoni"], max_concurrency=2))
+
+    print("\n--- Async Batch Execution ---")
+    print(asyncio.run(chain.abatch(["Rohit Sharma", "Jasprit Bumrah"], max_concurrency=2)))
+
+    print("\n--- Streaming Execution ---")
+    start = time.perf_counter()
+    for i, chunk in enumerate(chain.stream("Virat Kohli")):
+        if i == 0:
+            print(f"(time to first chunk: {time.perf_counter() - start:.3f}s)")
+        print(f"CHUNK: {chunk!r}")
+    print(f"(total stream time: {time.perf_counter() - start:.3f}s)")
+
+    print("\n--- Streaming a Deep Chain ---")
+    # Steps that don't stream are invoked in a loop, so depth is not limited by the recursion limit
+    class AddOne(CRunnable):
+        def process(self, data):
+            return data + 1
+
+    deep = CRunnableSequence(*(AddOne() for _ in range(5000)))
+    assert list(deep.stream(0)) == [5000] and deep.invoke(0) == 5000
+    print(f"5000-step chain streamed: {list(deep.stream(0))}")
@@ -0,0 +1,219 @@
+import argparse
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+from langchain_core.tools import StructuredTool
+
+from ttl_cache import TTLCache
+
+# One web-search client per process, shared by every agent's search tool.
+#   - results are cached (LRU + TTL) under the normalized query, so "NVIDIA stock news" and
+#     "nvidia  stock news " are one entry
+#   - a query already being searched is not sent again: later callers wait for the first one
+#   - backend calls pass through a token-bucket throttle; when DuckDuckGo answers with a rate-limit
+#     error the throttle cools down (exponentially) and the query is retried once
+# SEARCH_BACKEND=fake swaps DuckDuckGo for FakeSearchBackend, to run agent loops offline.
+
+SEARCH_TOOL_DESCRIPTION = (
+    "A wrapper around DuckDuckGo Search. Useful for when you need to answer questions about current events. "
+    "Input should be a search query."
+)
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip(" \t\n?!.").lower()
+
+
+class DuckDuckGoBackend:
+    def __init__(self, max_results: int = 5):
+        from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+
+        self.wrapper = DuckDuckGoSearchAPIWrapper(max_results=max_results)
+        self.calls = 0
+
+    def search(self, query: str) -> str:
+        self.calls += 1
+        return self.wrapper.run(query)
+
+
+class FakeSearchBackend:
+    """Deterministic canned snippets after a fixed delay; no network."""
+
+    def __init__(self, latency: float = 0.5, results: Optional[Dict[str, str]] = None):
+        self.latency = latency
+        self.results = results or {}
+        self.calls = 0
+
+    def search(self, query: str) -> str:
+        self.calls += 1
+        time.sleep(self.latency)
+        if query in self.results:
+            return self.results[query]
+        digest = hashlib.sha256(query.encode("utf-8")).hexdigest()[:8]
+        return f"[fake result {digest}] Recent coverage of '{query}': analysts note steady growth and strong demand."
+
+
+class Throttle:
+    """Token bucket (`rate` per second, bursts of `burst`) with a cool-down after rate-limit errors."""
+
+    def __init__(self, rate: float = 1.0, burst: int = 3, max_cooldown: float = 30.0):
+        self.rate = rate
+        self.burst = burst
+        self.max_cooldown = max_cooldown
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._cooldown = 1.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Blocks until a call is allowed; returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def penalize(self) -> None:
+        with self._lock:
+            self._blocked_until = time.monotonic() + self._cooldown
+            self._cooldown = min(self.max_cooldown, self._cooldown * 2)
+
+    def reward(self) -> None:
+        with self._lock:
+            self._cooldown = 1.0
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    text = f"{type(error).__name__} {error}".lower()
+    return "ratelimit" in text or "rate limit" in text or "too many requests" in text
+
+
+class SearchClient:
+    def __init__(self, backend, cache_ttl: float = 900.0, cache_size: int = 2048,
+                 rate: float = 1.0, burst: int = 3):
+        self.backend = backend
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.throttle = Throttle(rate=rate, burst=burst)
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.deduplicated = 0
+        self.rate_limited = 0
+        self.throttled_s = 0.0
+
+    def _call_backend(self, query: str) -> str:
+        for attempt in range(2):
+            self.throttled_s += self.throttle.acquire()
+            try:
+                result = self.backend.search(query)
+                self.throttle.reward()
+                return result
+            except Exception as e:
+                if attempt or not _is_rate_limit(e):
+                    raise
+                self.rate_limited += 1
+                self.throttle.penalize()
+
+    def search(self, query: str) -> str:
+        key = normalize_query(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+        if not leader:
+            self.deduplicated += 1
+            return future.result()
+
+        try:
+            result = self._call_backend(query)
+            self.cache.set(key, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    async def asearch(self, query: str) -> str:
+        # Cache hits never leave the event loop; misses (and their dedup/throttle waits) run in a thread
+        cached = self.cache.get(normalize_query(query))
+        if cached is not None:
+            return cached
+        return await asyncio.to_thread(self.search, query)
+
+    def stats(self) -> dict:
+        return {
+            "cache": self.cache.stats(),
+            "backend_calls": self.backend.calls,
+            "deduplicated": self.deduplicated,
+            "rate_limited": self.rate_limited,
+            "throttled_s": self.throttled_s,
+        }
+
+
+_client: Optional[SearchClient] = None
+_client_lock = threading.Lock()
+
+
+def get_search_client() -> SearchClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            if os.getenv("SEARCH_BACKEND", "duckduckgo") == "fake":
+                backend = FakeSearchBackend()
+            else:
+                backend = DuckDuckGoBackend()
+            _client = SearchClient(backend)
+        return _client
+
+
+def _search(query: str) -> str:
+    return get_search_client().search(query)
+
+
+async def _asearch(query: str) -> str:
+    return await get_search_client().asearch(query)
+
+
+# Same name and description as DuckDuckGoSearchRun, so prompts and tool-call policies are unchanged
+search_tool = StructuredTool.from_function(
+    func=_search, coroutine=_asearch, name="duckduckgo_search", description=SEARCH_TOOL_DESCRIPTION
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline search load: repeated and concurrent agent queries")
+    parser.add_argument("--queries", type=int, default=60)
+    parser.add_argument("--distinct", type=int, default=6)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    client = SearchClient(FakeSearchBackend(latency=args.latency), rate=5.0, burst=5)
+    topics = [f"NVIDIA chip news {i}" for i in range(args.distinct)]
+    # Mixed casing / spacing, as different agents phrase the same query
+    queries = [topics[i % args.distinct].upper() if i % 2 else f"  {topics[i % args.distinct]}? " for i in range(args.queries)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(client.search, queries))
+    print(f"{args.queries} searches in {time.perf_counter() - start:.2f}s: {client.stats()}")
@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import faiss
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from perf_stats import percentile
+
+# Semantic answer cache for a RAG chain.
+# Each answered question is embedded (with the same embeddings the retriever uses, so with
+# CachedEmbeddings the vector is computed once and shared) and added to an inner-product FAISS
+# index over unit vectors, i.e. cosine similarity. A new question whose nearest past question
+# scores >= `threshold` gets that question's answer back without retrieval, prompting or generation.
+# All entries are dropped as soon as the vector store's fingerprint changes, and an answer computed
+# against the old store is not stored once it has changed.
+
+
+def vectorstore_fingerprint(vectorstore) -> str:
+    """Cheap change marker for a vector store: its type and document count."""
+    index = getattr(vectorstore, "index", None)
+    if index is not None:
+        return f"faiss:{index.ntotal}"
+    collection = getattr(vectorstore, "_collection", None)
+    if collection is not None:
+        return f"chroma:{collection.name}:{collection.count()}"
+    return type(vectorstore).__name__
+
+
+class SemanticCache:
+    """question -> answer, looked up by embedding similarity rather than exact text."""
+
+    def __init__(self, embeddings: Embeddings, threshold: float = 0.9, max_entries: int = 10_000,
+                 fingerprint: Optional[Callable[[], str]] = None):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.fingerprint = fingerprint
+        self._current_fingerprint = fingerprint() if fingerprint else None
+        self._index: Optional[faiss.IndexIDMap2] = None
+        # faiss id -> (question, answer, seconds it took to produce the answer), oldest first
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+        # best-match similarity of recent lookups, to help tune `threshold`
+        self.similarities = deque(maxlen=10_000)
+
+    def _vector(self, question: str) -> np.ndarray:
+        vector = np.asarray([self.embeddings.embed_query(question)], dtype="float32")
+        faiss.normalize_L2(vector)
+        return vector
+
+    def _check_fingerprint(self) -> None:
+        if self.fingerprint is None:
+            return
+        current = self.fingerprint()
+        if current != self._current_fingerprint:
+            self.invalidate()
+            self._current_fingerprint = current
+
+    def invalidate(self) -> None:
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._index = None
+            self._entries.clear()
+
+    def lookup(self, question: str, vector: Optional[np.ndarray] = None) -> Optional[str]:
+        return self._lookup(question, vector)[0]
+
+    def _lookup(self, question: str, vector: Optional[np.ndarray] = None) -> Tuple[Optional[str], Optional[str]]:
+        """(cached answer or None, fingerprint of the store it was looked up against)."""
+        self._check_fingerprint()
+        seen = self._current_fingerprint
+        vector = self._vector(question) if vector is None else vector
+        with self._lock:
+            if self._index is None or not self._entries:
+                self.misses += 1
+                return None, seen
+            scores, ids = self._index.search(vector, 1)
+            similarity, entry_id = float(scores[0][0]), int(ids[0][0])
+            self.similarities.append(similarity)
+            if entry_id < 0 or similarity < self.threshold:
+                self.misses += 1
+                return None, seen
+            self.hits += 1
+            _, answer, seconds = self._entries[entry_id]
+            self.saved_seconds += seconds
+            return answer, seen
+
+    def store(self, question: str, answer: str, seconds: float = 0.0, vector: Optional[np.ndarray] = None,
+              fingerprint: Optional[str] = None) -> None:
+        """`fingerprint`: the store's fingerprint when the answer was computed; if it has changed since, the
+        answer may be stale and is not stored."""
+        if self.fingerprint is not None and fingerprint is not None:
+            self._check_fingerprint()
+            if self._current_fingerprint != fingerprint:
+                return
+        vector = self._vector(question) if vector is None else vector
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, np.asarray([entry_id], dtype="int64"))
+            self._entries[entry_id] = (question, answer, seconds)
+            if len(self._entries) > self.max_entries:
+                oldest, _ = self._entries.popitem(last=False)
+                self._index.remove_ids(np.asarray([oldest], dtype="int64"))
+
+    def wrap(self, chain: Runnable) -> Runnable:
+        """The chain behind the cache: question in, answer out, same invoke/ainvoke interface."""
+
+        def answer(question: str) -> str:
+            vector = self._vector(question)
+            cached, seen = self._lookup(question, vector)
+            if cached is not None:
+                return cached
+            start = time.perf_counter()
+            result = chain.invoke(question)
+            self.store(question, result, time.perf_counter() - start, vector, fingerprint=seen)
+            return result
+
+        async def aanswer(question: str) -> str:
+            # Embedding the question and reading the store's fingerprint both block: keep them off the loop
+            vector = await asyncio.to_thread(self._vector, question)
+            cached, seen = await asyncio.to_thread(self._lookup, question, vector)
+            if cached is not None:
+                return cached
+            start = time.perf_counter()
+            result = await chain.ainvoke(question)
+            await asyncio.to_thread(self.store, question, result, time.perf_counter() - start, vector, seen)
+            return result
+
+        return RunnableLambda(answer, afunc=aanswer)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+            "saved_s": self.saved_seconds,
+            "similarity_p50": percentile(self.similarities, 50),
+            "similarity_p90": percentile(self.similarities, 90),
+        }
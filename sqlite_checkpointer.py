@@ -0,0 +1,550 @@
+import asyncio
+import random
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+# A disk-backed replacement for MemorySaver.
+#
+# MemorySaver keeps every checkpoint of every thread_id in process memory forever and loses them on restart.
+# This saver keeps them in SQLite and bounds what it holds in RAM:
+#   - retention:   only the newest `keep_last` checkpoints per thread are kept; older ones are
+#                  deleted by a background compaction thread (plus an incremental VACUUM)
+#   - durability:  put_writes() commits before it returns (WAL + synchronous=NORMAL keeps that cheap), so
+#                  the writes of finished tasks, interrupts and errors survive a super-step that never
+#                  reaches its next put(): after a restart only the unfinished tasks run again
+#   - hot cache:   the latest checkpoint of the `cache_size` most recently used threads is kept
+#                  in an LRU, so app.get_state(config) for an active thread skips SQLite
+#
+# Delta encoding of the `add_messages` channel:
+#   A full snapshot re-serializes the whole, growing message list at every super-step (O(n^2) bytes over
+#   a conversation). Instead, a checkpoint whose parent is the thread's latest one stores only
+#   {"append": [new messages], "replace": [(index, message), ...]} against the parent, plus the rest of the
+#   checkpoint without the messages. Every `snapshot_every` checkpoints (or whenever the list was reordered
+#   or shrunk) a full snapshot is written, so rebuilding a checkpoint replays at most that many deltas.
+
+Typed = Tuple[str, bytes]  # serde.dumps_typed output
+COMPACT_CHUNK = 32  # threads compacted per lock acquisition, so put/get_tuple never wait for a whole pass
+VACUUM_PAGES = 100  # pages freed per lock acquisition
+
+
+class Row(NamedTuple):
+    checkpoint_id: str
+    parent_id: Optional[str]
+    checkpoint: Typed
+    metadata: Typed
+    delta: Optional[Typed] = None  # None -> this row is a full snapshot
+    snapshot_id: Optional[str] = None  # full snapshot the delta chain starts from
+    depth: int = 0  # number of deltas since that snapshot
+
+
+@dataclass
+class _HotEntry:
+    row: Row
+    writes: List[tuple]
+    messages: Optional[list]  # materialized delta channel of row, used to diff the next checkpoint
+
+
+def message_delta(parent: list, new: list) -> Optional[Dict[str, list]]:
+    """Appended and replaced messages of `new` relative to `parent`, or None if it isn't an extension of it."""
+    if len(new) < len(parent):
+        return None
+    replace = []
+    for i, (old, cur) in enumerate(zip(parent, new)):
+        if getattr(cur, "id", None) != getattr(old, "id", None):
+            return None
+        if cur != old:
+            replace.append((i, cur))
+    return {"append": new[len(parent):], "replace": replace}
+
+
+def apply_delta(messages: list, delta: Dict[str, list]) -> list:
+    messages = list(messages)
+    for i, message in delta["replace"]:
+        messages[i] = message
+    messages.extend(delta["append"])
+    return messages
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver[str]):
+    def __init__(self, db_path: str = "checkpoints.sqlite", keep_last: int = 20, cache_size: int = 1024,
+                 compact_interval: float = 30.0, snapshot_every: int = 20, delta_channel: str = "messages",
+                 *, serde=None):
+        super().__init__(serde=serde)
+        self.keep_last = max(1, keep_last)
+        self.cache_size = cache_size
+        self.compact_interval = compact_interval
+        # snapshot_every=1 disables delta encoding (every checkpoint is a full snapshot)
+        self.snapshot_every = max(1, snapshot_every)
+        self.delta_channel = delta_channel
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                type TEXT,
+                checkpoint BLOB,
+                metadata_type TEXT,
+                metadata BLOB,
+                delta_type TEXT,
+                delta BLOB,
+                snapshot_id TEXT,
+                depth INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                type TEXT,
+                value BLOB,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+        """)
+        self._db.commit()
+        self._hot: "OrderedDict[Tuple[str, str], _HotEntry]" = OrderedDict()
+        self._dirty: Set[Tuple[str, str]] = set()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.bytes_written = 0
+        # Bytes of this thread's latest put/put_writes: bytes_written is shared by every thread
+        self._call_bytes = threading.local()
+        self._stop = threading.Event()
+        self._compactor = None
+        if compact_interval:
+            self._compactor = threading.Thread(target=self._compact_loop, name="checkpoint-compactor", daemon=True)
+            self._compactor.start()
+
+    # --- versions (same scheme as MemorySaver: zero-padded counter + random tie-breaker) ---
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # --- writes ---
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+        key = (thread_id, checkpoint_ns)
+        channel_values = checkpoint.get("channel_values", {})
+        messages = channel_values.get(self.delta_channel)
+        metadata_typed = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._lock:
+            parent = self._hot.get(key)
+            delta = None
+            if (messages is not None and parent is not None and parent.messages is not None
+                    and parent.row.checkpoint_id == parent_id and parent.row.depth + 1 < self.snapshot_every):
+                delta = message_delta(parent.messages, messages)
+            if delta is not None:
+                without_messages = {k: v for k, v in channel_values.items() if k != self.delta_channel}
+                row = Row(
+                    checkpoint["id"], parent_id,
+                    self.serde.dumps_typed({**checkpoint, "channel_values": without_messages}),
+                    metadata_typed,
+                    delta=self.serde.dumps_typed(delta),
+                    snapshot_id=parent.row.snapshot_id,
+                    depth=parent.row.depth + 1,
+                )
+            else:
+                row = Row(checkpoint["id"], parent_id, self.serde.dumps_typed(checkpoint), metadata_typed,
+                          snapshot_id=checkpoint["id"])
+            self._insert_checkpoint(thread_id, checkpoint_ns, row)
+            self._db.commit()
+            self._cache_put(key, _HotEntry(row, [], list(messages) if messages is not None else None))
+            self._dirty.add(key)
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def _insert_checkpoint(self, thread_id: str, checkpoint_ns: str, row: Row) -> None:
+        delta_type, delta_bytes = row.delta or (None, None)
+        self._db.execute(
+            "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (thread_id, checkpoint_ns, row.checkpoint_id, row.parent_id, *row.checkpoint, *row.metadata,
+             delta_type, delta_bytes, row.snapshot_id, row.depth),
+        )
+        written = len(row.checkpoint[1]) + len(row.metadata[1]) + len(delta_bytes or b"")
+        self.bytes_written += written
+        self._call_bytes.value = written
+
+    @property
+    def last_write_bytes(self) -> int:
+        """Bytes stored by the calling thread's latest put / put_writes."""
+        return getattr(self._call_bytes, "value", 0)
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special channels (errors, interrupts...) overwrite; normal writes are first-write-wins
+        replace = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            value_type, value_bytes = self.serde.dumps_typed(value)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                         channel, value_type, value_bytes, task_path))
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        with self._lock:
+            self._db.executemany(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+            written = sum(len(r[7]) for r in rows)
+            self.bytes_written += written
+            self._call_bytes.value = written
+            hot = self._hot.get((thread_id, checkpoint_ns))
+            if hot is not None and hot.row.checkpoint_id == checkpoint_id:
+                hot.writes = self._merge_writes(hot.writes, rows, replace)
+
+    @staticmethod
+    def _merge_writes(existing: List[tuple], rows: List[tuple], replace: bool) -> List[tuple]:
+        merged = {(r[3], r[4]): r for r in existing}
+        for r in rows:
+            if replace or (r[3], r[4]) not in merged:
+                merged[(r[3], r[4])] = r
+        return list(merged.values())
+
+    # --- reads ---
+
+    def _cache_put(self, key: Tuple[str, str], entry: _HotEntry) -> None:
+        self._hot[key] = entry
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.cache_size:
+            self._hot.popitem(last=False)
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        key = (thread_id, checkpoint_ns)
+        with self._lock:
+            hot = self._hot.get(key)
+            if hot is not None and checkpoint_id in (None, hot.row.checkpoint_id):
+                self._hot.move_to_end(key)
+                self.cache_hits += 1
+                row, writes, messages = hot.row, list(hot.writes), hot.messages
+            else:
+                self.cache_misses += 1
+                row = self._select_checkpoint(thread_id, checkpoint_ns, checkpoint_id)
+                if row is None:
+                    return None
+                writes = self._select_writes(thread_id, checkpoint_ns, row.checkpoint_id)
+                messages = self._materialize(thread_id, checkpoint_ns, row)
+                result = self._to_tuple(thread_id, checkpoint_ns, row, writes, messages)
+                if checkpoint_id is None:
+                    # Keep the materialized list so the next put() can be stored as a delta
+                    current = result.checkpoint["channel_values"].get(self.delta_channel)
+                    self._cache_put(key, _HotEntry(row, writes, list(current) if current is not None else None))
+                return result
+        return self._to_tuple(thread_id, checkpoint_ns, row, writes, messages)
+
+    _ROW_COLUMNS = ("checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata, "
+                    "delta_type, delta, snapshot_id, depth")
+
+    @staticmethod
+    def _to_row(found: tuple) -> Row:
+        return Row(found[0], found[1], (found[2], found[3]), (found[4], found[5]),
+                   (found[6], found[7]) if found[6] is not None else None, found[8], found[9])
+
+    def _select_checkpoint(self, thread_id: str, checkpoint_ns: str, checkpoint_id: Optional[str]) -> Optional[Row]:
+        if checkpoint_id:
+            cursor = self._db.execute(
+                f"SELECT {self._ROW_COLUMNS} FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            )
+        else:
+            cursor = self._db.execute(
+                f"SELECT {self._ROW_COLUMNS} FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id, checkpoint_ns),
+            )
+        found = cursor.fetchone()
+        return self._to_row(found) if found is not None else None
+
+    def _materialize(self, thread_id: str, checkpoint_ns: str, row: Row) -> Optional[list]:
+        """Rebuilds the delta channel of `row`: walk back to its snapshot, then replay the deltas forward."""
+        if row.delta is None:
+            return None
+        deltas = []
+        while row.delta is not None:
+            deltas.append(row.delta)
+            row = self._select_checkpoint(thread_id, checkpoint_ns, row.parent_id)
+            if row is None:
+                raise ValueError(f"Delta chain of thread {thread_id} is broken (missing parent checkpoint)")
+        messages = self.serde.loads_typed(row.checkpoint)["channel_values"].get(self.delta_channel, [])
+        for delta in reversed(deltas):
+            messages = apply_delta(messages, self.serde.loads_typed(delta))
+        return messages
+
+    def _select_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List[tuple]:
+        return self._db.execute(
+            "SELECT * FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+
+    def _to_tuple(self, thread_id: str, checkpoint_ns: str, row: Row, writes: List[tuple],
+                  messages: Optional[list]) -> CheckpointTuple:
+        # The checkpoint dict is deserialized fresh (the graph mutates the checkpoint it gets back), but
+        # the message objects of a delta row are the hot cache's own, shared with the caller: copying
+        # them would cost as much as deserializing. That is safe because add_messages replaces messages
+        # rather than editing them in place, and message_delta compares by value, not identity.
+        checkpoint = self.serde.loads_typed(row.checkpoint)
+        if row.delta is not None:
+            checkpoint["channel_values"][self.delta_channel] = list(messages)
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": row.checkpoint_id,
+            }},
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed(row.metadata),
+            parent_config={"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": row.parent_id,
+            }} if row.parent_id else None,
+            pending_writes=[(w[3], w[5], self.serde.loads_typed((w[6], w[7]))) for w in writes],
+        )
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if "checkpoint_ns" in config["configurable"]:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(get_checkpoint_id(config))
+        if before is not None:
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT thread_id, checkpoint_ns, {self._ROW_COLUMNS} FROM checkpoints {where} "
+                "ORDER BY checkpoint_id DESC",
+                params,
+            ).fetchall()
+        yielded = 0
+        for thread_id, checkpoint_ns, *found in rows:
+            if limit is not None and yielded >= limit:
+                break
+            row = self._to_row(tuple(found))
+            if filter:
+                metadata = self.serde.loads_typed(row.metadata)
+                if not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+            with self._lock:
+                writes = self._select_writes(thread_id, checkpoint_ns, row.checkpoint_id)
+                messages = self._materialize(thread_id, checkpoint_ns, row)
+            yield self._to_tuple(thread_id, checkpoint_ns, row, writes, messages)
+            yielded += 1
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            self._db.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+            self._db.commit()
+            for key in [k for k in self._hot if k[0] == thread_id]:
+                del self._hot[key]
+
+    # --- retention / compaction ---
+
+    def compact(self) -> int:
+        """Deletes all but the newest `keep_last` checkpoints of every thread written to since the last run.
+
+        Deltas need their chain back to a snapshot, so the cut-off is the oldest snapshot any kept
+        checkpoint depends on (at most `snapshot_every` extra rows per thread).
+        """
+        with self._lock:
+            dirty, self._dirty = list(self._dirty), set()
+        deleted = 0
+        for start in range(0, len(dirty), COMPACT_CHUNK):
+            with self._lock:
+                for thread_id, checkpoint_ns in dirty[start:start + COMPACT_CHUNK]:
+                    deleted += self._compact_thread(thread_id, checkpoint_ns)
+                self._db.commit()
+        if deleted:
+            # Hand the freed pages back to the OS a little at a time
+            for _ in range(1000 // VACUUM_PAGES):
+                with self._lock:
+                    self._db.execute(f"PRAGMA incremental_vacuum({VACUUM_PAGES})")
+        return deleted
+
+    def _compact_thread(self, thread_id: str, checkpoint_ns: str) -> int:
+        kept = self._db.execute(
+            "SELECT checkpoint_id, snapshot_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT ?",
+            (thread_id, checkpoint_ns, self.keep_last),
+        ).fetchall()
+        if len(kept) < self.keep_last:
+            return 0
+        cutoff = min(min(checkpoint_id, snapshot_id or checkpoint_id) for checkpoint_id, snapshot_id in kept)
+        self._db.execute(
+            "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+            (thread_id, checkpoint_ns, cutoff),
+        )
+        return self._db.execute(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+            (thread_id, checkpoint_ns, cutoff),
+        ).rowcount
+
+    def _compact_loop(self) -> None:
+        while not self._stop.wait(self.compact_interval):
+            self.compact()
+
+    def close(self) -> None:
+        self._stop.set()
+        self.compact()
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.cache_hits + self.cache_misses
+        return {
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_rate": self.cache_hits / total if total else 0.0,
+            "hot_threads": len(self._hot),
+            "bytes_written": self.bytes_written,
+        }
+
+    # --- async API: same logic, run off the event loop ---
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+_checkpointers: Dict[str, SQLiteCheckpointer] = {}
+_checkpointers_lock = threading.Lock()
+
+
+def get_checkpointer(db_path: str = "checkpoints.sqlite", keep_last: int = 20) -> SQLiteCheckpointer:
+    """One saver (one connection, one compaction thread) per database file, shared by every graph."""
+    with _checkpointers_lock:
+        checkpointer = _checkpointers.get(db_path)
+        if checkpointer is None:
+            checkpointer = _checkpointers[db_path] = SQLiteCheckpointer(db_path, keep_last=keep_last)
+        return checkpointer
+
+
+# --- BENCHMARK: bytes written and get_state latency, delta vs full snapshots ---
+
+def _benchmark_thread(turns: int, snapshot_every: int, db_path: str) -> dict:
+    import time
+    from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+    from langgraph.graph import END, StateGraph
+    from langgraph.graph.message import add_messages
+    from typing import Annotated, TypedDict
+
+    class ChatState(TypedDict):
+        messages: Annotated[List[BaseMessage], add_messages]
+
+    def reply(state: ChatState):
+        return {"messages": [AIMessage(content=f"Reply to: {state['messages'][-1].content} " + "lorem " * 40)]}
+
+    graph = StateGraph(ChatState)
+    graph.add_node("reply", reply)
+    graph.set_entry_point("reply")
+    graph.add_edge("reply", END)
+    checkpointer = SQLiteCheckpointer(db_path, keep_last=10 ** 9, compact_interval=0, snapshot_every=snapshot_every)
+    app = graph.compile(checkpointer=checkpointer)
+
+    config = {"configurable": {"thread_id": "bench"}}
+    start = time.perf_counter()
+    for turn in range(turns):
+        app.invoke({"messages": [HumanMessage(content=f"Question number {turn}")]}, config)
+    run_seconds = time.perf_counter() - start
+
+    def time_get_state() -> float:
+        samples = []
+        for _ in range(50):
+            start = time.perf_counter()
+            app.get_state(config)
+            samples.append(time.perf_counter() - start)
+        return sorted(samples)[len(samples) // 2] * 1000
+
+    hot_ms = time_get_state()
+    cold_reads = []
+    for _ in range(20):
+        checkpointer._hot.clear()
+        start = time.perf_counter()
+        app.get_state(config)
+        cold_reads.append(time.perf_counter() - start)
+    return {
+        "bytes_written": checkpointer.bytes_written,
+        "run_s": run_seconds,
+        "get_state_hot_ms": hot_ms,
+        "get_state_cold_ms": sorted(cold_reads)[len(cold_reads) // 2] * 1000,
+    }
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    print(f"{'turns':>6} {'mode':<6}{'MB written':>12}{'run s':>9}{'get_state hot ms':>18}{'cold ms':>10}")
+    for turns in (10, 100, 1000):
+        for mode, snapshot_every in (("full", 1), ("delta", 20)):
+            with tempfile.TemporaryDirectory() as tmp:
+                row = _benchmark_thread(turns, snapshot_every, os.path.join(tmp, "bench.sqlite"))
+            print(f"{turns:>6} {mode:<6}{row['bytes_written'] / 1e6:>12.2f}{row['run_s']:>9.2f}"
+                  f"{row['get_state_hot_ms']:>18.3f}{row['get_state_cold_ms']:>10.3f}")
@@ -0,0 +1,385 @@
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from perf_stats import latency_summary
+from ttl_cache import TTLCache
+
+# Shared HTTP layer for the tools that call web APIs (weather, AQI, ...).
+#
+#   - one keep-alive connection pool (requests.Session) instead of a new TCP/TLS handshake per call
+#   - aget_json(): the same behaviour on httpx.AsyncClient for async agents
+#   - retries on connection errors, timeouts, 429 and 5xx, with full-jitter exponential backoff,
+#     capped by a retry budget so a failing API is not hammered with retries from every caller
+#   - identical requests already in flight are coalesced: one network call, every caller gets its result
+#   - successful responses are kept in a TTL cache (weather and AQI change slowly); APIs that report
+#     errors in a 200 body (WAQI) pass `cacheable` so those payloads are not cached
+#   - per-endpoint latency histograms, see stats()
+# Base URLs are module constants so the tools can be pointed at a local stub server (see __main__).
+
+WTTR_URL = "https://wttr.in"
+WAQI_URL = "https://api.waqi.info"
+
+# (connect, read) seconds
+DEFAULT_TIMEOUT = (3.05, 10.0)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Upper bounds (ms) of the latency histogram buckets
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+
+class RetryBudget:
+    """Token bucket for retries: each request earns `ratio` of a retry, each retry spends one.
+
+    With ratio=0.2, retries add at most ~20% extra load on an API that is failing everything.
+    `min_per_second` keeps a trickle of retries available for low-traffic tools.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._last) * self.min_per_second)
+        self._last = now
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class EndpointStats:
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+        self.samples = deque(maxlen=10_000)
+        self.counters = defaultdict(int)
+
+    def observe(self, seconds: float) -> None:
+        ms = seconds * 1000
+        self.buckets[next(i for i, bound in enumerate(LATENCY_BUCKETS_MS) if ms <= bound)] += 1
+        self.samples.append(seconds)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            **latency_summary(list(self.samples)),
+            "histogram_ms": {f"<={bound:g}": count for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets) if count},
+        }
+
+
+class RetryableStatus(Exception):
+    def __init__(self, status: int, retry_after: Optional[float]):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class ToolHTTPClient:
+    def __init__(self, timeout: Tuple[float, float] = DEFAULT_TIMEOUT, max_retries: int = 2,
+                 backoff: float = 0.25, max_backoff: float = 4.0, cache_ttl: float = 600.0,
+                 cache_size: int = 1024, pool_size: int = 16, retry_budget: Optional[RetryBudget] = None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_budget = retry_budget or RetryBudget()
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.session = requests.Session()
+        # Retries are done below (with jitter and a budget), not by urllib3
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._async_client = None
+        self._in_flight: Dict[str, Future] = {}
+        self._async_in_flight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+
+    @staticmethod
+    def _key(url: str, params: Optional[dict]) -> str:
+        return f"{url}?{urlencode(sorted(params.items()))}" if params else url
+
+    def _delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        # Full jitter: callers that failed together do not retry together
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        return max(delay, min(retry_after, self.max_backoff)) if retry_after else delay
+
+    def _may_retry(self, attempt: int, endpoint: str) -> bool:
+        if attempt >= self.max_retries or not self.retry_budget.withdraw():
+            return False
+        self._stats[endpoint].counters["retries"] += 1
+        return True
+
+    @staticmethod
+    def _retry_after(headers) -> Optional[float]:
+        try:
+            return float(headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            return None
+
+    # --- sync ---
+
+    def _fetch(self, url: str, params: Optional[dict], endpoint: str) -> Any:
+        stats = self._stats[endpoint]
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                stats.observe(time.perf_counter() - start)
+                if response.status_code in RETRY_STATUSES:
+                    raise RetryableStatus(response.status_code, self._retry_after(response.headers))
+                response.raise_for_status()
+                return response.json()
+            except (requests.ConnectionError, requests.Timeout, RetryableStatus) as e:
+                stats.counters["errors"] += 1
+                if not self._may_retry(attempt, endpoint):
+                    raise
+                time.sleep(self._delay(attempt, getattr(e, "retry_after", None)))
+                attempt += 1
+
+    def get_json(self, url: str, params: Optional[dict] = None, endpoint: Optional[str] = None,
+                 cache_key: Optional[str] = None, ttl: Optional[float] = None,
+                 cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """GET -> parsed JSON, through the cache, coalescing and retry layers.
+
+        `cacheable(data)` returning False keeps a response out of the cache (it is still returned).
+        """
+        endpoint = endpoint or url
+        key = cache_key or self._key(url, params)
+        stats = self._stats[endpoint]
+        stats.counters["calls"] += 1
+        cached = self.cache.get(key)
+        if cached is not None:
+            stats.counters["cache_hits"] += 1
+            return cached
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+        if not leader:
+            stats.counters["coalesced"] += 1
+            return future.result()
+
+        try:
+            data = self._fetch(url, params, endpoint)
+            if cacheable is None or cacheable(data):
+                self.cache.set(key, data, ttl)
+            future.set_result(data)
+            return data
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    # --- async ---
+
+    def _client(self):
+        if self._async_client is None:
+            import httpx
+
+            connect, read = self.timeout
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(read, connect=connect),
+                limits=httpx.Limits(max_keepalive_connections=16, max_connections=64),
+            )
+        return self._async_client
+
+    async def _afetch(self, url: str, params: Optional[dict], endpoint: str) -> Any:
+        import httpx
+
+        stats = self._stats[endpoint]
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = await self._client().get(url, params=params)
+                stats.observe(time.perf_counter() - start)
+                if response.status_code in RETRY_STATUSES:
+                    raise RetryableStatus(response.status_code, self._retry_after(response.headers))
+                response.raise_for_status()
+                return response.json()
+            except (httpx.TransportError, RetryableStatus) as e:
+                stats.counters["errors"] += 1
+                if not self._may_retry(attempt, endpoint):
+                    raise
+                await asyncio.sleep(self._delay(attempt, getattr(e, "retry_after", None)))
+                attempt += 1
+
+    async def aget_json(self, url: str, params: Optional[dict] = None, endpoint: Optional[str] = None,
+                        cache_key: Optional[str] = None, ttl: Optional[float] = None,
+                        cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Async get_json() on a pooled httpx.AsyncClient (use from one event loop)."""
+        endpoint = endpoint or url
+        key = cache_key or self._key(url, params)
+        stats = self._stats[endpoint]
+        stats.counters["calls"] += 1
+        cached = self.cache.get(key)
+        if cached is not None:
+            stats.counters["cache_hits"] += 1
+            return cached
+
+        future = self._async_in_flight.get(key)
+        if future is not None:
+            stats.counters["coalesced"] += 1
+            return await asyncio.shield(future)
+        future = self._async_in_flight[key] = asyncio.get_running_loop().create_future()
+        try:
+            data = await self._afetch(url, params, endpoint)
+            if cacheable is None or cacheable(data):
+                self.cache.set(key, data, ttl)
+            future.set_result(data)
+            return data
+        except BaseException as e:
+            future.set_exception(e)
+            # Followers re-raise it; keep asyncio from warning when there are none
+            future.exception()
+            raise
+        finally:
+            del self._async_in_flight[key]
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {endpoint: stats.report() for endpoint, stats in self._stats.items()}
+
+
+_client: Optional[ToolHTTPClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> ToolHTTPClient:
+    """Process-wide client, so every tool shares one connection pool and cache."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ToolHTTPClient()
+        return _client
+
+
+def city_key(service: str, city: str) -> str:
+    return f"{service}:{city.strip().lower()}"
+
+
+def waqi_ok(data: Any) -> bool:
+    """WAQI reports errors (unknown city, over quota) as HTTP 200 with status != "ok"."""
+    return isinstance(data, dict) and data.get("status") == "ok"
+
+
+# --- LOCAL STUB SERVER + DEMO ---
+
+def stub_server(latency: float = 0.05, failure_rate: float = 0.2) -> ThreadingHTTPServer:
+    """wttr.in / WAQI look-alike on localhost that is slow and sometimes returns 503."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            if self.path.startswith("/feed/nowhere/"):
+                body, status = json.dumps({"status": "error", "data": "Unknown station"}).encode(), 200
+            elif random.random() < failure_rate:
+                body, status = b"{}", 503
+            elif self.path.startswith("/feed/"):
+                body, status = json.dumps({"status": "ok", "data": {"aqi": random.randint(20, 180)}}).encode(), 200
+            else:
+                body, status = json.dumps({"current_condition": [{"temp_C": str(random.randint(5, 40))}]}).encode(), 200
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exercise ToolHTTPClient against a local stub server")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--cities", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server = stub_server(args.latency, args.failure_rate)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    cities = [f"city{i}" for i in range(args.cities)]
+
+    def safe(fn, *fn_args):
+        try:
+            return fn(*fn_args)
+        except Exception:
+            return None
+
+    def weather(city: str) -> Any:
+        return client.get_json(f"{base}/{city}", {"format": "j1"}, endpoint="wttr", cache_key=city_key("wttr", city))
+
+    for label, ttl in (("no cache", 0.0), ("ttl cache", 600.0)):
+        client = ToolHTTPClient(cache_ttl=ttl)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            results = list(pool.map(lambda i: safe(weather, cities[i % len(cities)]), range(args.calls)))
+        elapsed = time.perf_counter() - start
+        print(f"--- {label}: {args.calls} calls in {elapsed:.2f}s, failed {results.count(None)} ---")
+        print(json.dumps(client.stats(), indent=2))
+
+    async def async_demo():
+        client = ToolHTTPClient()
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(client.aget_json(f"{base}/feed/{cities[i % len(cities)]}/", endpoint="waqi", cacheable=waqi_ok)
+              for i in range(args.calls)),
+            return_exceptions=True,
+        )
+        await client.aclose()
+        failed = sum(isinstance(r, Exception) for r in results)
+        print(f"--- async: {args.calls} calls in {time.perf_counter() - start:.2f}s, failed {failed} ---")
+        print(json.dumps(client.stats(), indent=2))
+
+    asyncio.run(async_demo())
+
+    # Self-check: a WAQI error payload is returned but not cached, so the next call asks again
+    client = ToolHTTPClient()
+    for _ in range(2):
+        error = client.get_json(f"{base}/feed/nowhere/", endpoint="waqi", cacheable=waqi_ok)
+    waqi = client.stats()["waqi"]
+    assert error["status"] == "error" and "cache_hits" not in waqi and waqi["count"] == 2, waqi
+    server.shutdown()
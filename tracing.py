@@ -0,0 +1,491 @@
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Union
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from runnable import CRunnable, CRunnableSequence
+
+# Low-overhead tracing for graphs, CustomAgentExecutor and CRunnable chains.
+#
+# Two outputs, with different costs:
+#   - metrics (always on): per-span duration histograms, token and checkpoint-byte counters.
+#     A perf_counter() pair and a dict update per span; exported as OpenMetrics text
+#     (write_openmetrics() or serve_openmetrics()).
+#   - spans (sampled): one Chrome trace event per node / LLM call / tool call / retrieval /
+#     embedding / checkpoint write, with tokens, tool latency and approximate state size.
+#     The sampling decision is made once per top-level run and inherited by everything under it
+#     (through the _sampled contextvar), so a sampled trace is always complete. Work handed to a
+#     shared thread, such as a MicroBatcher flush serving several runs, belongs to no single run
+#     and is sampled on its own. Open write_chrome_trace()'s file in chrome://tracing
+#     or https://ui.perfetto.dev.
+# With sample_rate around 0.01 the per-request cost is a few callback dispatches, far below 1% of
+# a request that makes even one LLM call.
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+class _RunDecision:
+    """Sampling decision published by TracingCallbackHandler for a root run.
+
+    LangGraph's async runs end in another task, where the contextvar cannot be reset; closing
+    the decision instead keeps it from applying to the caller's later runs.
+    """
+
+    __slots__ = ("sampled", "open")
+
+    def __init__(self, sampled: bool):
+        self.sampled = sampled
+        self.open = True
+
+
+# Sampling decision of the run this code is part of (None: not inside a traced run)
+_sampled: contextvars.ContextVar[Union[None, bool, _RunDecision]] = contextvars.ContextVar("trace_sampled", default=None)
+
+
+def _current_sampled() -> Optional[bool]:
+    value = _sampled.get()
+    if isinstance(value, _RunDecision):
+        return value.sampled if value.open else None
+    return value
+
+
+def _approx_size(value: Any) -> int:
+    # repr length: cheap, and good enough to see which node makes the state balloon
+    try:
+        return len(repr(value))
+    except Exception:
+        return 0
+
+
+class Tracer:
+    def __init__(self, sample_rate: float = 1.0, max_spans: int = 100_000):
+        self.sample_rate = sample_rate
+        self._spans = deque(maxlen=max_spans)
+        self._histograms: Dict[tuple, list] = {}
+        self._sums: Dict[tuple, float] = defaultdict(float)
+        self._counters: Dict[tuple, float] = defaultdict(float)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._t0 = time.perf_counter()
+
+    # --- recording ---
+
+    def sample(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def is_sampled(self) -> bool:
+        """Sampling decision of the current run, or a fresh one outside any run."""
+        sampled = _current_sampled()
+        return self.sample() if sampled is None else sampled
+
+    def count(self, metric: str, value: float = 1.0, **labels: str) -> None:
+        key = (metric, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def record(self, name: str, category: str, start: float, end: float, sampled: bool,
+               tid: Optional[int] = None, **args: Any) -> None:
+        seconds = end - start
+        key = (category, name)
+        with self._lock:
+            buckets = self._histograms.get(key)
+            if buckets is None:
+                buckets = self._histograms[key] = [0] * len(DURATION_BUCKETS)
+            buckets[next(i for i, bound in enumerate(DURATION_BUCKETS) if seconds <= bound)] += 1
+            self._sums[key] += seconds
+            if sampled:
+                self._spans.append({
+                    "name": name, "cat": category, "ph": "X", "pid": self._pid,
+                    "tid": tid or threading.get_ident(),
+                    "ts": round((start - self._t0) * 1e6, 1), "dur": round(seconds * 1e6, 1),
+                    "args": args,
+                })
+
+    @contextmanager
+    def span(self, name: str, category: str, root: bool = False, **args: Any):
+        """Times the block. Yields a dict the block may add span arguments to.
+
+        root=True starts a new run: the sampling decision made here applies to every span inside it.
+        """
+        sampled = None if root else _current_sampled()
+        sampled = self.sample() if sampled is None else sampled
+        token = _sampled.set(sampled)
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            end = time.perf_counter()
+            _sampled.reset(token)
+            self.record(name, category, start, end, sampled, **args)
+
+    # --- export ---
+
+    def chrome_trace(self) -> dict:
+        with self._lock:
+            return {"traceEvents": list(self._spans), "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+    def openmetrics(self) -> str:
+        def labels(pairs) -> str:
+            escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                       for k, v in pairs)
+            return "{" + ",".join(escaped) + "}" if pairs else ""
+
+        lines = ["# TYPE agent_span_duration_seconds histogram",
+                 "# HELP agent_span_duration_seconds Duration of traced spans."]
+        with self._lock:
+            histograms = {key: list(buckets) for key, buckets in self._histograms.items()}
+            sums = dict(self._sums)
+            counters = dict(self._counters)
+        for (category, name), buckets in sorted(histograms.items()):
+            base = [("category", category), ("name", name)]
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS, buckets):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"agent_span_duration_seconds_bucket{labels(base + [('le', le)])} {cumulative}")
+            lines.append(f"agent_span_duration_seconds_count{labels(base)} {cumulative}")
+            lines.append(f"agent_span_duration_seconds_sum{labels(base)} {sums[(category, name)]:.6f}")
+
+        by_metric = defaultdict(list)
+        for (metric, pairs), value in counters.items():
+            by_metric[metric].append((pairs, value))
+        for metric, samples in sorted(by_metric.items()):
+            lines.append(f"# TYPE {metric} counter")
+            for pairs, value in sorted(samples):
+                lines.append(f"{metric}_total{labels(list(pairs))} {value:g}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_openmetrics(self, path: str) -> None:
+        with open(path, "w") as f:
+            f.write(self.openmetrics())
+
+    def serve_openmetrics(self, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serves GET /metrics from a daemon thread."""
+        tracer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = tracer.openmetrics().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/openmetrics-text; version=1.0.0; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="openmetrics", daemon=True).start()
+        return server
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """LangChain callbacks -> spans: graph runs, graph nodes, LLM calls, tools and retrievers."""
+
+    # Only dict updates and perf_counter(): safe to call on the event loop. Without this, async runs
+    # send every callback through run_in_executor (a thread hop per event, skewed times, pool tids).
+    run_inline = True
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        # run_id -> [name, category, start, sampled, tid, args]
+        self._runs: Dict[UUID, list] = {}
+        # run_id -> sampling decision, for runs that are not spans themselves (inner chains)
+        self._sampled: Dict[UUID, bool] = {}
+        # root run_id -> the decision it published in _sampled
+        self._published: Dict[UUID, _RunDecision] = {}
+
+    def _decide(self, run_id: UUID, parent_run_id: Optional[UUID]) -> bool:
+        if parent_run_id is None:
+            sampled = _current_sampled()
+            if sampled is None:
+                # A new root run: publish the decision so the checkpoint / embedding spans the run
+                # makes outside these callbacks follow it
+                sampled = self.tracer.sample()
+                decision = self._published[run_id] = _RunDecision(sampled)
+                _sampled.set(decision)
+        else:
+            sampled = self._sampled.get(parent_run_id, False)
+        self._sampled[run_id] = sampled
+        return sampled
+
+    def _start(self, run_id, parent_run_id, name: str, category: str, **args) -> None:
+        sampled = self._decide(run_id, parent_run_id)
+        self._runs[run_id] = [name, category, time.perf_counter(), sampled, threading.get_ident(), args]
+
+    def _end(self, run_id, **args) -> None:
+        self._sampled.pop(run_id, None)
+        decision = self._published.pop(run_id, None)
+        if decision is not None:
+            decision.open = False
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        name, category, start, sampled, tid, start_args = run
+        self.tracer.record(name, category, start, time.perf_counter(), sampled, tid, **start_args, **args)
+
+    # chains: only the top-level run and LangGraph nodes become spans
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "chain")
+        node = (metadata or {}).get("langgraph_node")
+        if parent_run_id is None:
+            self._start(run_id, parent_run_id, name, "graph")
+        elif node is not None and name == node:
+            self._start(run_id, parent_run_id, name, "node")
+        else:
+            self._decide(run_id, parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        run = self._runs.get(run_id)
+        if run is not None and run[3]:
+            self._end(run_id, state_bytes=_approx_size(outputs))
+        else:
+            self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=type(error).__name__)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        params = kwargs.get("invocation_params") or {}
+        name = params.get("model") or params.get("model_name") or kwargs.get("name") or "chat_model"
+        self._start(run_id, parent_run_id, name, "llm")
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, kwargs.get("name") or "llm", "llm")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        run = self._runs.get(run_id)
+        usage = {}
+        try:
+            message = response.generations[0][0].message
+            usage = getattr(message, "usage_metadata", None) or {}
+        except (AttributeError, IndexError):
+            pass
+        if not usage:
+            token_usage = (response.llm_output or {}).get("token_usage") or {}
+            usage = {"input_tokens": token_usage.get("prompt_tokens", 0),
+                     "output_tokens": token_usage.get("completion_tokens", 0)}
+        model = run[0] if run else "llm"
+        self.tracer.count("agent_llm_tokens", usage.get("input_tokens", 0), model=model, kind="prompt")
+        self.tracer.count("agent_llm_tokens", usage.get("output_tokens", 0), model=model, kind="completion")
+        self._end(run_id, prompt_tokens=usage.get("input_tokens", 0), completion_tokens=usage.get("output_tokens", 0))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=type(error).__name__)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, kwargs.get("name") or (serialized or {}).get("name", "tool"), "tool")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=type(error).__name__)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, kwargs.get("name") or "retriever", "retriever")
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id, documents=len(documents))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=type(error).__name__)
+
+
+# --- wrappers ---
+
+def trace_graph(app, tracer: Tracer):
+    """The compiled graph with tracing callbacks attached to every run (get_state etc. unchanged)."""
+    return app.with_config(callbacks=[TracingCallbackHandler(tracer)])
+
+
+def instrument_checkpointer(checkpointer, tracer: Tracer):
+    """Spans for checkpoint writes, and a counter of the bytes they store (SQLiteCheckpointer)."""
+    for method in ("put", "put_writes"):
+        original = getattr(checkpointer, method)
+
+        @functools.wraps(original)
+        def traced(*args, _original=original, _method=method, **kwargs):
+            with tracer.span(f"checkpoint.{_method}", "checkpoint") as span_args:
+                result = _original(*args, **kwargs)
+            # Per thread, so concurrent writes on other threads are not counted here
+            written = getattr(checkpointer, "last_write_bytes", 0)
+            span_args["bytes"] = written
+            tracer.count("agent_checkpoint_bytes", written, method=_method)
+            return result
+
+        setattr(checkpointer, method, traced)
+    return checkpointer
+
+
+def instrument_embeddings(embeddings, tracer: Tracer):
+    """Spans for embed_documents / embed_query calls (batch size in the span args)."""
+    for method in ("embed_documents", "embed_query"):
+        original = getattr(embeddings, method)
+
+        def traced(texts, _original=original, _method=method):
+            size = len(texts) if isinstance(texts, list) else 1
+            with tracer.span(f"embeddings.{_method}", "embedding", texts=size):
+                return _original(texts)
+
+        # object.__setattr__: Embeddings implementations may be pydantic models
+        object.__setattr__(embeddings, method, traced)
+    return embeddings
+
+
+def trace_executor(executor, tracer: Tracer):
+    """CustomAgentExecutor: a root span per invoke/ainvoke, LLM spans via callbacks, a span per tool call."""
+    executor.agent = executor.agent.with_config(callbacks=[TracingCallbackHandler(tracer)])
+    invoke, ainvoke = executor.invoke, executor.ainvoke
+    run_tool_call, call_tool = executor._run_tool_call, executor._call_tool
+
+    @functools.wraps(invoke)
+    def traced_invoke(user_input, *args, **kwargs):
+        with tracer.span("agent.invoke", "graph", root=True):
+            return invoke(user_input, *args, **kwargs)
+
+    @functools.wraps(ainvoke)
+    async def traced_ainvoke(user_input, *args, **kwargs):
+        with tracer.span("agent.ainvoke", "graph", root=True):
+            return await ainvoke(user_input, *args, **kwargs)
+
+    @functools.wraps(run_tool_call)
+    async def traced_tool_call(tool_call, *args, **kwargs):
+        with tracer.span(tool_call["name"], "tool"):
+            return await run_tool_call(tool_call, *args, **kwargs)
+
+    # invoke's path: runs on a tool_pool thread, in a copy of the invoking context
+    @functools.wraps(call_tool)
+    def traced_call_tool(tool_call, *args, **kwargs):
+        with tracer.span(tool_call["name"], "tool"):
+            return call_tool(tool_call, *args, **kwargs)
+
+    executor.invoke, executor.ainvoke = traced_invoke, traced_ainvoke
+    executor._run_tool_call, executor._call_tool = traced_tool_call, traced_call_tool
+    return executor
+
+
+def _traced_iter(tracer: Tracer, name: str, category: str, chunks):
+    # Generators can be closed from another context, so they are timed without touching _sampled
+    sampled = tracer.is_sampled()
+    start = time.perf_counter()
+    count = 0
+    try:
+        for chunk in chunks:
+            count += 1
+            yield chunk
+    finally:
+        tracer.record(name, category, start, time.perf_counter(), sampled, chunks=count)
+
+
+class TracedStep(CRunnable):
+    """One CRunnable step timed as a span; invoke, stream and transform are forwarded."""
+
+    def __init__(self, step: CRunnable, tracer: Tracer):
+        self.step = step
+        self.tracer = tracer
+        self.name = type(step).__name__
+
+    def process(self, data):
+        with self.tracer.span(self.name, "chain"):
+            return self.step.invoke(data)
+
+    def stream(self, data):
+        yield from _traced_iter(self.tracer, f"{self.name}.stream", "chain", self.step.stream(data))
+
+    def transform(self, chunks):
+        yield from _traced_iter(self.tracer, f"{self.name}.transform", "chain", self.step.transform(chunks))
+
+    def transforms_chunks(self):
+        return self.step.transforms_chunks()
+
+
+class TracedSequence(CRunnableSequence):
+    """A CRunnableSequence with a root span per invoke/stream call."""
+
+    def __init__(self, *steps, tracer: Tracer):
+        super().__init__(*steps)
+        self.tracer = tracer
+
+    def process(self, data):
+        with self.tracer.span("CRunnableSequence", "graph", root=True):
+            return super().process(data)
+
+    def stream(self, data):
+        yield from _traced_iter(self.tracer, "CRunnableSequence.stream", "graph", super().stream(data))
+
+
+def trace_crunnable(chain: CRunnable, tracer: Tracer) -> TracedSequence:
+    """A copy of a CRunnable chain whose steps are spans, under one root span per call."""
+    steps = chain.steps if isinstance(chain, CRunnableSequence) else [chain]
+    return TracedSequence(*(TracedStep(step, tracer) for step in steps), tracer=tracer)
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import contextlib
+    import io
+
+    from benchmarks import suites
+    from graph_runner import arun_graph
+
+    # Overhead check on the offline benchmarks: the same graph with and without tracing
+    parser = argparse.ArgumentParser(description="Measure tracing overhead on an offline benchmark graph")
+    parser.add_argument("benchmark", nargs="?", default="react_agent", choices=["react_agent", "rag_agent_graph"])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--sample-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    tracer = Tracer(sample_rate=args.sample_rate)
+    workload = suites.BENCHMARKS[args.benchmark](suites.Settings(latency=0.02, tokens_per_second=2000))
+
+    def timed(run) -> float:
+        with contextlib.redirect_stdout(io.StringIO()):
+            run(-1)
+            start = time.perf_counter()
+            for i in range(args.requests):
+                run(i)
+        return time.perf_counter() - start
+
+    def sync_run(app, *a, **kw):
+        return original_run_graph(app, *a, **kw)
+
+    def async_run(app, *a, **kw):
+        return asyncio.run(arun_graph(app, *a, **kw))
+
+    # The workloads call suites.run_graph; route it through run_graph / arun_graph, plain or traced
+    original_run_graph = suites.run_graph
+    print(f"{args.benchmark}: {args.requests} requests, sample_rate={args.sample_rate}")
+    try:
+        for mode, run_graph_with in (("sync", sync_run), ("async", async_run)):
+            suites.run_graph = run_graph_with
+            plain = timed(workload.run)
+            suites.run_graph = lambda app, *a, _run=run_graph_with, **kw: _run(trace_graph(app, tracer), *a, **kw)
+            traced = timed(workload.run)
+            print(f"  {mode:<6} untraced {plain:.3f}s  traced {traced:.3f}s  "
+                  f"overhead {100 * (traced - plain) / plain:+.2f}%")
+    finally:
+        suites.run_graph = original_run_graph
+    tracer.write_chrome_trace("trace.json")
+    tracer.write_openmetrics("metrics.txt")
+    print(f"  {len(tracer.chrome_trace()['traceEvents'])} spans -> trace.json, metrics -> metrics.txt")
@@ -0,0 +1,205 @@
+import argparse
+import time
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from perf_stats import latency_summary
+
+if TYPE_CHECKING:
+    import faiss
+    import numpy as np
+    from langchain_community.vectorstores import FAISS
+
+# Pluggable FAISS index structures for the RAG stores.
+#   flat     -> exact search, the baseline (what FAISS.from_texts builds)
+#   ivf_flat -> vectors bucketed into `nlist` clusters, only `nprobe` clusters are scanned per query
+#   hnsw     -> graph index; `hnsw_m` links per node, `ef_search` candidates explored per query
+#   ivf_pq   -> IVF + product quantization: each vector compressed to `pq_m` codes of `pq_bits` bits
+# IVF indexes must be trained on a sample of vectors before anything is added.
+# faiss / numpy are imported where they are used, so IndexConfig can be imported by a worker
+# that never builds an index.
+
+INDEX_KINDS = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+
+
+@dataclass
+class IndexConfig:
+    kind: str = "flat"
+    nlist: int = 1024        # IVF: number of clusters
+    nprobe: int = 16         # IVF: clusters scanned per query (recall vs latency)
+    hnsw_m: int = 32         # HNSW: neighbours per node
+    ef_construction: int = 200
+    ef_search: int = 64      # HNSW: search breadth (recall vs latency)
+    pq_m: int = 16           # PQ: sub-vectors per vector (must divide the embedding dim)
+    pq_bits: int = 8         # PQ: bits per sub-vector code
+
+    def __post_init__(self):
+        if self.kind not in INDEX_KINDS:
+            raise ValueError(f"Unknown index kind '{self.kind}', expected one of {INDEX_KINDS}")
+
+
+def _effective_nlist(config: IndexConfig, num_vectors: int) -> int:
+    # FAISS wants roughly 39 training points per cluster; small corpora get fewer clusters
+    return max(1, min(config.nlist, num_vectors // 39))
+
+
+def build_index(vectors: "np.ndarray", config: IndexConfig) -> "faiss.Index":
+    """Creates the index described by `config`, trains it on `vectors` if needed and sets search params.
+
+    Nothing is added; use make_index() for train + add in one go.
+    """
+    import faiss
+
+    num_vectors, dim = vectors.shape
+    nlist = _effective_nlist(config, num_vectors)
+    if config.kind == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif config.kind == "ivf_flat":
+        index = faiss.index_factory(dim, f"IVF{nlist},Flat")
+    elif config.kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, config.hnsw_m)
+        index.hnsw.efConstruction = config.ef_construction
+    else:
+        if dim % config.pq_m:
+            raise ValueError(f"pq_m={config.pq_m} must divide the embedding dim {dim}")
+        if num_vectors < 2 ** config.pq_bits:
+            raise ValueError(f"ivf_pq needs at least {2 ** config.pq_bits} training vectors, got {num_vectors}")
+        index = faiss.index_factory(dim, f"IVF{nlist},PQ{config.pq_m}x{config.pq_bits}")
+
+    if not index.is_trained:
+        index.train(vectors)
+    set_search_params(index, config)
+    return index
+
+
+def set_search_params(index: "faiss.Index", config: IndexConfig) -> None:
+    """Query-time knobs can be changed on a built index without retraining."""
+    import faiss
+
+    if config.kind in ("ivf_flat", "ivf_pq"):
+        faiss.extract_index_ivf(index).nprobe = config.nprobe
+    elif config.kind == "hnsw":
+        index.hnsw.efSearch = config.ef_search
+
+
+def make_index(vectors: "np.ndarray", config: IndexConfig) -> "faiss.Index":
+    index = build_index(vectors, config)
+    index.add(vectors)
+    return index
+
+
+def index_bytes(index: "faiss.Index") -> int:
+    """Memory footprint of an index, measured as its serialized size."""
+    import faiss
+
+    return faiss.serialize_index(index).nbytes
+
+
+def build_faiss_store(texts: List[str], embeddings: Embeddings, config: Optional[IndexConfig] = None,
+                      metadatas: Optional[List[dict]] = None) -> "FAISS":
+    """Same result as FAISS.from_texts(texts, embeddings), but with the index structure from `config`."""
+    import numpy as np
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+
+    config = config or IndexConfig()
+    vectors = embeddings.embed_documents(texts)
+    index = build_index(np.asarray(vectors, dtype=np.float32), config)
+    store = FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={}
+    )
+    store.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas)
+    return store
+
+
+def chroma_collection_metadata(config: IndexConfig) -> Dict[str, object]:
+    """Chroma only offers HNSW; this maps the HNSW knobs onto its collection metadata.
+
+    The settings only apply when the collection is first created.
+    """
+    if config.kind != "hnsw":
+        raise ValueError("Chroma collections only support the 'hnsw' index kind")
+    return {
+        "hnsw:M": config.hnsw_m,
+        "hnsw:construction_ef": config.ef_construction,
+        "hnsw:search_ef": config.ef_search,
+    }
+
+
+# --- BENCHMARK: recall@k and latency vs the flat baseline ---
+
+def benchmark_indexes(vectors: "np.ndarray", queries: "np.ndarray", configs: List[IndexConfig], k: int = 10) -> List[dict]:
+    baseline = make_index(vectors, IndexConfig(kind="flat"))
+    _, ground_truth = baseline.search(queries, k)
+
+    rows = []
+    for config in configs:
+        start = time.perf_counter()
+        index = make_index(vectors, config)
+        build_seconds = time.perf_counter() - start
+
+        latencies, hits = [], 0
+        for query, truth in zip(queries, ground_truth):
+            start = time.perf_counter()
+            _, found = index.search(query[None, :], k)
+            latencies.append(time.perf_counter() - start)
+            hits += len(set(found[0]) & set(truth))
+
+        latency = latency_summary(latencies)
+        rows.append({
+            "kind": config.kind,
+            "recall@k": hits / (k * len(queries)),
+            "p50_ms": latency["p50_ms"],
+            "p99_ms": latency["p99_ms"],
+            "build_s": build_seconds,
+            "memory_mb": index_bytes(index) / (1024 * 1024),
+        })
+    return rows
+
+
+def load_pdf_chunk_vectors(pdf_paths: List[str], embeddings: Embeddings) -> "np.ndarray":
+    import numpy as np
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from pdf_ingestion import stream_chunks, stream_pages
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=600, chunk_overlap=120)
+    texts = [chunk.page_content for chunk in stream_chunks(stream_pages(pdf_paths), splitter)]
+    return np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+
+
+if __name__ == "__main__":
+    import numpy as np
+    from langchain_huggingface import HuggingFaceEmbeddings
+    from embedding_cache import CachedEmbeddings
+
+    parser = argparse.ArgumentParser(description="Recall vs latency of FAISS index kinds on the bundled PDFs")
+    parser.add_argument("pdfs", nargs="*", default=["attention.pdf", "NVIDIA_2024_REPORT.pdf", "EJ1172284.pdf"])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    args = parser.parse_args()
+
+    embeddings = CachedEmbeddings("all-MiniLM-L6-v2", lambda: HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2"))
+    vectors = load_pdf_chunk_vectors(args.pdfs, embeddings)
+    # Queries are held out of the index: a query that is itself indexed is its own nearest
+    # neighbour, which inflates recall (most of all for the approximate kinds)
+    rng = np.random.default_rng(0)
+    order = rng.permutation(len(vectors))
+    num_queries = min(args.queries, len(vectors) // 5)
+    queries, vectors = vectors[order[:num_queries]], vectors[order[num_queries:]]
+    print(f"--- {len(vectors)} indexed chunks, {len(queries)} held-out queries, dim={vectors.shape[1]} ---")
+
+    base = IndexConfig(nlist=args.nlist, nprobe=args.nprobe, ef_search=args.ef_search, hnsw_m=args.hnsw_m)
+    configs = [replace(base, kind=kind) for kind in INDEX_KINDS]
+    print(f"{'kind':<10}{'recall@k':>10}{'p50 ms':>10}{'p99 ms':>10}{'build s':>10}{'mem MB':>10}")
+    for row in benchmark_indexes(vectors, queries, configs, k=args.k):
+        print(f"{row['kind']:<10}{row['recall@k']:>10.3f}{row['p50_ms']:>10.3f}{row['p99_ms']:>10.3f}"
+              f"{row['build_s']:>10.2f}{row['memory_mb']:>10.2f}")
@@ -0,0 +1,84 @@
+import argparse
+import importlib
+import json
+import subprocess
+import sys
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from models import AppConfig
+
+# Every workflow in the repo by name, each built through its module's build_app(config).
+#
+# Importing a workflow module is side-effect free and cheap: no model, vector store, PDF index or
+# database is created, and the heavy libraries (torch / sentence-transformers, chromadb, faiss,
+# yfinance, langchain_groq) are imported by the code that first needs them. A server can import
+# this module before forking its workers; each worker builds a workflow on its first request and
+# reuses it after that (the chat models, embeddings and checkpointers inside are shared singletons).
+#
+#   python workflows.py        # import time of every workflow module and the heavy libraries it loads
+
+WORKFLOWS: Dict[str, str] = {
+    "react_agent": "ReAct_Agent",
+    "rag_agent": "RAG_Agent_LangGraph",
+    "rag_chain": "rag_example",
+    "human_in_the_loop": "Human_in_the_Loop",
+    "memory_agent": "Injected_Memory",
+    "stock_agent": "Injected_Memory_2",
+    "aqi_agent": "agentic",
+    "custom_agent": "custom_agent_executor",
+}
+HEAVY_MODULES = ("torch", "sentence_transformers", "transformers", "onnxruntime", "chromadb", "faiss", "yfinance",
+                 "langchain_groq")
+IMPORT_BUDGET_MS = 200.0
+
+_apps: Dict[Tuple[str, AppConfig], Any] = {}
+_lock = threading.Lock()
+
+
+def build_app(name: str, config: Optional[AppConfig] = None):
+    """The workflow `name` built from `config` (default: AppConfig.from_env()), once per process."""
+    if name not in WORKFLOWS:
+        raise KeyError(f"Unknown workflow '{name}', expected one of {list(WORKFLOWS)}")
+    config = config or AppConfig.from_env()
+    with _lock:
+        app = _apps.get((name, config))
+        if app is None:
+            app = _apps[(name, config)] = importlib.import_module(WORKFLOWS[name]).build_app(config)
+        return app
+
+
+_IMPORT_PROBE = """
+import json, sys, time
+import langchain_core.messages, langgraph.graph
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"ms": (time.perf_counter() - start) * 1000,
+                  "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def import_cost(module: str) -> dict:
+    """Import time of `module` in a fresh interpreter, and which heavy libraries it pulled in.
+
+    langchain_core and langgraph are imported first: every worker needs them, so they are not
+    counted against the module.
+    """
+    output = subprocess.check_output([sys.executable, "-c", _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)])
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import cost of every workflow module")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'workflow':<20}{'module':<24}{'import ms':>10}  heavy libraries loaded")
+    for name, module in WORKFLOWS.items():
+        cost = import_cost(module)
+        over = cost["ms"] > args.budget_ms or cost["heavy"]
+        failed = failed or bool(over)
+        print(f"{name:<20}{module:<24}{cost['ms']:>10.1f}  {', '.join(cost['heavy']) or '-'}"
+              f"{'  <-- over budget' if over else ''}")
+    sys.exit(1 if failed else 0)